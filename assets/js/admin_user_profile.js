@@ -0,0 +1,179 @@
+// 编辑模式切换
+function toggleEditMode(section) {
+    const displayElements = document.querySelectorAll(`#${section}Form .info-value span`);
+    const inputElements = document.querySelectorAll(`#${section}Form .info-value input, #${section}Form .info-value select`);
+    const actionsElement = document.getElementById(`${section}Actions`);
+
+    displayElements.forEach(el => el.classList.add('d-none'));
+    inputElements.forEach(el => el.classList.remove('d-none'));
+    actionsElement.classList.remove('d-none');
+}
+
+// 取消编辑
+function cancelEdit(section) {
+    const displayElements = document.querySelectorAll(`#${section}Form .info-value span`);
+    const inputElements = document.querySelectorAll(`#${section}Form .info-value input, #${section}Form .info-value select`);
+    const actionsElement = document.getElementById(`${section}Actions`);
+
+    displayElements.forEach(el => el.classList.remove('d-none'));
+    inputElements.forEach(el => el.classList.add('d-none'));
+    actionsElement.classList.add('d-none');
+}
+
+// 表单提交处理
+function setupFormSubmit(formId) {
+    const form = document.getElementById(formId);
+    if (!form) return;
+
+    form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        e.stopPropagation(); // 阻止事件冒泡
+
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn ? submitBtn.innerHTML : '';
+
+        // 禁用提交按钮防止重复点击
+        if (submitBtn) {
+            submitBtn.disabled = true;
+            submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> 提交中...';
+        }
+
+        const formData = new FormData(this);
+        fetch(this.action, {
+            method: 'POST',
+            body: formData
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(data.message);
+                    if (formId === 'addQualificationForm') {
+                        // 关闭模态框
+                        const modal = bootstrap.Modal.getInstance(document.getElementById('addQualificationModal'));
+                        modal.hide();
+                    }
+                    location.reload();
+                } else {
+                    alert('操作失败: ' + data.message);
+                    // 重新启用提交按钮
+                    if (submitBtn) {
+                        submitBtn.disabled = false;
+                        submitBtn.innerHTML = originalText;
+                    }
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('操作失败，请重试');
+                // 重新启用提交按钮
+                if (submitBtn) {
+                    submitBtn.disabled = false;
+                    submitBtn.innerHTML = originalText;
+                }
+            });
+    });
+}
+
+// 初始化表单提交 - 只初始化一次
+document.addEventListener('DOMContentLoaded', function () {
+    setupFormSubmit('basicInfoForm');
+    setupFormSubmit('contactInfoForm');
+    setupFormSubmit('addQualificationForm'); // 只在这里初始化一次
+});
+
+// 显示添加资质模态框
+function showAddQualificationModal() {
+    const modal = new bootstrap.Modal(document.getElementById('addQualificationModal'));
+    modal.show();
+}
+
+// 删除资质
+function deleteQualification(type, number) {
+    const message = number
+        ? `确定要删除资质 "${type}" (编号: ${number}) 吗？`
+        : `确定要删除资质 "${type}" 吗？`;
+
+    if (confirm(message)) {
+        fetch(`/admin/user_profile/delete_qualification/${profileUsername}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: `qualification_type=${encodeURIComponent(type)}&qualification_number=${encodeURIComponent(number || '')}`
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(data.message);
+                    location.reload();
+                } else {
+                    alert('删除失败: ' + data.message);
+                }
+            })
+            .catch(error => {
+                alert('删除失败: ' + error);
+            });
+    }
+}
+
+// 重置密码
+function resetPassword(username) {
+    const newPassword = prompt('请输入新密码（至少8位）:');
+    if (newPassword && newPassword.length >= 8) {
+        fetch(`/user_manager/reset_password/${username}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: 'new_password=' + encodeURIComponent(newPassword)
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(data.message);
+                } else {
+                    alert('密码重置失败: ' + data.message);
+                }
+            })
+            .catch(error => {
+                alert('密码重置失败: ' + error);
+            });
+    } else if (newPassword) {
+        alert('密码长度至少8位');
+    }
+}
+
+// 删除用户
+function deleteUser(username) {
+    if (confirm('确定要删除用户 "' + username + '" 吗？此操作不可恢复！')) {
+        fetch(`/user_manager/delete/${username}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            }
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(data.message);
+                    window.location.href = '/user_manager';
+                } else {
+                    alert('删除失败: ' + data.message);
+                }
+            })
+            .catch(error => {
+                alert('删除失败: ' + error);
+            });
+    }
+}
+
+// 模态框关闭时重置表单
+document.getElementById('addQualificationModal').addEventListener('hidden.bs.modal', function () {
+    document.getElementById('addQualificationForm').reset();
+    // 重置提交按钮状态
+    const submitBtn = this.querySelector('button[type="submit"]');
+    if (submitBtn) {
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = '添加';
+    }
+});
@@ -0,0 +1,53 @@
+// 设置开始日期默认值为今天
+document.addEventListener('DOMContentLoaded', function() {
+    const today = new Date();
+    const yyyy = today.getFullYear();
+    const mm = String(today.getMonth() + 1).padStart(2, '0');
+    const dd = String(today.getDate()).padStart(2, '0');
+    const todayStr = `${yyyy}-${mm}-${dd}`;
+
+    document.getElementById('start_date').value = todayStr;
+});
+
+// 表单验证
+document.getElementById('createProjectForm').addEventListener('submit', function(e) {
+    const submitBtn = document.getElementById('submitBtn');
+    const formData = new FormData(this);
+
+    // 禁用提交按钮防止重复提交
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<span class="fallback-icon">⏳</span>创建中...';
+
+    // 这里可以添加额外的客户端验证逻辑
+    const projectName = formData.get('name');
+    const projectType = formData.get('project_type');
+    const clientName = formData.get('client_name');
+    const marketLeader = formData.get('market_leader');
+    const projectLeader = formData.get('project_leader');
+    const startDate = formData.get('start_date');
+
+    if (!projectName || !projectType || !clientName || !marketLeader || !projectLeader || !startDate) {
+        e.preventDefault();
+        alert('请填写所有必填字段');
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = '<span class="fallback-icon">✅</span>创建项目';
+        return;
+    }
+
+    // 如果所有验证通过，表单会正常提交
+});
+
+// 为必填字段添加实时验证
+document.addEventListener('DOMContentLoaded', function() {
+    const requiredFields = document.querySelectorAll('[required]');
+
+    requiredFields.forEach(field => {
+        field.addEventListener('blur', function() {
+            if (!this.value.trim()) {
+                this.classList.add('is-invalid');
+            } else {
+                this.classList.remove('is-invalid');
+            }
+        });
+    });
+});
@@ -0,0 +1,579 @@
+// 检查用户数据是否正确传递
+let currentReportId = '';  // 新增：存储当前报告的ID
+let currentReportNo = '';
+let currentReviewer1 = '';
+let currentReviewer2 = '';
+let currentReviewer3 = '';
+let currentSigner1 = '';
+let currentSigner2 = '';
+
+// 获取用户数据
+function getUsersData() {
+  const usersDataElement = document.getElementById('usersData');
+  if (usersDataElement) {
+    try {
+      return JSON.parse(usersDataElement.getAttribute('data-users'));
+    } catch (e) {
+      console.error('解析用户数据失败:', e);
+    }
+  }
+  return [];
+}
+
+// 设置当前报告信息
+function setCurrentReport(reportId, reportNo, reviewer1, reviewer2, reviewer3, signer1, signer2) {
+  currentReportId = reportId;  // 存储report_id
+  currentReportNo = reportNo;
+  currentReviewer1 = reviewer1;
+  currentReviewer2 = reviewer2;
+  currentReviewer3 = reviewer3;
+  currentSigner1 = signer1;
+  currentSigner2 = signer2;
+
+  // 设置模态框中的默认值
+  document.getElementById('modalReviewer1').value = reviewer1;
+  document.getElementById('modalReviewer2').value = reviewer2;
+  document.getElementById('modalReviewer3').value = reviewer3;
+  document.getElementById('modalSigner1').value = signer1;
+  document.getElementById('modalSigner2').value = signer2;
+}
+
+// 提交复核人表单
+function submitReviewersForm() {
+  const reviewer1 = document.getElementById('modalReviewer1').value;
+  const reviewer2 = document.getElementById('modalReviewer2').value;
+  const reviewer3 = document.getElementById('modalReviewer3').value;
+
+  // 客户端验证复核人：必须3个都有且不能重复
+  if (!reviewer1 || !reviewer2 || !reviewer3) {
+    alert('必须设置3个复核人，不能有空缺');
+    return false;
+  }
+
+  const reviewers = [reviewer1, reviewer2, reviewer3];
+  if (reviewers.length !== new Set(reviewers).size) {
+    alert('复核人不能重复，请选择3个不同的复核人');
+    return false;
+  }
+
+  const form = document.getElementById('reviewersForm');
+  // 添加隐藏字段，确保签字人字段不被设置为空
+  const signer1Input = document.createElement('input');
+  signer1Input.type = 'hidden';
+  signer1Input.name = 'signer1';
+  signer1Input.value = currentSigner1;
+  form.appendChild(signer1Input);
+
+  const signer2Input = document.createElement('input');
+  signer2Input.type = 'hidden';
+  signer2Input.name = 'signer2';
+  signer2Input.value = currentSigner2;
+  form.appendChild(signer2Input);
+
+  form.action = `/project/${projectNo}/update_report/${currentReportId}`;  // 使用report_id
+  form.submit();
+}
+
+// 提交签字人表单
+function submitSignersForm() {
+  const signer1 = document.getElementById('modalSigner1').value;
+  const signer2 = document.getElementById('modalSigner2').value;
+
+  // 客户端验证签字人：必须2个都有且不能重复
+  if (!signer1 || !signer2) {
+    alert('必须设置2个签字人，不能有空缺');
+    return false;
+  }
+
+  if (signer1 === signer2) {
+    alert('签字人不能重复，请选择2个不同的签字人');
+    return false;
+  }
+
+  const form = document.getElementById('signersForm');
+  // 添加隐藏字段，确保复核人字段不被设置为空
+  const reviewer1Input = document.createElement('input');
+  reviewer1Input.type = 'hidden';
+  reviewer1Input.name = 'reviewer1';
+  reviewer1Input.value = currentReviewer1;
+  form.appendChild(reviewer1Input);
+
+  const reviewer2Input = document.createElement('input');
+  reviewer2Input.type = 'hidden';
+  reviewer2Input.name = 'reviewer2';
+  reviewer2Input.value = currentReviewer2;
+  form.appendChild(reviewer2Input);
+
+  const reviewer3Input = document.createElement('input');
+  reviewer3Input.type = 'hidden';
+  reviewer3Input.name = 'reviewer3';
+  reviewer3Input.value = currentReviewer3;
+  form.appendChild(reviewer3Input);
+
+  form.action = `/project/${projectNo}/update_report/${currentReportId}`;  // 使用report_id
+  form.submit();
+}
+
+// 为所有表单添加确认对话框（排除文件上传表单）
+document.querySelectorAll('form').forEach(form => {
+  const submitButton = form.querySelector('button[type="submit"]');
+  if (submitButton) {
+    const buttonText = submitButton.textContent.trim();
+    if (['暂停项目', '继续项目', '结束项目', '重新开启'].includes(buttonText)) {
+      form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        let message = '';
+
+        switch (buttonText) {
+          case '暂停项目':
+            message = '确定要暂停这个项目吗？项目状态将改为"已暂停"。';
+            break;
+          case '继续项目':
+            message = '确定要继续这个项目吗？项目状态将恢复为"进行中"。';
+            break;
+          case '结束项目':
+            message = '确定要结束这个项目吗？此操作将把项目状态改为"已完成"。';
+            break;
+          case '重新开启':
+            message = '确定要重新开启这个项目吗？项目状态将恢复为"进行中"。';
+            break;
+        }
+
+        if (confirm(message)) {
+          this.submit();
+        }
+      });
+    }
+  }
+});
+
+// 切换备案选择和签字人显示的函数
+function toggleFilingAndSigners() {
+  const reportType = document.getElementById('reportTypeSelect').value;
+  const filingSection = document.getElementById('filingSection');
+  const filingSelect = document.getElementById('filingSelect');
+  const signersSection = document.getElementById('signersSection');
+  const signer1Select = document.getElementById('modalSigner1');
+  const signer2Select = document.getElementById('modalSigner2');
+  const qualificationRequirement = document.getElementById('qualificationRequirement');
+  const resultSection = document.getElementById('resultSection');
+  const copyButton = document.getElementById('copyButton');
+
+  console.log('选择的报告类型:', reportType);
+
+  // 需要备案的报告类型
+  const filingRequiredTypes = ["房地产估价报告", "资产评估报告", "土地报告"];
+
+  // 需要签字的报告类型
+  const signatureRequiredTypes = ["房地产估价报告", "资产评估报告", "土地报告"];
+
+  // 控制备案选择显示
+  if (filingRequiredTypes.includes(reportType)) {
+    filingSection.style.display = 'block';
+    filingSelect.required = true;
+  } else {
+    filingSection.style.display = 'none';
+    filingSelect.required = false;
+    filingSelect.value = '';
+  }
+
+  // 控制签字人显示
+  if (signatureRequiredTypes.includes(reportType)) {
+    signersSection.style.display = 'block';
+    signer1Select.required = true;
+    signer2Select.required = true;
+
+    // 设置资质要求提示
+    const qualificationMap = {
+      "资产评估报告": "资产评估师",
+      "房地产估价报告": "房地产估价师",
+      "土地报告": "土地估价师"
+    };
+    const requiredQualification = qualificationMap[reportType];
+    qualificationRequirement.textContent = `需要${requiredQualification}资质`;
+
+    // 只显示具备资质的用户
+    filterQualifiedUsers(reportType);
+  } else {
+    signersSection.style.display = 'none';
+    signer1Select.required = false;
+    signer2Select.required = false;
+    signer1Select.value = '';
+    signer2Select.value = '';
+  }
+
+  // 隐藏结果区域
+  resultSection.style.display = 'none';
+  copyButton.style.display = 'none';
+}
+
+// 只显示具备相应资质的用户
+function filterQualifiedUsers(reportType) {
+  const qualificationMap = {
+    "资产评估报告": "资产评估师",
+    "房地产估价报告": "房地产估价师",
+    "土地报告": "土地估价师"
+  };
+  const requiredQualification = qualificationMap[reportType];
+
+  console.log('需要的资质:', requiredQualification);
+  console.log('报告类型:', reportType);
+
+  // 处理签字人1的下拉框
+  const signer1Select = document.getElementById('modalSigner1');
+  const signer1OriginalOptions = Array.from(signer1Select.options);
+
+  console.log('原始选项数量:', signer1OriginalOptions.length);
+
+  // 清空现有选项（保留第一个提示选项）
+  signer1Select.innerHTML = '<option value="">请选择签字人1</option>';
+
+  let qualifiedCount = 0;
+
+  // 添加具备资质的用户
+  signer1OriginalOptions.forEach(option => {
+    if (option.value && option.value !== '') {
+      const qualifications = option.getAttribute('data-qualifications') || '';
+      console.log(`用户 ${option.textContent} 的资质:`, qualifications);
+
+      if (qualifications.includes(requiredQualification)) {
+        // 创建新选项
+        const newOption = document.createElement('option');
+        newOption.value = option.value;
+        newOption.textContent = option.textContent.split(' (')[0]; // 只显示姓名，不显示资质
+        newOption.setAttribute('data-qualifications', qualifications);
+        signer1Select.appendChild(newOption);
+        qualifiedCount++;
+        console.log(`✅ 用户 ${option.textContent} 具备资质`);
+      }
+    }
+  });
+
+  console.log('找到的具备资质用户数量:', qualifiedCount);
+
+  // 如果没有具备资质的用户，显示提示
+  if (qualifiedCount === 0) {
+    const noQualifiedOption = document.createElement('option');
+    noQualifiedOption.value = '';
+    noQualifiedOption.textContent = '暂无具备资质的用户';
+    noQualifiedOption.disabled = true;
+    signer1Select.appendChild(noQualifiedOption);
+    console.log('❌ 没有找到具备资质的用户');
+  }
+
+  // 同样处理签字人2的下拉框
+  const signer2Select = document.getElementById('modalSigner2');
+  const signer2OriginalOptions = Array.from(signer2Select.options);
+
+  // 清空现有选项（保留第一个提示选项）
+  signer2Select.innerHTML = '<option value="">请选择签字人2</option>';
+
+  // 添加具备资质的用户
+  signer2OriginalOptions.forEach(option => {
+    if (option.value && option.value !== '') {
+      const qualifications = option.getAttribute('data-qualifications') || '';
+      if (qualifications.includes(requiredQualification)) {
+        // 创建新选项
+        const newOption = document.createElement('option');
+        newOption.value = option.value;
+        newOption.textContent = option.textContent.split(' (')[0]; // 只显示姓名，不显示资质
+        newOption.setAttribute('data-qualifications', qualifications);
+        signer2Select.appendChild(newOption);
+      }
+    }
+  });
+
+  // 如果没有具备资质的用户，显示提示
+  if (signer2Select.options.length === 1) {
+    const noQualifiedOption = document.createElement('option');
+    noQualifiedOption.value = '';
+    noQualifiedOption.textContent = '暂无具备资质的用户';
+    noQualifiedOption.disabled = true;
+    signer2Select.appendChild(noQualifiedOption);
+  }
+}
+
+// 修改生成报告号函数，添加签字人验证
+async function generateReportNo() {
+  const reportType = document.getElementById('reportTypeSelect').value;
+  const filingSelect = document.getElementById('filingSelect');
+  const isFiling = filingSelect.value;
+  const reviewer1 = document.getElementById('modalReviewer1').value;
+  const reviewer2 = document.getElementById('modalReviewer2').value;
+  const reviewer3 = document.getElementById('modalReviewer3').value;
+  const signer1Select = document.getElementById('modalSigner1');
+  const signer2Select = document.getElementById('modalSigner2');
+  const signer1 = signer1Select.value;
+  const signer2 = signer2Select.value;
+
+  // 验证报告类型
+  if (!reportType) {
+    alert('请选择报告类型');
+    return;
+  }
+
+  // 验证备案选择
+  const filingRequiredTypes = ["房地产估价报告", "资产评估报告", "土地报告"];
+  if (filingRequiredTypes.includes(reportType) && !isFiling) {
+    alert('请选择是否备案');
+    return;
+  }
+
+  // 验证复核人：必须3个都有且不能重复
+  if (!reviewer1 || !reviewer2 || !reviewer3) {
+    alert('必须设置3个复核人，不能有空缺');
+    return;
+  }
+
+  const reviewers = [reviewer1, reviewer2, reviewer3];
+  if (reviewers.length !== new Set(reviewers).size) {
+    alert('复核人不能重复，请选择3个不同的复核人');
+    return;
+  }
+
+  // 验证签字人：只有需要签字的报告类型才验证
+  const signatureRequiredTypes = ["房地产估价报告", "资产评估报告", "土地报告"];
+  if (signatureRequiredTypes.includes(reportType)) {
+    if (!signer1 || !signer2) {
+      alert('必须设置2个签字人，不能有空缺');
+      return;
+    }
+
+    if (signer1 === signer2) {
+      alert('签字人不能重复，请选择2个不同的签字人');
+      return;
+    }
+
+    // 检查是否有"暂无具备资质的用户"选项被选中
+    if (signer1Select.options[signer1Select.selectedIndex].disabled ||
+      signer2Select.options[signer2Select.selectedIndex].disabled) {
+      alert('请选择有效的签字人');
+      return;
+    }
+  }
+
+  try {
+    const formData = new FormData();
+    formData.append('report_type', reportType);
+    if (isFiling) {
+      formData.append('is_filing', isFiling);
+    }
+    formData.append('reviewer1', reviewer1);
+    formData.append('reviewer2', reviewer2);
+    formData.append('reviewer3', reviewer3);
+    formData.append('signer1', signer1);
+    formData.append('signer2', signer2);
+
+    const response = await fetch(`/project/${projectNo}/generate_report_no`, {
+      method: 'POST',
+      body: formData
+    });
+
+    if (response.ok) {
+      const result = await response.json();
+      document.getElementById('generatedReportNo').value = result.report_no;
+      document.getElementById('resultSection').style.display = 'block';
+
+      // 隐藏生成按钮，显示复制按钮
+      document.getElementById('generateButton').style.display = 'none';
+      document.getElementById('copyButton').style.display = 'inline-block';
+
+      // 将取消按钮改为完成按钮
+      document.getElementById('cancelButton').textContent = '完成';
+      document.getElementById('cancelButton').classList.remove('btn-secondary');
+      document.getElementById('cancelButton').classList.add('btn-primary');
+      document.getElementById('cancelButton').removeAttribute('data-bs-dismiss');
+      document.getElementById('cancelButton').setAttribute('onclick', 'closeAndRefresh()');
+    } else {
+      const error = await response.json();
+      alert('生成报告号失败: ' + error.detail);
+    }
+  } catch (error) {
+    alert('生成报告号失败: ' + error.message);
+  }
+}
+
+// 重置签字人下拉框到原始状态
+function resetSignerSelects() {
+  const signer1Select = document.getElementById('modalSigner1');
+  const signer2Select = document.getElementById('modalSigner2');
+  const users = getUsersData();
+
+  // 重新构建原始选项
+  signer1Select.innerHTML = '<option value="">请选择签字人1</option>';
+  signer2Select.innerHTML = '<option value="">请选择签字人2</option>';
+
+  // 使用用户数据重新构建选项
+  users.forEach(user => {
+    const option1 = document.createElement('option');
+    option1.value = user.username;
+    option1.textContent = user.realname;
+    option1.setAttribute('data-qualifications', user.qualifications ? user.qualifications.join(',') : '');
+    signer1Select.appendChild(option1);
+
+    const option2 = document.createElement('option');
+    option2.value = user.username;
+    option2.textContent = user.realname;
+    option2.setAttribute('data-qualifications', user.qualifications ? user.qualifications.join(',') : '');
+    signer2Select.appendChild(option2);
+  });
+}
+
+// 模态框关闭时重置表单和按钮
+document.getElementById('generateReportModal').addEventListener('hidden.bs.modal', function () {
+  document.getElementById('generateReportForm').reset();
+  document.getElementById('filingSection').style.display = 'none';
+  document.getElementById('signersSection').style.display = 'none';
+  document.getElementById('resultSection').style.display = 'none';
+
+  // 重置按钮状态
+  document.getElementById('generateButton').style.display = 'inline-block';
+  document.getElementById('copyButton').style.display = 'none';
+
+  // 重置取消按钮
+  document.getElementById('cancelButton').textContent = '取消';
+  document.getElementById('cancelButton').classList.remove('btn-primary');
+  document.getElementById('cancelButton').classList.add('btn-secondary');
+  document.getElementById('cancelButton').setAttribute('onclick', '');
+  document.getElementById('cancelButton').setAttribute('data-bs-dismiss', 'modal');
+
+  // 重置签字人下拉框到原始状态
+  resetSignerSelects();
+});
+
+// 模态框显示时重置表单和按钮
+document.getElementById('generateReportModal').addEventListener('show.bs.modal', function () {
+  document.getElementById('generateReportForm').reset();
+  document.getElementById('filingSection').style.display = 'none';
+  document.getElementById('signersSection').style.display = 'none';
+  document.getElementById('resultSection').style.display = 'none';
+
+  // 确保按钮状态正确
+  document.getElementById('generateButton').style.display = 'inline-block';
+  document.getElementById('copyButton').style.display = 'none';
+
+  // 确保取消按钮状态正确
+  document.getElementById('cancelButton').textContent = '取消';
+  document.getElementById('cancelButton').classList.remove('btn-primary');
+  document.getElementById('cancelButton').classList.add('btn-secondary');
+  document.getElementById('cancelButton').setAttribute('onclick', '');
+  document.getElementById('cancelButton').setAttribute('data-bs-dismiss', 'modal');
+
+  // 重置签字人下拉框到原始状态
+  resetSignerSelects();
+});
+
+// 复制报告号
+function copyReportNo() {
+  const reportNoInput = document.getElementById('generatedReportNo');
+  reportNoInput.select();
+  document.execCommand('copy');
+  alert('报告号已复制到剪贴板');
+}
+
+// 关闭模态框并刷新页面
+function closeAndRefresh() {
+  const modal = bootstrap.Modal.getInstance(document.getElementById('generateReportModal'));
+  modal.hide();
+
+  // 刷新页面以显示新添加的报告
+  setTimeout(() => {
+    location.reload();
+  }, 500);
+}
+
+// 确认删除报告 - 使用report_id
+function confirmDeleteReport(reportId) {
+  if (confirm(`确定要删除这个报告吗？\n\n此操作将永久删除报告及其所有文件，且无法恢复！`)) {
+    // 创建隐藏表单来提交删除请求
+    const form = document.createElement('form');
+    form.method = 'POST';
+    form.action = `/project/${projectNo}/delete_report/${reportId}`;  // 使用report_id
+
+    // 添加CSRF令牌（如果需要）
+    const csrfToken = document.createElement('input');
+    csrfToken.type = 'hidden';
+    csrfToken.name = 'csrf_token';
+    csrfToken.value = csrfTokenValue; // 如果有CSRF保护的话
+
+    form.appendChild(csrfToken);
+    document.body.appendChild(form);
+    form.submit();
+  }
+}
+
+// 字符计数功能
+document.getElementById('progressInput').addEventListener('input', function () {
+  const charCount = this.value.length;
+  document.getElementById('charCount').textContent = charCount;
+
+  // 可选：当接近字数限制时改变颜色
+  if (charCount > 45) {
+    document.getElementById('charCount').classList.add('text-danger');
+  } else {
+    document.getElementById('charCount').classList.remove('text-danger');
+  }
+});
+
+// 模态框显示时初始化字符计数
+document.getElementById('updateProgressModal').addEventListener('show.bs.modal', function () {
+  const progressInput = document.getElementById('progressInput');
+  const charCount = progressInput.value.length;
+  document.getElementById('charCount').textContent = charCount;
+
+  if (charCount > 45) {
+    document.getElementById('charCount').classList.add('text-danger');
+  } else {
+    document.getElementById('charCount').classList.remove('text-danger');
+  }
+});
+
+// 修改进度表单验证，只做提示不阻止提交
+document.getElementById('updateProgressForm').addEventListener('submit', function (e) {
+  const progressInput = document.getElementById('progressInput');
+  if (progressInput.value.length > 50) {
+    alert('进度描述不能超过50字，请修改后重新提交。');
+    progressInput.focus();
+    e.preventDefault(); // 只在超长时阻止
+  }
+});
+
+// 确认删除文件
+function confirmDeleteFile(fileId, fileName, reportId) {
+  if (confirm(`确定要删除文件 "${fileName}" 吗？\n\n此操作将永久删除文件，且无法恢复！`)) {
+    // 创建隐藏表单来提交删除请求
+    const form = document.createElement('form');
+    form.method = 'POST';
+    form.action = `/project/${projectNo}/delete_report_file/${reportId}/${fileId}`;
+
+    // 添加CSRF令牌（如果需要）
+    const csrfToken = document.createElement('input');
+    csrfToken.type = 'hidden';
+    csrfToken.name = 'csrf_token';
+    csrfToken.value = csrfTokenValue; // 如果有CSRF保护的话
+
+    form.appendChild(csrfToken);
+    document.body.appendChild(form);
+    form.submit();
+  }
+}
+
+// 确认删除合同文件
+function confirmDeleteContractFile(fileId, fileName) {
+  if (confirm(`确定要删除合同文件 "${fileName}" 吗？\n\n此操作将永久删除文件，且无法恢复！`)) {
+    // 创建隐藏表单来提交删除请求
+    const form = document.createElement('form');
+    form.method = 'POST';
+    form.action = `/project/${projectNo}/delete_contract_file/${fileId}`;
+
+    // 添加CSRF令牌（如果需要）
+    const csrfToken = document.createElement('input');
+    csrfToken.type = 'hidden';
+    csrfToken.name = 'csrf_token';
+    csrfToken.value = csrfTokenValue; // 如果有CSRF保护的话
+
+    form.appendChild(csrfToken);
+    document.body.appendChild(form);
+    form.submit();
+  }
+}
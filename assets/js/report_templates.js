@@ -0,0 +1,162 @@
+// 筛选功能
+document.addEventListener('DOMContentLoaded', function () {
+    const filterBadges = document.querySelectorAll('.filter-badge');
+    const tableRows = document.querySelectorAll('#templatesTable tr');
+    const noResults = document.getElementById('noResults');
+
+    // 初始化筛选
+    filterTable('all');
+
+    // 为每个筛选标签添加点击事件
+    filterBadges.forEach(badge => {
+        badge.addEventListener('click', function () {
+            // 更新激活状态
+            filterBadges.forEach(b => b.classList.remove('active'));
+            this.classList.add('active');
+
+            // 获取筛选类别
+            const category = this.getAttribute('data-category');
+            filterTable(category);
+        });
+    });
+
+    function filterTable(category) {
+        let visibleCount = 0;
+
+        tableRows.forEach(row => {
+            const rowCategory = row.getAttribute('data-category');
+            if (category === 'all' || rowCategory === category) {
+                row.style.display = '';
+                visibleCount++;
+            } else {
+                row.style.display = 'none';
+            }
+        });
+
+        // 显示/隐藏无结果提示
+        if (visibleCount === 0) {
+            noResults.classList.remove('d-none');
+        } else {
+            noResults.classList.add('d-none');
+        }
+    }
+});
+
+// 文件上传相关功能
+function handleFileSelect(input) {
+    const file = input.files[0];
+    if (file) {
+        document.getElementById('fileName').textContent = file.name;
+        document.getElementById('filePreview').style.display = 'block';
+    }
+}
+
+function clearFile() {
+    document.getElementById('templateFile').value = '';
+    document.getElementById('filePreview').style.display = 'none';
+}
+
+// 拖拽上传功能
+document.addEventListener('DOMContentLoaded', function () {
+    const uploadArea = document.getElementById('fileUploadArea');
+
+    ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, preventDefaults, false);
+    });
+
+    function preventDefaults(e) {
+        e.preventDefault();
+        e.stopPropagation();
+    }
+
+    ['dragenter', 'dragover'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, highlight, false);
+    });
+
+    ['dragleave', 'drop'].forEach(eventName => {
+        uploadArea.addEventListener(eventName, unhighlight, false);
+    });
+
+    function highlight() {
+        uploadArea.classList.add('dragover');
+    }
+
+    function unhighlight() {
+        uploadArea.classList.remove('dragover');
+    }
+
+    uploadArea.addEventListener('drop', handleDrop, false);
+
+    function handleDrop(e) {
+        const dt = e.dataTransfer;
+        const files = dt.files;
+        document.getElementById('templateFile').files = files;
+        handleFileSelect(document.getElementById('templateFile'));
+    }
+});
+
+// 删除模板
+function deleteTemplate(id, fileName) {
+    if (confirm(`确定要删除报告模板 "${fileName}" 吗？`)) {
+        fetch(`/admin/report_templates/delete/${id}`, {
+            method: 'POST'
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(data.message);
+                    location.reload();
+                } else {
+                    alert('删除失败: ' + data.message);
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('删除失败，请重试');
+            });
+    }
+}
+
+// 显示添加模态框
+function showAddModal() {
+    document.getElementById('addTemplateForm').reset();
+    document.getElementById('filePreview').style.display = 'none';
+    const modal = new bootstrap.Modal(document.getElementById('addTemplateModal'));
+    modal.show();
+}
+
+// 添加模板
+function addTemplate() {
+    const formData = new FormData(document.getElementById('addTemplateForm'));
+    const templateFile = document.getElementById('templateFile').files[0];
+
+    if (!templateFile) {
+        alert('请选择模板文件');
+        return;
+    }
+
+    // 验证类别
+    const category = document.getElementById('templateCategory').value;
+    if (!category) {
+        alert('请选择模板类别');
+        return;
+    }
+
+    fetch('/admin/report_templates/add', {
+        method: 'POST',
+        body: formData
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                alert(data.message);
+                location.reload();
+            } else {
+                alert('添加失败: ' + data.message);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('添加失败，请重试');
+        });
+}
@@ -0,0 +1,326 @@
+// 全局变量
+let currentPage = 1;
+let pageSize = 20;
+let totalCount = 0;
+let totalPages = 0;
+let currentSearch = '';
+let currentStatus = 'all';
+let searchTimeout;
+// 游标分页：相邻页使用服务端返回的游标，跳页时按页码查询
+let nextCursor = null;
+let prevCursor = null;
+let pageCursor = null;
+
+// 页面加载完成后初始化
+document.addEventListener('DOMContentLoaded', function () {
+    // 初始化事件监听
+    initializeEventListeners();
+
+    // 加载第一页数据
+    loadProjects();
+});
+
+// 初始化事件监听器
+function initializeEventListeners() {
+    // 状态筛选器事件
+    const statusFilters = document.querySelectorAll('input[name="statusFilter"]');
+    statusFilters.forEach(filter => {
+        filter.addEventListener('change', function () {
+            currentStatus = this.value;
+            currentPage = 1; // 重置到第一页
+            loadProjects();
+        });
+    });
+
+    // 每页显示数量选择
+    document.getElementById('pageSizeSelect').addEventListener('change', function() {
+        pageSize = parseInt(this.value);
+        currentPage = 1; // 重置到第一页
+        loadProjects();
+    });
+}
+
+// 处理搜索输入（防抖）
+function handleSearch() {
+    const searchInput = document.getElementById('projectSearch');
+    const clearBtn = document.getElementById('clearSearchBtn');
+
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(function() {
+        currentSearch = searchInput.value.trim();
+        currentPage = 1; // 搜索时重置到第一页
+        loadProjects();
+
+        // 显示/隐藏清除按钮
+        clearBtn.style.display = currentSearch ? 'block' : 'none';
+    }, 500); // 500ms延迟
+}
+
+// 清除搜索
+function clearSearch() {
+    document.getElementById('projectSearch').value = '';
+    document.getElementById('clearSearchBtn').style.display = 'none';
+    currentSearch = '';
+    currentPage = 1;
+    loadProjects();
+}
+
+// 加载项目数据
+async function loadProjects() {
+    showLoading(true);
+
+    try {
+        // 构建查询参数
+        const params = new URLSearchParams({
+            page: currentPage,
+            limit: pageSize
+        });
+
+        if (currentSearch) {
+            params.append('search', currentSearch);
+        }
+
+        if (currentStatus !== 'all') {
+            params.append('status', currentStatus);
+        }
+
+        if (pageCursor) {
+            params.append('cursor', pageCursor);
+        }
+
+        // 发送请求到后端API
+        const response = await fetch(`/user_dashboard/projects?${params.toString()}`);
+        const result = await response.json();
+
+        if (result.success) {
+            const data = result.data;
+            totalCount = data.total_count;
+            totalPages = data.total_pages;
+            nextCursor = data.next_cursor;
+            prevCursor = data.prev_cursor;
+
+            // 渲染项目表格
+            renderProjectsTable(data.projects);
+
+            // 更新分页信息
+            updatePaginationInfo(data);
+
+            // 渲染分页控件
+            renderPagination();
+        } else {
+            showError('加载项目失败: ' + result.message);
+        }
+    } catch (error) {
+        console.error('加载项目失败:', error);
+        showError('网络错误，请稍后重试');
+    } finally {
+        pageCursor = null;
+        showLoading(false);
+    }
+}
+
+// 渲染项目表格
+function renderProjectsTable(projects) {
+    const tbody = document.getElementById('projectsTableBody');
+
+    if (projects.length === 0) {
+        tbody.innerHTML = `
+            <tr id="noResultsRow">
+                <td colspan="12" class="text-center py-4 text-muted">
+                    <div class="mb-2">
+                        <span class="fallback-icon" style="font-size: 24px;">🔍</span>
+                    </div>
+                    <p class="mb-1">未找到匹配的项目</p>
+                    <small>请尝试其他搜索关键词或筛选条件</small>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    let html = '';
+
+    projects.forEach(project => {
+        // 格式化金额
+        let amountDisplay = '0元';
+        if (project.amount) {
+            const amount = parseFloat(project.amount);
+            if (amount >= 10000) {
+                amountDisplay = `${(amount / 10000).toFixed(2)}万`;
+            } else {
+                amountDisplay = `${Math.round(amount)}元`;
+            }
+        }
+
+        // 处理报告号
+        let reportNumbersHtml = '<span class="text-muted">无报告</span>';
+        if (project.report_numbers) {
+            const reports = project.report_numbers.split(',');
+            reportNumbersHtml = reports
+                .filter(report => report.trim())
+                .map((report, index) => `<div>${index + 1}. ${report.trim()}</div>`)
+                .join('');
+        }
+
+        // 状态徽章
+        let statusBadge = '';
+        switch (project.status) {
+            case 'active':
+                statusBadge = '<span class="badge status-badge status-active">进行中</span>';
+                break;
+            case 'completed':
+                statusBadge = '<span class="badge status-badge status-completed">已完成</span>';
+                break;
+            case 'paused':
+                statusBadge = '<span class="badge status-badge status-paused">已暂停</span>';
+                break;
+            case 'cancelled':
+                statusBadge = '<span class="badge status-badge status-cancelled">已取消</span>';
+                break;
+            default:
+                statusBadge = '<span class="badge status-badge status-active">进行中</span>';
+        }
+
+        // 全文检索命中时显示高亮；命中报告号或负责人时显示摘要
+        const matchedInColumns = [project.project_no_highlight, project.name_highlight, project.client_name_highlight]
+          .some(value => value && value.includes('<mark>'));
+        const snippetHtml = project.search_snippet && !matchedInColumns ?
+          `<div class="small text-muted">${project.search_snippet}</div>` : '';
+
+        html += `
+            <tr data-status="${project.status}" onclick="window.location.href='/project/${project.project_no}'">
+                <td>${project.project_no_highlight || project.project_no || ''}</td>
+                <td>${project.name_highlight || project.name || ''}${snippetHtml}</td>
+                <td>${project.project_type || ''}</td>
+                <td>${project.client_name_highlight || project.client_name || ''}</td>
+                <td>
+                    ${project.market_leader_realname ? 
+                        `<svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" fill="currentColor" class="bi bi-person-fill me-1" viewBox="0 0 16 16">
+                            <path d="M3 14s-1 0-1-1 1-4 6-4 6 3 6 4-1 1-1 1H3Zm5-6a3 3 0 1 0 0-6 3 3 0 0 0 0 6Z"/>
+                        </svg>${project.market_leader_realname}` :
+                        '<span class="text-muted">未设置</span>'
+                    }
+                </td>
+                <td>
+                    ${project.project_leader_realname ? 
+                        `<svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" fill="currentColor" class="bi bi-person-fill me-1" viewBox="0 0 16 16">
+                            <path d="M3 14s-1 0-1-1 1-4 6-4 6 3 6 4-1 1-1 1H3Zm5-6a3 3 0 1 0 0-6 3 3 0 0 0 0 6Z"/>
+                        </svg>${project.project_leader_realname}` :
+                        '<span class="text-muted">未设置</span>'
+                    }
+                </td>
+                <td>${project.progress || ''}</td>
+                <td>${reportNumbersHtml}</td>
+                <td class="amount-cell">${amountDisplay}</td>
+                <td>${project.is_paid || ''}</td>
+                <td>${project.start_date || ''}</td>
+                <td>${statusBadge}</td>
+            </tr>
+        `;
+    });
+
+    tbody.innerHTML = html;
+}
+
+// 更新分页信息
+function updatePaginationInfo(data) {
+    const start = ((data.current_page - 1) * data.page_size) + 1;
+    const end = Math.min(start + data.page_size - 1, data.total_count);
+
+    document.getElementById('paginationInfo').textContent = 
+        `第 ${start}-${end} 条，共 ${data.total_count} 条`;
+}
+
+// 渲染分页控件
+function renderPagination() {
+    const pagination = document.getElementById('pagination');
+
+    if (totalPages <= 1) {
+        pagination.innerHTML = '';
+        return;
+    }
+
+    let html = '';
+
+    // 上一页按钮
+    html += `
+        <li class="page-item ${currentPage === 1 ? 'disabled' : ''}">
+            <button class="page-link" ${currentPage === 1 ? 'disabled' : ''} onclick="goToPage(${currentPage - 1})">
+                <span class="fallback-icon">←</span> 上一页
+            </button>
+        </li>
+    `;
+
+    // 页码按钮
+    const maxVisiblePages = 5;
+    let startPage = Math.max(1, currentPage - Math.floor(maxVisiblePages / 2));
+    let endPage = Math.min(totalPages, startPage + maxVisiblePages - 1);
+
+    if (endPage - startPage + 1 < maxVisiblePages) {
+        startPage = Math.max(1, endPage - maxVisiblePages + 1);
+    }
+
+    // 第一页
+    if (startPage > 1) {
+        html += `
+            <li class="page-item">
+                <button class="page-link" onclick="goToPage(1)">1</button>
+            </li>
+            ${startPage > 2 ? '<li class="page-item disabled"><span class="page-link">...</span></li>' : ''}
+        `;
+    }
+
+    // 中间页码
+    for (let i = startPage; i <= endPage; i++) {
+        html += `
+            <li class="page-item ${i === currentPage ? 'active' : ''}">
+                <button class="page-link" onclick="goToPage(${i})">${i}</button>
+            </li>
+        `;
+    }
+
+    // 最后一页
+    if (endPage < totalPages) {
+        html += `
+            ${endPage < totalPages - 1 ? '<li class="page-item disabled"><span class="page-link">...</span></li>' : ''}
+            <li class="page-item">
+                <button class="page-link" onclick="goToPage(${totalPages})">${totalPages}</button>
+            </li>
+        `;
+    }
+
+    // 下一页按钮
+    html += `
+        <li class="page-item ${currentPage === totalPages ? 'disabled' : ''}">
+            <button class="page-link" ${currentPage === totalPages ? 'disabled' : ''} onclick="goToPage(${currentPage + 1})">
+                下一页 <span class="fallback-icon">→</span>
+            </button>
+        </li>
+    `;
+
+    pagination.innerHTML = html;
+}
+
+// 跳转到指定页
+function goToPage(page) {
+    if (page < 1 || page > totalPages || page === currentPage) return;
+
+    pageCursor = page === currentPage + 1 ? nextCursor : (page === currentPage - 1 ? prevCursor : null);
+    currentPage = page;
+    loadProjects();
+
+    // 滚动到表格顶部
+    document.querySelector('.projects-table-container').scrollIntoView({ behavior: 'smooth' });
+}
+
+// 显示/隐藏加载指示器
+function showLoading(show) {
+    const overlay = document.getElementById('loadingOverlay');
+    overlay.style.display = show ? 'flex' : 'none';
+}
+
+// 显示错误信息
+function showError(message) {
+    // 可以使用Toast或Alert显示错误信息
+    alert(message);
+}
@@ -0,0 +1,120 @@
+// 查看用户详情
+function viewUserDetail(username) {
+  window.location.href = `/admin/user_profile/${username}`;
+}
+
+// 添加用户函数
+function addUser() {
+  const addUserModal = new bootstrap.Modal(document.getElementById('addUserModal'));
+  addUserModal.show();
+}
+
+// 用户筛选功能
+document.addEventListener('DOMContentLoaded', function () {
+  const userTypeFilters = document.querySelectorAll('input[name="userTypeFilter"]');
+  const userRows = document.querySelectorAll('#usersTableBody tr');
+
+  userTypeFilters.forEach(filter => {
+    filter.addEventListener('change', function () {
+      const filterValue = this.id;
+
+      userRows.forEach(row => {
+        const userType = row.getAttribute('data-user-type');
+        const userStatus = row.getAttribute('data-user-status');
+
+        switch (filterValue) {
+          case 'allUsers':
+            row.style.display = '';
+            break;
+          case 'adminUsers':
+            row.style.display = userType === 'admin' ? '' : 'none';
+            break;
+          case 'normalUsers':
+            row.style.display = userType === 'user' ? '' : 'none';
+            break;
+          case 'activeUsers':
+            row.style.display = userStatus === 'active' ? '' : 'none';
+            break;
+          case 'inactiveUsers':
+            row.style.display = userStatus === 'inactive' ? '' : 'none';
+            break;
+        }
+      });
+    });
+  });
+
+  // 设置入职日期默认值为今天
+  const today = new Date().toISOString().split('T')[0];
+  document.getElementById('hire_date').value = today;
+});
+
+// 添加用户表单提交
+function submitAddUserForm(event) {
+  event.preventDefault();
+
+  const submitBtn = document.getElementById('addUserSubmitBtn');
+  const originalText = submitBtn.innerHTML;
+
+  // 禁用提交按钮防止重复提交
+  submitBtn.disabled = true;
+  submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> 创建中...';
+
+  const formData = new FormData(event.target);
+
+  // 验证表单数据
+  const username = formData.get('username');
+  const password = formData.get('password');
+  const userType = formData.get('user_type');
+
+  if (!username || !password || !userType) {
+    alert('请填写所有必填字段');
+    submitBtn.disabled = false;
+    submitBtn.innerHTML = originalText;
+    return;
+  }
+
+  if (password.length < 8) {
+    alert('密码长度至少8位');
+    submitBtn.disabled = false;
+    submitBtn.innerHTML = originalText;
+    return;
+  }
+
+  // 发送创建用户请求
+  fetch('/user_manager/create', {
+    method: 'POST',
+    body: new URLSearchParams(formData)
+  })
+    .then(response => response.json())
+    .then(data => {
+      if (data.success) {
+        alert(data.message);
+        // 关闭模态框
+        const modal = bootstrap.Modal.getInstance(document.getElementById('addUserModal'));
+        modal.hide();
+        // 刷新页面
+        location.reload();
+      } else {
+        alert('创建失败: ' + data.message);
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = originalText;
+      }
+    })
+    .catch(error => {
+      alert('创建失败: ' + error);
+      submitBtn.disabled = false;
+      submitBtn.innerHTML = originalText;
+    });
+}
+
+// 模态框关闭时重置表单
+document.getElementById('addUserModal').addEventListener('hidden.bs.modal', function () {
+  document.getElementById('addUserForm').reset();
+  const submitBtn = document.getElementById('addUserSubmitBtn');
+  submitBtn.disabled = false;
+  submitBtn.innerHTML = '<span class="fallback-icon">✅</span>创建用户';
+
+  // 重新设置今天的日期
+  const today = new Date().toISOString().split('T')[0];
+  document.getElementById('hire_date').value = today;
+});
@@ -0,0 +1,208 @@
+// 编辑模式切换
+function toggleEditMode(section) {
+    const displayElements = document.querySelectorAll(`#${section}Form .info-value span`);
+    const inputElements = document.querySelectorAll(`#${section}Form .info-value input`);
+    const actionsElement = document.getElementById(`${section}Actions`);
+
+    displayElements.forEach(el => el.classList.add('d-none'));
+    inputElements.forEach(el => el.classList.remove('d-none'));
+    actionsElement.classList.remove('d-none');
+
+    // 如果是密码修改模式，初始化验证
+    if (section === 'passwordChange') {
+        validatePassword();
+    }
+}
+
+// 取消编辑
+function cancelEdit(section) {
+    const displayElements = document.querySelectorAll(`#${section}Form .info-value span`);
+    const inputElements = document.querySelectorAll(`#${section}Form .info-value input`);
+    const actionsElement = document.getElementById(`${section}Actions`);
+
+    displayElements.forEach(el => el.classList.remove('d-none'));
+    inputElements.forEach(el => el.classList.add('d-none'));
+    actionsElement.classList.add('d-none');
+
+    // 如果是密码修改，清空输入框和反馈
+    if (section === 'passwordChange') {
+        document.getElementById('currentPasswordInput').value = '';
+        document.getElementById('newPasswordInput').value = '';
+        document.getElementById('confirmPasswordInput').value = '';
+        document.getElementById('passwordStrength').classList.add('d-none');
+        document.getElementById('passwordFeedback').textContent = '';
+        document.getElementById('confirmPasswordFeedback').textContent = '';
+    }
+}
+
+// 联系信息表单提交处理
+document.getElementById('contactInfoForm').addEventListener('submit', function (e) {
+    e.preventDefault();
+
+    const formData = new FormData(this);
+    fetch(this.action, {
+        method: 'POST',
+        body: formData
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                alert(data.message);
+                location.reload();
+            } else {
+                alert('保存失败: ' + data.message);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('保存失败，请重试');
+        });
+});
+
+// 密码修改表单提交处理
+document.getElementById('passwordChangeForm').addEventListener('submit', function (e) {
+    e.preventDefault();
+
+    // 最终验证
+    if (!validatePassword(true)) {
+        return;
+    }
+
+    const formData = new FormData(this);
+    fetch(this.action, {
+        method: 'POST',
+        body: formData
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                alert(data.message);
+                // 清空密码输入框
+                document.getElementById('currentPasswordInput').value = '';
+                document.getElementById('newPasswordInput').value = '';
+                document.getElementById('confirmPasswordInput').value = '';
+                // 退出编辑模式
+                cancelEdit('passwordChange');
+            } else {
+                alert('修改失败: ' + data.message);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('修改失败，请重试');
+        });
+});
+
+// 实时密码验证函数
+function validatePassword(isSubmit = false) {
+    const currentPassword = document.getElementById('currentPasswordInput').value;
+    const newPassword = document.getElementById('newPasswordInput').value;
+    const confirmPassword = document.getElementById('confirmPasswordInput').value;
+    const submitBtn = document.getElementById('passwordSubmitBtn');
+    const strengthBar = document.getElementById('passwordStrength');
+    const passwordFeedback = document.getElementById('passwordFeedback');
+    const confirmFeedback = document.getElementById('confirmPasswordFeedback');
+
+    let isValid = true;
+    let strength = 0;
+
+    // 密码强度计算
+    if (newPassword.length >= 8) strength += 1;
+    if (/[A-Za-z]/.test(newPassword)) strength += 1;
+    if (/\d/.test(newPassword)) strength += 1;
+    if (/[^A-Za-z0-9]/.test(newPassword)) strength += 1;
+
+    // 更新强度条
+    if (strengthBar && newPassword.length > 0) {
+        strengthBar.classList.remove('d-none');
+        strengthBar.className = 'password-strength';
+        if (strength <= 1) {
+            strengthBar.classList.add('strength-weak');
+            passwordFeedback.textContent = '密码强度：弱';
+            passwordFeedback.className = 'password-feedback password-invalid';
+        } else if (strength <= 2) {
+            strengthBar.classList.add('strength-medium');
+            passwordFeedback.textContent = '密码强度：中';
+            passwordFeedback.className = 'password-feedback password-valid';
+        } else {
+            strengthBar.classList.add('strength-strong');
+            passwordFeedback.textContent = '密码强度：强';
+            passwordFeedback.className = 'password-feedback password-valid';
+        }
+    } else if (strengthBar) {
+        strengthBar.classList.add('d-none');
+        passwordFeedback.textContent = '';
+    }
+
+    // 验证新密码长度
+    if (newPassword.length > 0 && newPassword.length < 8) {
+        isValid = false;
+        passwordFeedback.textContent = '密码长度至少8位';
+        passwordFeedback.className = 'password-feedback password-invalid';
+    }
+
+    // 验证新密码强度
+    if (newPassword.length >= 8 && (!/[A-Za-z]/.test(newPassword) || !/\d/.test(newPassword))) {
+        isValid = false;
+        passwordFeedback.textContent = '密码必须包含字母和数字';
+        passwordFeedback.className = 'password-feedback password-invalid';
+    }
+
+    // 验证新密码不能与当前密码相同
+    if (newPassword && currentPassword && newPassword === currentPassword) {
+        isValid = false;
+        if (isSubmit) {
+            alert('新密码不能与当前密码相同');
+        }
+    }
+
+    // 验证密码匹配
+    if (confirmPassword.length > 0) {
+        if (newPassword !== confirmPassword) {
+            isValid = false;
+            confirmFeedback.textContent = '密码不匹配';
+            confirmFeedback.className = 'password-feedback password-invalid';
+        } else {
+            confirmFeedback.textContent = '密码匹配';
+            confirmFeedback.className = 'password-feedback password-valid';
+        }
+    } else {
+        confirmFeedback.textContent = '';
+    }
+
+    // 验证当前密码是否填写
+    if (!currentPassword) {
+        isValid = false;
+    }
+
+    // 更新按钮状态
+    if (submitBtn) {
+        submitBtn.disabled = !isValid;
+        if (isValid) {
+            submitBtn.classList.remove('btn-secondary');
+            submitBtn.classList.add('btn-primary');
+        } else {
+            submitBtn.classList.remove('btn-primary');
+            submitBtn.classList.add('btn-secondary');
+        }
+    }
+
+    return isValid;
+}
+
+// 为密码输入框添加输入监听
+document.addEventListener('DOMContentLoaded', function () {
+    const currentPasswordInput = document.getElementById('currentPasswordInput');
+    const newPasswordInput = document.getElementById('newPasswordInput');
+    const confirmPasswordInput = document.getElementById('confirmPasswordInput');
+
+    if (currentPasswordInput) {
+        currentPasswordInput.addEventListener('input', validatePassword);
+    }
+    if (newPasswordInput) {
+        newPasswordInput.addEventListener('input', validatePassword);
+    }
+    if (confirmPasswordInput) {
+        confirmPasswordInput.addEventListener('input', validatePassword);
+    }
+});
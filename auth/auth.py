@@ -1,47 +1,41 @@
-import secrets
-import threading
+import hmac
 from fastapi import Request, HTTPException, Depends
 from fastapi.responses import RedirectResponse
 from starlette.status import HTTP_303_SEE_OTHER
 from database.database import db_manager
+from auth.sessions import SESSION_COOKIE, session_signer
+from config import Config
 
-# 会话存储
-sessions = {}
-session_lock = threading.Lock()
+# 会话保存在签名的 cookie 中（auth/sessions.py），校验时与用户目录缓存比对会话版本
 
 def get_current_user(request: Request):
     """获取当前用户"""
-    session_id = request.cookies.get("session_id")
-    with session_lock:
-        if session_id and session_id in sessions:
-            return sessions[session_id]
-    return None
+    return session_signer.verify(request.cookies.get(SESSION_COOKIE))
 
 def login_required(request: Request):
     """检查登录状态"""
-    session_id = request.cookies.get("session_id")
-    with session_lock:
-        if not session_id or session_id not in sessions:
-            raise HTTPException(
-                status_code=HTTP_303_SEE_OTHER,
-                detail="Redirect to login",
-                headers={"Location": "/login"}
-            )
-        return sessions[session_id]
+    user = get_current_user(request)
+    if user is None:
+        raise HTTPException(
+            status_code=HTTP_303_SEE_OTHER,
+            detail="Redirect to login",
+            headers={"Location": "/login"}
+        )
+    return user
 
-def create_session(username: str, user_type: str):
-    """创建会话"""
-    session_id = secrets.token_urlsafe(16)
-    user_data = {"username": username, "user_type": user_type}
-    with session_lock:
-        sessions[session_id] = user_data
-    return session_id
+def metrics_access(request: Request):
+    """/metrics 访问检查：Authorization: Bearer <Config.METRICS_TOKEN>，或已登录的管理员"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if Config.METRICS_TOKEN and scheme.lower() == "bearer" and \
+            hmac.compare_digest(token.strip().encode("utf-8"), Config.METRICS_TOKEN.encode("utf-8")):
+        return
+    user = get_current_user(request)
+    if user is None or user.get("user_type") != "admin":
+        raise HTTPException(status_code=403, detail="无权访问指标")
 
-def delete_session(session_id: str):
-    """删除会话"""
-    with session_lock:
-        if session_id in sessions:
-            del sessions[session_id]
+def create_session(username: str, user_type: str, session_version: int = 0):
+    """创建会话，返回写入 cookie 的令牌"""
+    return session_signer.issue(username, user_type, session_version)
 
 def verify_user_credentials(username: str, password: str, db):
     """验证用户凭据"""
@@ -0,0 +1,85 @@
+"""签名会话令牌
+
+会话不保存在服务端：登录时把用户名、用户类型、会话版本和过期时间写入令牌，用 HMAC-SHA256 签名后放进 cookie。
+多个 worker（或多台机器）使用同一个 SECRET_KEY 即可互相识别，重启服务也不会丢失登录状态。
+
+令牌格式：base64url(JSON 载荷).base64url(签名)，
+载荷为 {"u": 用户名, "t": 用户类型, "v": 会话版本, "iat": 签发时间, "exp": 过期时间}
+
+每个请求校验签名和过期时间，再与用户目录缓存（services/user_directory.py）比对：
+用户已删除或 users.session_version 与令牌中的不一致时拒绝。修改密码、用户类型或状态时会话版本加一，
+此前签发的令牌随之失效（其他 worker 在用户目录缓存过期后生效，最长 Config.USER_CACHE_TTL 秒）。
+用户类型以用户目录中的当前值为准。登出只删除浏览器中的 cookie；需要让所有令牌立即失效时更换 SECRET_KEY。
+"""
+import hmac
+import json
+import time
+import base64
+import hashlib
+from config import Config
+from utils.metrics import registry
+from database.database import db_manager
+from services.user_directory import user_directory
+
+SESSION_COOKIE = "session_id"
+
+sessions_issued = registry.counter("sessions_issued_total", "签发的会话令牌数")
+session_rejections = registry.counter("session_rejections_total", "校验未通过的会话令牌数", ("reason",))
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+class SessionSigner:
+    """签发和校验会话令牌"""
+
+    def __init__(self, secret_key, max_age, lookup=None):
+        # 派生专用密钥，与 SECRET_KEY 的其他用途区分开
+        self._key = hashlib.sha256(b"auth.sessions:" + secret_key.encode("utf-8")).digest()
+        self.max_age = max_age
+        # lookup(用户名) 返回当前的用户信息（含 user_type、session_version），用户不存在时返回 None
+        self.lookup = lookup
+
+    def _signature(self, payload):
+        return hmac.new(self._key, payload, hashlib.sha256).digest()
+
+    def issue(self, username, user_type, session_version=0, now=None):
+        """签发令牌"""
+        now = int(time.time() if now is None else now)
+        data = {"u": username, "t": user_type, "v": session_version, "iat": now, "exp": now + self.max_age}
+        payload = _b64encode(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        sessions_issued.inc()
+        return f"{payload}.{_b64encode(self._signature(payload.encode('ascii')))}"
+
+    def verify(self, token, now=None):
+        """校验令牌，返回 {"username", "user_type"}；没有令牌、签名不对、已过期或已吊销时返回 None"""
+        if not token:
+            return None
+        payload, _, signature = token.partition(".")
+        try:
+            valid = hmac.compare_digest(_b64decode(signature), self._signature(payload.encode("ascii")))
+        except (ValueError, UnicodeEncodeError):
+            valid = False
+        if not valid:
+            session_rejections.inc(1, "invalid")
+            return None
+        data = json.loads(_b64decode(payload))
+        if data["exp"] <= (time.time() if now is None else now):
+            session_rejections.inc(1, "expired")
+            return None
+        user_type = data["t"]
+        if self.lookup is not None:
+            user = self.lookup(data["u"])
+            if user is None or user["session_version"] != data.get("v", 0):
+                session_rejections.inc(1, "revoked")
+                return None
+            user_type = user["user_type"]
+        return {"username": data["u"], "user_type": user_type}
+
+def current_user(username):
+    """会话校验使用的用户信息：读取用户目录缓存，过期时借用只读连接重新加载"""
+    return user_directory.lookup(username, db_manager.reader)
+
+session_signer = SessionSigner(Config.SECRET_KEY, Config.SESSION_MAX_AGE, lookup=current_user)
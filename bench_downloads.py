@@ -0,0 +1,117 @@
+# bench_downloads.py
+"""文件下载基准测试
+
+直接以 ASGI 方式调用响应对象（不经过网络、登录和数据库），比较：
+- 原来的 FileResponse 整文件发送
+- download_service 整文件发送（线程中按块读取 / 服务器支持 zerocopysend 时的 sendfile）
+- 预览 PDF 时常见的 Range 请求（206）
+- 浏览器再次打开同一文件时的条件请求（304）
+
+sendfile 场景写入 /dev/null，只反映省掉的用户态读取和拷贝，实际吞吐受网络限制。
+
+用法：
+    python bench_downloads.py [文件大小MB] [次数]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import statistics
+from starlette.requests import Request
+from starlette.responses import FileResponse
+from services.download_service import download_service
+
+def make_request(headers=None, extensions=None):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/download",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "extensions": extensions or {},
+    }
+    return scope, Request(scope)
+
+class Sink:
+    """模拟服务器：统计收到的字节数；zerocopysend 消息用 sendfile 写到 /dev/null"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.status = None
+        self.headers = {}
+        self.devnull = os.open(os.devnull, os.O_WRONLY)
+
+    async def receive(self):
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            self.bytes += len(message.get("body", b""))
+        elif message["type"] == "http.response.zerocopysend":
+            offset, count = message["offset"], message["count"]
+            while count > 0:
+                sent = os.sendfile(self.devnull, message["file"], offset, count)
+                offset += sent
+                count -= sent
+                self.bytes += sent
+
+    def close(self):
+        os.close(self.devnull)
+
+async def run_case(make_response, scope, iterations):
+    timings = []
+    total = 0
+    status = None
+    for _ in range(iterations):
+        sink = Sink()
+        start = time.perf_counter()
+        response = make_response()
+        await response(scope, sink.receive, sink.send)
+        timings.append(time.perf_counter() - start)
+        sink.close()
+        total += sink.bytes
+        status = sink.status
+    return status, total, timings
+
+def report(name, status, total, timings):
+    seconds = sum(timings)
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    throughput = f"{total / seconds / 1024 / 1024:.1f} MB/s" if total and seconds else "-"
+    print(f"{name:<34} {status:>4} {throughput:>15} "
+          f"{statistics.median(timings) * 1000:>9.2f} ms {p95 * 1000:>9.2f} ms")
+
+async def main(size_mb=20, iterations=20):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "报告.pdf")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+
+        _, plain = make_request()
+        etag = download_service.file_response(plain, path, "报告.pdf").headers["etag"]
+        zerocopy = {"http.response.zerocopysend": {}}
+
+        cases = [
+            ("FileResponse（原实现）", {}, None,
+             lambda request: FileResponse(path, filename="报告.pdf")),
+            ("download_service 整文件", {}, None, None),
+            ("download_service 整文件 sendfile", {}, zerocopy, None),
+            ("Range 前 64KB（206）", {"Range": "bytes=0-65535"}, None, None),
+            ("Range 末尾 1MB（206）", {"Range": "bytes=-1048576"}, None, None),
+            ("If-None-Match（304）", {"If-None-Match": etag}, None, None),
+        ]
+
+        print(f"文件大小 {size_mb} MB，每项 {iterations} 次\n")
+        print(f"{'场景':<34} {'状态':>4} {'吞吐':>15} {'中位数':>12} {'P95':>12}")
+        for name, headers, extensions, factory in cases:
+            scope, request = make_request(headers, extensions)
+            factory = factory or (lambda request: download_service.file_response(request, path, "报告.pdf"))
+            status, total, timings = await run_case(lambda: factory(request), scope, iterations)
+            report(name, status, total, timings)
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args))
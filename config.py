@@ -1,10 +1,75 @@
 import os
+import secrets
+
+SECRET_KEY_FILE = '.secret_key'
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """会话签名密钥：优先使用环境变量 SECRET_KEY；未设置时读取 path，文件不存在时生成随机密钥写入（权限 0600）
+
+    同一台机器上的多个 worker 读到的是同一个文件；多台机器部署时必须通过环境变量设置相同的 SECRET_KEY。
+    """
+    key = os.environ.get("SECRET_KEY")
+    if key:
+        return key
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(secrets.token_urlsafe(48))
+        try:
+            # 多个 worker 同时启动时只有一个能创建成功，其余使用它生成的密钥
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path, encoding="ascii") as f:
+        key = f.read().strip()
+    if not key:
+        raise RuntimeError(f"密钥文件 {path} 为空，请删除后重新启动或设置环境变量 SECRET_KEY")
+    return key
 
 # 应用配置
 class Config:
-    SECRET_KEY = "supersecretkey123"
+    SECRET_KEY = load_secret_key()
+    SESSION_MAX_AGE = 12 * 60 * 60           # 会话令牌有效期（秒）
     UPLOAD_FOLDER = 'static/uploads'
+    BLOB_STORE_DIR = 'static/uploads/blobs'  # 按内容寻址的文件存储
     DATABASE_PATH = 'db.sqlite3'
+    TEMPLATE_CACHE_DIR = '.cache/jinja'       # 模板字节码缓存
+    ASSET_SOURCE_DIR = 'assets'               # 页面脚本和样式的源文件
+    ASSET_BUILD_DIR = 'static/dist'           # 带指纹的构建结果（python -m utils.assets）
+    ASSET_AUTORELOAD = os.environ.get("ASSET_AUTORELOAD") == "1"  # 仅开发时开启：源文件修改后自动重新构建
+    ASSET_RELOAD_INTERVAL = 1.0               # 自动重新构建时两次检查源文件的最短间隔（秒）
+    ASSET_KEEP_BUILDS = 3                     # 保留最近几次构建的文件（缓存的旧页面、滚动重启中的旧 worker 仍会引用）
+    
+    # 数据库连接池配置
+    DB_POOL_SIZE = 5         # 只读连接数量
+    DB_POOL_TIMEOUT = 10     # 等待连接的超时时间（秒）
+    DB_BUSY_TIMEOUT = 5      # SQLite 锁等待超时（秒）
+    DB_CHECKOUT_THREADS = 32 # 等待取出连接的线程数（与执行语句的线程分开）
+    USER_CACHE_TTL = 60      # 用户目录缓存过期时间（秒）
+    COUNT_CACHE_TTL = 30     # 分页总数缓存过期时间（秒）
+    
+    # SQL 埋点配置
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION") == "1"  # 记录每条语句的耗时、行数和调用方（有额外开销，默认关闭）
+    SLOW_QUERY_MS = 100                      # 慢查询阈值（毫秒）
+    SLOW_QUERY_LOG = 'logs/slow_queries.log' # 慢查询日志（含执行计划）
+    REQUEST_QUERY_BUDGET = 30                # 单个请求的默认语句数预算
+    REQUEST_DB_TIME_BUDGET_MS = 200          # 单个请求的默认 DB 耗时预算（毫秒）
+    ROUTE_QUERY_BUDGETS = {                  # 按路由覆盖预算: "方法 路由模板" -> (语句数, 毫秒)
+        "GET /user_dashboard": (5, 50),
+        "GET /project/{project_no}": (20, 100),
+    }
+    
+    # 指标配置
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # Prometheus 抓取 /metrics 时使用的 Bearer 令牌；未设置时只允许管理员访问
+    
+    # 响应压缩配置
+    COMPRESSION_MIN_SIZE = 1024              # 小于这个字节数的响应不压缩
+    GZIP_LEVEL = 6                           # 动态响应的 gzip 压缩级别
+    BROTLI_QUALITY = 4                       # 动态响应的 brotli 质量（安装 brotli 时使用）
+    STATIC_IMMUTABLE_MAX_AGE = 31536000      # 带指纹的静态文件缓存时间（秒）
     
     # 文件相关配置
     DEBUG = True
@@ -2,6 +2,12 @@ import os
 import sqlite3
 from datetime import datetime
 from auto_import_qualifications import auto_import_qualifications
+from database.migrate import upgrade
+from database.participants import rebuild_report_participants
+from database.project_roles import rebuild_user_project_roles
+from database.search import rebuild_project_search
+from database.user_stats import rebuild_user_stats
+from database.numbering import rebuild_project_no_sequences, backfill_report_numbers, rebuild_report_seq_gaps
 
 DB_FILE = "db.sqlite3"
 
@@ -14,131 +20,9 @@ def init_database():
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
 
-    # ========= 创建 users 表 =========
-    # 在 database.py 的 init_db 方法中更新 users 表
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        realname TEXT,
-        user_type TEXT,
-        password TEXT,
-        phone TEXT,
-        email TEXT,
-        hire_date TEXT,
-        education TEXT,
-        position TEXT,
-        department TEXT,
-        status TEXT DEFAULT 'active',  -- active-在职, inactive-离职
-        create_time TEXT DEFAULT CURRENT_TIMESTAMP,
-        update_time TEXT DEFAULT CURRENT_TIMESTAMP
-    )''')
-    print("✅ users 表创建完成。")
-
-    # ========= 创建 projects 表 =========
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS projects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_no TEXT,                 -- ① 项目序号
-        name TEXT,                       -- ② 项目名称
-        project_type TEXT,               -- ③ 项目类型
-        client_name TEXT,                -- ④ 甲方名称
-        market_leader TEXT,              -- ⑤ 市场部负责人用户名
-        project_leader TEXT,             -- ⑥ 项目负责人用户名
-        progress TEXT,                   -- ⑦ 项目进度
-        report_numbers TEXT,             -- ⑧ 报告号（多个以逗号分隔）
-        amount REAL,                     -- ⑨ 合同金额
-        is_paid TEXT,                    -- ⑩ 是否收费（是/否）
-        creator TEXT,                    -- ⑪ 项目创建人用户名
-        creator_realname TEXT,           -- ⑫ 项目创建人真实姓名
-        start_date TEXT,                 -- ⑬ 开始日期
-        end_date TEXT,                   -- ⑭ 结束日期
-        status TEXT,                     -- ⑮ 状态
-        contract_file TEXT,
-        create_date TEXT
-    )
-    """)
-    print("✅ projects 表创建完成。")
-
-    # ========= 创建 reports 表 =========
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS reports (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_no TEXT NOT NULL,         -- 报告号
-        project_id INTEGER,              -- 关联的项目ID
-        report_type TEXT,                -- 报告类型（新增字段）
-        file_paths TEXT,                 -- 文件路径（多个以逗号分隔）
-        creator TEXT,                    -- 创建人用户名
-        creator_realname TEXT,           -- 创建人真实姓名
-        create_date TEXT,                -- 创建日期
-        reviewer1 TEXT,                  -- 复核人1用户名
-        reviewer2 TEXT,                  -- 复核人2用户名
-        reviewer3 TEXT,                  -- 复核人3用户名
-        signer1 TEXT,                    -- 签字人1用户名
-        signer2 TEXT,                    -- 签字人2用户名
-        FOREIGN KEY (project_id) REFERENCES projects (id)
-    )
-    """)
-    print("✅ reports 表创建完成。")
-
-    # ========= 创建 report_files 表 =========
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS report_files (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_id INTEGER,               -- 关联的报告ID
-        file_path TEXT NOT NULL,         -- 文件路径
-        file_name TEXT NOT NULL,         -- 原文件名
-        uploader_username TEXT NOT NULL, -- 上传者用户名
-        uploader_realname TEXT NOT NULL, -- 上传者真实姓名
-        upload_time TEXT NOT NULL,       -- 上传时间
-        file_size INTEGER,               -- 文件大小（字节）
-        FOREIGN KEY (report_id) REFERENCES reports (id)
-    )
-    """)
-    print("✅ report_files 表创建完成。")
-
-    # ========= 创建 contract_files 表 =========
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS contract_files (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_id INTEGER,               -- 关联的项目ID
-        file_path TEXT NOT NULL,          -- 文件路径
-        file_name TEXT NOT NULL,          -- 原文件名
-        uploader_username TEXT NOT NULL,  -- 上传者用户名
-        uploader_realname TEXT NOT NULL,  -- 上传者真实姓名
-        upload_time TEXT NOT NULL,        -- 上传时间
-        file_size INTEGER,                -- 文件大小（字节）
-        FOREIGN KEY (project_id) REFERENCES projects (id)
-    )
-    """)
-    print("✅ contract_files 表创建完成。")
-
-    # ========= 创建资质表 =========
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS user_qualifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL,
-        qualification_type TEXT NOT NULL,
-        qualification_number TEXT,
-        issue_date TEXT,
-        expiry_date TEXT,
-        issue_authority TEXT,
-        FOREIGN KEY (username) REFERENCES users (username),
-        UNIQUE(username, qualification_type)
-    )
-    """)
-    print("✅ user_qualifications 表创建完成。")
-
-    # 公司资质表
-    c.execute('''CREATE TABLE IF NOT EXISTS company_qualifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category TEXT NOT NULL,
-        owner TEXT,
-        file_path TEXT NOT NULL,
-        file_name TEXT NOT NULL,
-        update_time TEXT DEFAULT CURRENT_TIMESTAMP,
-        uploader_username TEXT,
-        status TEXT DEFAULT 'active'
-    )''')
+    # ========= 创建表结构（执行全部迁移） =========
+    upgrade(conn)
+    print("✅ 数据库表结构创建完成。")
 
     # ========= 插入管理员用户 =========
     admin_user = (
@@ -319,6 +203,13 @@ def init_database():
         )
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, reports)
+    rebuild_report_participants(conn)
+    rebuild_user_project_roles(conn)
+    rebuild_project_search(conn)
+    rebuild_project_no_sequences(conn)
+    backfill_report_numbers(conn)
+    rebuild_report_seq_gaps(conn)
+    rebuild_user_stats(conn)
     print("✅ 所有示例报告数据已添加。")
 
     # ========= 插入测试文件数据 =========
@@ -383,15 +274,7 @@ def init_database():
     """, contract_files_data)
     print("✅ 所有示例合同文件数据已添加。")
 
-    # 更新项目的 report_numbers 字段
-    for project_id in range(1, 7):  # 假设有6个项目
-        c.execute("SELECT report_no FROM reports WHERE project_id = ?", (project_id,))
-        project_reports = c.fetchall()
-        if project_reports:
-            report_numbers = ",".join([report[0] for report in project_reports])
-            c.execute("UPDATE projects SET report_numbers = ? WHERE id = ?", (report_numbers, project_id))
-    
-    print("✅ 项目报告号已更新。")
+    # 项目的 report_numbers、报告的 file_paths 字段由触发器维护
 
     # sample_data = [
     #     ('公司营业执照', '营业执照', '公司法人', '/downloads/business_license.pdf', '营业执照.pdf'),
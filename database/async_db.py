@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from fastapi import Request
+from config import Config
+from database.database import db_manager
+from database.blobs import discard_uncommitted_blobs
+from database.instrumentation import find_caller, bind_caller
+
+# 专用的数据库线程池：只执行语句，线程数与连接池大小一致（只读连接 + 1 个写连接），
+# 避免占用 FastAPI 默认线程池，也不会无限制地创建线程
+db_executor = ThreadPoolExecutor(
+    max_workers=Config.DB_POOL_SIZE + 1,
+    thread_name_prefix="db"
+)
+
+# 取出连接时可能阻塞等待（最长 DB_POOL_TIMEOUT 秒），放在单独的线程池中：
+# 等待连接的请求不会占住 db_executor，已持有连接的请求总能执行完语句并归还连接
+checkout_executor = ThreadPoolExecutor(
+    max_workers=Config.DB_CHECKOUT_THREADS,
+    thread_name_prefix="db-checkout"
+)
+
+async def run_in_db_thread(fn, *args, **kwargs):
+    """在数据库线程池中执行阻塞调用
+
+    run_in_executor 不会传递 contextvars，这里复制当前上下文并记下调用方，
+    让线程中执行的语句仍能计入所属请求的 SQL 统计。
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    bind_caller(ctx, find_caller())
+    return await loop.run_in_executor(db_executor, partial(ctx.run, fn, *args, **kwargs))
+
+class AsyncConnection:
+    """可等待的连接包装：所有语句都在数据库线程池中执行，不阻塞事件循环"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def fetchall(self, sql, params=()):
+        return await run_in_db_thread(lambda: self.conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql, params=()):
+        return await run_in_db_thread(lambda: self.conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql, params=()):
+        """执行写语句，返回游标（可读取 rowcount / lastrowid）"""
+        return await run_in_db_thread(self.conn.execute, sql, params)
+
+    async def executemany(self, sql, seq_of_params):
+        return await run_in_db_thread(self.conn.executemany, sql, seq_of_params)
+
+    async def commit(self):
+        await run_in_db_thread(self.conn.commit)
+
+    async def rollback(self):
+        await run_in_db_thread(self.conn.rollback)
+
+    async def run(self, fn, *args):
+        """在数据库线程中执行 fn(conn, *args)，用于还未迁移的同步代码块"""
+        return await run_in_db_thread(fn, self.conn, *args)
+
+class AsyncDatabase:
+    """连接池的异步门面：在 checkout_executor 中等待取出连接，语句和归还在数据库线程池中执行"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    @asynccontextmanager
+    async def connection(self, readonly=False):
+        checkout = self.manager._checkout_reader if readonly else self.manager._checkout_writer
+        release = self.manager._return_reader if readonly else self.manager._return_writer
+        conn = await asyncio.get_running_loop().run_in_executor(checkout_executor, checkout)
+        try:
+            yield AsyncConnection(conn)
+        except Exception:
+            await run_in_db_thread(conn.rollback)
+            raise
+        finally:
+            await run_in_db_thread(release, conn)
+
+    async def fetchall(self, sql, params=()):
+        async with self.connection(readonly=True) as adb:
+            return await adb.fetchall(sql, params)
+
+    async def fetchone(self, sql, params=()):
+        async with self.connection(readonly=True) as adb:
+            return await adb.fetchone(sql, params)
+
+    async def execute(self, sql, params=()):
+        """在写连接上执行单条语句并提交"""
+        async with self.connection() as adb:
+            cursor = await adb.execute(sql, params)
+            await adb.commit()
+            return cursor
+
+async_db = AsyncDatabase(db_manager)
+
+class WriteSession:
+    """写请求中延迟取出的写连接
+
+    上传文件的路由先把文件写入临时文件并计算哈希，再 await acquire() 取写连接执行插入，
+    耗时的文件读写不占用唯一的写连接。取得后用法与 sqlite3.Connection 相同，请求结束时归还
+    （未提交的事务回滚，本次新放入存储的文件随之删除）。取得连接之前执行语句会报错，不会在事件循环中阻塞等待写锁。
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.conn = None
+        self.created_blobs = []  # 本次请求新放入存储的文件 (sha256, 路径)
+
+    async def acquire(self):
+        if self.conn is None:
+            loop = asyncio.get_running_loop()
+            self.conn = await loop.run_in_executor(checkout_executor, self.manager._checkout_writer)
+        return self
+
+    def rollback(self):
+        if self.conn is not None:
+            self.conn.rollback()
+
+    def _finish(self, conn):
+        """回滚未提交的事务，删除登记随之作废的新文件，再归还写连接"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if self.created_blobs:
+                discard_uncommitted_blobs(conn, self.created_blobs)
+        finally:
+            self.manager._return_writer(conn)
+
+    async def release(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            await run_in_db_thread(self._finish, conn)
+
+    def __getattr__(self, name):
+        if self.conn is None:
+            raise RuntimeError("写连接尚未取出，请先 await db.acquire()")
+        return getattr(self.conn, name)
+
+# FastAPI 依赖项
+async def get_async_db(request: Request):
+    """异步数据库依赖：GET/HEAD 请求使用只读连接"""
+    readonly = request.method in ("GET", "HEAD")
+    async with async_db.connection(readonly=readonly) as adb:
+        yield adb
+
+async def get_write_session(request: Request):
+    """上传文件的写请求依赖：写连接在 await db.acquire() 时才取出"""
+    session = WriteSession(db_manager)
+    try:
+        yield session
+    finally:
+        await session.release()
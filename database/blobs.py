@@ -0,0 +1,227 @@
+"""按内容寻址的文件存储
+
+上传的文件以 SHA-256 为键保存在 Config.BLOB_STORE_DIR/ab/cd/<sha256><扩展名>，
+相同内容只保存一份。blobs 表记录每个文件的路径、大小和引用数；
+contract_files、report_files、report_templates、evaluation_standards、company_qualifications
+通过 sha256 列引用文件，引用数由这些表上的触发器维护（见迁移 0010_blob_store）。
+
+删除记录后调用 release_blobs：引用数降到 0 的文件才会被删除。
+新放入存储的文件如果所在事务没有提交，请求结束时由 discard_uncommitted_blobs 删除。
+查找/放入文件与释放/删除文件都在持有写锁时进行，多个 worker 进程之间不会删掉刚被引用的文件。
+sha256 为空的旧记录仍指向原来的路径，可用 import 命令迁入存储。
+
+用法：
+    python -m database.blobs import [db_path]   # 把旧的上传文件迁入存储
+    python -m database.blobs gc [db_path]       # 删除无引用的文件和残留的临时文件
+"""
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+from config import Config
+from database.numbering import begin_immediate
+
+# 引用文件的表
+BLOB_TABLES = ["contract_files", "report_files", "report_templates", "evaluation_standards", "company_qualifications"]
+
+BLOB_REFS_SQL = " UNION ALL ".join(
+    f"SELECT sha256 FROM {table} WHERE sha256 IS NOT NULL" for table in BLOB_TABLES
+)
+
+# 不在 blobs 表中的文件超过这个时间才会被 gc 删除，避免误删正在上传（尚未提交）的文件
+GC_GRACE_SECONDS = 3600
+
+def blob_path(sha256, ext=""):
+    """两级分散目录：ab/cd/abcd...<ext>"""
+    return os.path.join(Config.BLOB_STORE_DIR, sha256[:2], sha256[2:4], sha256 + ext)
+
+BLOB_LOOKUP_SQL = "SELECT path FROM blobs WHERE sha256 = ?"
+BLOB_RELEASE_SQL = "DELETE FROM blobs WHERE sha256 = ? AND ref_count <= 0 RETURNING path"
+# 引用计数触发器中的更新（{delta} 为 + 1 或 - 1，{row} 为 NEW 或 OLD）
+BLOB_REF_SQL = "UPDATE blobs SET ref_count = ref_count {delta} WHERE sha256 = {row}.sha256"
+
+def temp_dir():
+    return os.path.join(Config.BLOB_STORE_DIR, ".tmp")
+
+def store_blob(conn, temp_path, sha256, size, ext=""):
+    """把临时文件放入存储并登记，返回 (文件路径, 是否新文件)；内容已存在时直接删除临时文件
+
+    引用数由插入引用记录时的触发器增加，需与引用记录在同一事务内提交。
+    先取得写锁再查找，其他进程的 release_blobs 不能在查找和插入引用记录之间删除这个文件。
+    """
+    begin_immediate(conn)
+    row = conn.execute(BLOB_LOOKUP_SQL, (sha256,)).fetchone()
+    if row and os.path.exists(row[0]):
+        os.unlink(temp_path)
+        return row[0], False
+    path = row[0] if row else blob_path(sha256, ext)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(temp_path, path)
+    conn.execute("""
+        INSERT INTO blobs (sha256, path, size, ref_count, created_at)
+        VALUES (?, ?, ?, 0, datetime('now', 'localtime'))
+        ON CONFLICT (sha256) DO NOTHING
+    """, (sha256, path, size))
+    return path, True
+
+def discard_uncommitted_blobs(conn, created):
+    """事务回滚后调用：created 为本次新放入存储的 (sha256, 路径)，登记没有提交的文件直接删除，不必等 gc
+
+    在写锁内检查和删除，不会删掉其他进程刚放入同一路径、正在登记的文件。
+    """
+    begin_immediate(conn)
+    try:
+        for sha256, path in created:
+            if conn.execute(BLOB_LOOKUP_SQL, (sha256,)).fetchone():
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️ 删除文件失败 {path}: {e}")
+    finally:
+        conn.rollback()
+
+def release_blobs(conn, sha256s):
+    """删除引用数已为 0 的文件（在删除引用记录的事务提交之后调用）
+
+    文件在提交前、持有写锁时删除：提交之后其他进程才可能重新登记同一内容并放入同一路径。
+    提交失败时 blobs 中会留下没有文件的记录，store_blob 再次放入时会补上文件。
+    """
+    sha256s = {sha for sha in sha256s if sha}
+    if not sha256s:
+        return
+    begin_immediate(conn)
+    for sha256 in sha256s:
+        for (path,) in conn.execute(BLOB_RELEASE_SQL, (sha256,)).fetchall():
+            try:
+                os.remove(path)
+                print(f"🗑️ 已删除文件: {path}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️ 删除文件失败 {path}: {e}")
+    conn.commit()
+
+def remove_files(conn, rows):
+    """删除记录后清理文件：rows 为 (file_path, sha256)；存储中的文件按引用数释放，旧文件直接删除"""
+    for file_path, sha256 in rows:
+        if sha256 or not file_path or not os.path.exists(file_path):
+            continue
+        try:
+            os.remove(file_path)
+            print(f"🗑️ 已删除文件: {file_path}")
+        except OSError as e:
+            print(f"⚠️ 删除文件失败 {file_path}: {e}")
+    release_blobs(conn, [sha256 for _, sha256 in rows])
+
+def blob_ref_triggers(table):
+    """table 上维护 blobs.ref_count 的触发器"""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_ref_insert AFTER INSERT ON {table}
+        WHEN NEW.sha256 IS NOT NULL
+        BEGIN
+            {BLOB_REF_SQL.format(delta="+ 1", row="NEW")};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_ref_update AFTER UPDATE OF sha256 ON {table}
+        WHEN OLD.sha256 IS NOT NEW.sha256
+        BEGIN
+            {BLOB_REF_SQL.format(delta="- 1", row="OLD")};
+            {BLOB_REF_SQL.format(delta="+ 1", row="NEW")};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_blob_ref_delete AFTER DELETE ON {table}
+        WHEN OLD.sha256 IS NOT NULL
+        BEGIN
+            {BLOB_REF_SQL.format(delta="- 1", row="OLD")};
+        END
+        """,
+    ]
+
+def rebuild_blob_refs(conn):
+    """按引用记录重算所有文件的引用数"""
+    conn.execute(f"""
+        WITH refs AS (SELECT sha256, COUNT(*) AS n FROM ({BLOB_REFS_SQL}) GROUP BY sha256)
+        UPDATE blobs SET ref_count = COALESCE((SELECT n FROM refs WHERE refs.sha256 = blobs.sha256), 0)
+        WHERE ref_count IS NOT COALESCE((SELECT n FROM refs WHERE refs.sha256 = blobs.sha256), 0)
+    """)
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def import_legacy_files(conn):
+    """把 sha256 为空的记录指向的文件迁入存储，返回 (迁入文件数, 缺失文件数)"""
+    imported = {}  # 原路径 -> (sha256, 新路径)
+    missing = 0
+    for table in BLOB_TABLES:
+        rows = conn.execute(f"SELECT id, file_path FROM {table} WHERE sha256 IS NULL").fetchall()
+        for row_id, file_path in rows:
+            if file_path not in imported:
+                if not file_path or not os.path.isfile(file_path):
+                    missing += 1
+                    continue
+                sha256 = _hash_file(file_path)
+                os.makedirs(temp_dir(), exist_ok=True)
+                temp_path = os.path.join(temp_dir(), sha256 + ".import")
+                os.replace(file_path, temp_path)
+                ext = os.path.splitext(file_path)[1].lower()
+                path, _ = store_blob(conn, temp_path, sha256, os.path.getsize(temp_path), ext)
+                imported[file_path] = (sha256, path)
+            sha256, path = imported[file_path]
+            conn.execute(f"UPDATE {table} SET file_path = ?, sha256 = ? WHERE id = ?", (path, sha256, row_id))
+        conn.commit()
+    return len(imported), missing
+
+def collect_garbage(conn, now=None):
+    """删除引用数为 0 的文件、未登记的旧文件和残留的临时文件，返回删除的文件数"""
+    now = time.time() if now is None else now
+    conn.execute("DELETE FROM blobs WHERE ref_count <= 0")
+    conn.commit()
+    known = {os.path.normpath(row[0]) for row in conn.execute("SELECT path FROM blobs")}
+    removed = 0
+    for directory, _, filenames in os.walk(Config.BLOB_STORE_DIR):
+        for filename in filenames:
+            path = os.path.normpath(os.path.join(directory, filename))
+            if path in known or now - os.path.getmtime(path) < GC_GRACE_SECONDS:
+                continue
+            os.remove(path)
+            removed += 1
+    return removed
+
+def main(argv=None):
+    from database import migrate
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else ""
+    db_path = argv[1] if len(argv) > 1 else Config.DATABASE_PATH
+    if command not in ("import", "gc"):
+        print(__doc__)
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if migrate.get_current_version(conn) < migrate.latest_version():
+            print("❌ 数据库不是最新版本，请先运行 python -m database.migrate upgrade")
+            return 1
+        if command == "import":
+            imported, missing = import_legacy_files(conn)
+            print(f"✅ 已迁入 {imported} 个文件" + (f"，{missing} 条记录的文件不存在" if missing else ""))
+        else:
+            removed = collect_garbage(conn)
+            print(f"🗑️ 已删除 {removed} 个无引用的文件")
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
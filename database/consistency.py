@@ -0,0 +1,114 @@
+"""派生数据的维护与一致性修复
+
+projects.report_numbers 与 reports.file_paths 是为了兼容旧页面保留的逗号分隔字段，
+分别由 reports 和 report_files 上的触发器维护（见迁移 0008_derived_csv_columns），
+业务代码不再读取-拼接-回写这些字符串。
+
+check/repair 会在一个事务内重建所有派生数据（上述两个字段、report_participants、
+user_project_roles、projects_fts、user_stats、blobs.ref_count），与重建前比较后输出不一致的条数；
+check 最后回滚，repair 提交。
+
+用法：
+    python -m database.consistency check  [db_path]
+    python -m database.consistency repair [db_path]
+"""
+import sys
+import sqlite3
+from database import migrate
+from database.participants import rebuild_report_participants
+from database.project_roles import rebuild_user_project_roles
+from database.search import rebuild_project_search
+from database.user_stats import SNAPSHOT_SQL as USER_STATS_SNAPSHOT_SQL, rebuild_user_stats
+from database.blobs import rebuild_blob_refs
+
+# 某个项目的报告号列表 / 某个报告的文件路径列表（按创建顺序，逗号分隔）
+REPORT_NUMBERS_SQL = """COALESCE((
+    SELECT group_concat(report_no, ',') FROM (
+        SELECT report_no FROM reports WHERE project_id = {project_id} ORDER BY id
+    )
+), '')"""
+
+FILE_PATHS_SQL = """COALESCE((
+    SELECT group_concat(file_path, ',') FROM (
+        SELECT file_path FROM report_files WHERE report_id = {report_id} ORDER BY id
+    )
+), '')"""
+
+def rebuild_report_numbers(conn):
+    """重算所有项目的 report_numbers（只更新有差异的行）"""
+    expected = REPORT_NUMBERS_SQL.format(project_id="projects.id")
+    conn.execute(f"UPDATE projects SET report_numbers = {expected} WHERE report_numbers IS NOT {expected}")
+
+def rebuild_file_paths(conn):
+    """重算所有报告的 file_paths（只更新有差异的行）"""
+    expected = FILE_PATHS_SQL.format(report_id="reports.id")
+    conn.execute(f"UPDATE reports SET file_paths = {expected} WHERE file_paths IS NOT {expected}")
+
+# (名称, 快照查询, 重建函数)；report_numbers 须在 projects_fts 之前重建，user_stats 放在最后
+DERIVED_DATA = [
+    ("projects.report_numbers", "SELECT id, report_numbers FROM projects", rebuild_report_numbers),
+    ("reports.file_paths", "SELECT id, file_paths FROM reports", rebuild_file_paths),
+    ("report_participants", "SELECT report_id, username, role, slot FROM report_participants",
+     rebuild_report_participants),
+    ("user_project_roles", "SELECT username, project_id, role FROM user_project_roles",
+     rebuild_user_project_roles),
+    ("projects_fts", "SELECT rowid, project_no, name, client_name, report_numbers, leader_names FROM projects_fts",
+     rebuild_project_search),
+    ("user_stats", USER_STATS_SNAPSHOT_SQL, rebuild_user_stats),
+    ("blobs.ref_count", "SELECT sha256, ref_count FROM blobs", rebuild_blob_refs),
+]
+
+def repair_derived_data(conn, commit=True):
+    """重建所有派生数据，返回 {名称: 不一致的行数}；commit=False 时只检查不修改"""
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # 手动控制事务
+    drift = {}
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for name, snapshot_sql, rebuild in DERIVED_DATA:
+                before = set(conn.execute(snapshot_sql).fetchall())
+                rebuild(conn)
+                after = set(conn.execute(snapshot_sql).fetchall())
+                drift[name] = max(len(before - after), len(after - before))
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT" if commit else "ROLLBACK")
+    finally:
+        conn.isolation_level = isolation_level
+    return drift
+
+def main(argv=None):
+    from config import Config
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "check"
+    db_path = argv[1] if len(argv) > 1 else Config.DATABASE_PATH
+    if command not in ("check", "repair"):
+        print(__doc__)
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if migrate.get_current_version(conn) < migrate.latest_version():
+            print("❌ 数据库不是最新版本，请先运行 python -m database.migrate upgrade")
+            return 1
+        drift = repair_derived_data(conn, commit=(command == "repair"))
+    finally:
+        conn.close()
+
+    for name, count in drift.items():
+        print(f"  {'❌' if count else '✅'} {name}: {count} 行不一致")
+    total = sum(drift.values())
+    if not total:
+        print("✅ 派生数据全部一致")
+    elif command == "repair":
+        print(f"🔧 已修复 {total} 行不一致的派生数据")
+    else:
+        print(f"❌ 发现 {total} 行不一致，运行 python -m database.consistency repair 修复")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,197 +1,232 @@
+"""Package initialization"""
 import sqlite3
 import threading
+import queue
+import time
 from contextlib import contextmanager
+from fastapi import Request, Depends
 from config import Config
-import datetime
+from database import migrate
+from database.instrumentation import InstrumentedConnection
+
+class PoolTimeout(Exception):
+    """等待数据库连接超时"""
+    pass
 
 class Database:
-    def __init__(self, db_path=Config.DATABASE_PATH):
+    def __init__(self, db_path=Config.DATABASE_PATH, pool_size=Config.DB_POOL_SIZE,
+                 pool_timeout=Config.DB_POOL_TIMEOUT):
         self.db_path = db_path
-        self.local = threading.local()
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.closed = False
+        
+        # 只读连接池（按需创建，最多 pool_size 个）
+        self._readers = queue.LifoQueue(maxsize=pool_size)
+        self._reader_count = 0
+        self._reader_create_lock = threading.Lock()
+        
+        # 唯一的写连接，通过锁串行化
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        
+        # 连接池等待指标
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "reader_checkouts": 0,
+            "writer_checkouts": 0,
+            "reader_wait_seconds": 0.0,
+            "writer_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "readers_in_use": 0,
+            "writer_in_use": 0
+        }
+        
         self.init_db()
     
-    def get_connection(self):
-        """为每个线程创建独立的数据库连接"""
-        if not hasattr(self.local, 'connection'):
-            self.local.connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.local.connection.row_factory = sqlite3.Row
-        return self.local.connection
+    def _connect(self, readonly=False):
+        """创建一个 WAL 模式的连接"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=Config.DB_BUSY_TIMEOUT,
+            factory=InstrumentedConnection if Config.SQL_INSTRUMENTATION else sqlite3.Connection
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
     
-    def close_connection(self):
-        """关闭当前线程的数据库连接"""
-        if hasattr(self.local, 'connection'):
-            self.local.connection.close()
-            del self.local.connection
+    def _record_wait(self, kind, waited):
+        with self._stats_lock:
+            self._stats[f"{kind}_checkouts"] += 1
+            self._stats[f"{kind}_wait_seconds"] += waited
+            self._stats["readers_in_use" if kind == "reader" else "writer_in_use"] += 1
+            if waited > self._stats["max_wait_seconds"]:
+                self._stats["max_wait_seconds"] = waited
     
-    def init_db(self):
-        """初始化数据库表"""
-        conn = self.get_connection()
-        c = conn.cursor()
+    def _record_release(self, kind):
+        with self._stats_lock:
+            self._stats["readers_in_use" if kind == "reader" else "writer_in_use"] -= 1
+    
+    def _record_timeout(self):
+        with self._stats_lock:
+            self._stats["timeouts"] += 1
+    
+    def _checkout_reader(self):
+        """从连接池取出一个只读连接"""
+        if self.closed:
+            raise PoolTimeout("数据库连接池已关闭")
         
-        # 用户表
-        c.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE,
-            realname TEXT,
-            user_type TEXT,
-            password TEXT,
-            phone TEXT,
-            email TEXT,
-            hire_date TEXT,
-            education TEXT,
-            position TEXT,
-            department TEXT,
-            status TEXT DEFAULT 'active',  -- active-在职, inactive-离职
-            create_time TEXT DEFAULT CURRENT_TIMESTAMP,
-            update_time TEXT DEFAULT CURRENT_TIMESTAMP
-        )''')
-
-        # 用户资质表（多对多关系）
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS user_qualifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            qualification_type TEXT NOT NULL,
-            qualification_number TEXT,
-            issue_date TEXT,
-            expiry_date TEXT,
-            issue_authority TEXT,
-            FOREIGN KEY (username) REFERENCES users (username),
-            UNIQUE(username, qualification_type)
-        )
-        """)
-        # 公司资质表
-        c.execute('''CREATE TABLE IF NOT EXISTS company_qualifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            certificate_name TEXT NOT NULL,
-            category TEXT NOT NULL,
-            owner TEXT,
-            file_path TEXT NOT NULL,
-            file_name TEXT NOT NULL,
-            update_time TEXT DEFAULT CURRENT_TIMESTAMP,
-            uploader_username TEXT,
-            status TEXT DEFAULT 'active'
-        )''')
+        start = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._reader_create_lock:
+                if self._reader_count < self.pool_size:
+                    conn = self._connect(readonly=True)
+                    self._reader_count += 1
+            if conn is None:
+                try:
+                    conn = self._readers.get(timeout=self.pool_timeout)
+                except queue.Empty:
+                    self._record_timeout()
+                    raise PoolTimeout(f"等待只读连接超时（{self.pool_timeout}秒）")
         
-        # 项目表
-        c.execute('''CREATE TABLE IF NOT EXISTS projects (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_no TEXT,
-            name TEXT,
-            project_type TEXT,
-            client_name TEXT,
-            market_leader TEXT,
-            project_leader TEXT,
-            progress TEXT,
-            report_numbers TEXT,
-            amount REAL,
-            is_paid TEXT,
-            creator TEXT,
-            creator_realname TEXT,
-            start_date TEXT,
-            end_date TEXT,
-            status TEXT,
-            contract_file TEXT,
-            create_date TEXT
-        )''')
+        self._record_wait("reader", time.perf_counter() - start)
+        return conn
+    
+    def _return_reader(self, conn):
+        """归还只读连接"""
+        self._record_release("reader")
+        if conn.in_transaction:
+            conn.rollback()
+        if self.closed:
+            conn.close()
+            return
+        self._readers.put_nowait(conn)
+    
+    def _checkout_writer(self):
+        """获取唯一的写连接（串行化）"""
+        if self.closed:
+            raise PoolTimeout("数据库连接池已关闭")
         
-        # 报告表
-        c.execute("""CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                report_no TEXT NOT NULL,         -- 报告号
-                project_no TEXT NOT NULL,        -- 项目编号（新增字段）
-                project_id INTEGER,              -- 关联的项目ID（保留用于兼容性）
-                report_type TEXT,                -- 报告类型
-                file_paths TEXT,                 -- 文件路径（多个以逗号分隔）
-                creator TEXT,                    -- 创建人用户名
-                creator_realname TEXT,           -- 创建人真实姓名
-                create_date TEXT,                -- 创建日期
-                reviewer1 TEXT,                  -- 复核人1用户名
-                reviewer2 TEXT,                  -- 复核人2用户名
-                reviewer3 TEXT,                  -- 复核人3用户名
-                signer1 TEXT,                    -- 签字人1用户名
-                signer2 TEXT,                    -- 签字人2用户名
-                FOREIGN KEY (project_no) REFERENCES projects (project_no),
-                FOREIGN KEY (project_id) REFERENCES projects (id)
-            )
-            """)
+        start = time.perf_counter()
+        if not self._writer_lock.acquire(timeout=self.pool_timeout):
+            self._record_timeout()
+            raise PoolTimeout(f"等待写连接超时（{self.pool_timeout}秒）")
         
-        # 报告文件表
-        c.execute('''CREATE TABLE IF NOT EXISTS report_files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER,
-            file_path TEXT NOT NULL,
-            file_name TEXT NOT NULL,
-            uploader_username TEXT NOT NULL,
-            uploader_realname TEXT NOT NULL,
-            upload_time TEXT NOT NULL,
-            file_size INTEGER,
-            FOREIGN KEY (report_id) REFERENCES reports (id)
-        )''')
-        # ========= 创建 contract_files 表 =========
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS contract_files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_id INTEGER,               -- 关联的项目ID
-            file_path TEXT NOT NULL,          -- 文件路径
-            file_name TEXT NOT NULL,          -- 原文件名
-            uploader_username TEXT NOT NULL,  -- 上传者用户名
-            uploader_realname TEXT NOT NULL,  -- 上传者真实姓名
-            upload_time TEXT NOT NULL,        -- 上传时间
-            file_size INTEGER,                -- 文件大小（字节）
-            FOREIGN KEY (project_id) REFERENCES projects (id)
-        )
-        """)
-        # 修改 report_templates 表结构，去除 template_name 字段：
-
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS report_templates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category TEXT NOT NULL,                -- 类别: asset, real_estate, land, other
-            owner TEXT,                            -- 维护人
-            file_path TEXT NOT NULL,               -- 文件路径
-            file_name TEXT NOT NULL,               -- 原文件名（同时作为模板名称）
-            uploader_username TEXT NOT NULL,       -- 上传者用户名
-            uploader_realname TEXT NOT NULL,       -- 上传者真实姓名
-            upload_time TEXT DEFAULT CURRENT_TIMESTAMP,  -- 上传时间
-            file_size INTEGER,                     -- 文件大小（字节）
-            status TEXT DEFAULT 'active'           -- 状态: active, inactive
-        )
-        """)
-
-        # 评估准则表
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS evaluation_standards (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category TEXT NOT NULL,                -- 类别: national, industry, internal, other
-            owner TEXT,                            -- 维护人
-            file_path TEXT NOT NULL,               -- 文件路径
-            file_name TEXT NOT NULL,               -- 原文件名
-            uploader_username TEXT NOT NULL,       -- 上传者用户名
-            uploader_realname TEXT NOT NULL,       -- 上传者真实姓名
-            upload_time TEXT DEFAULT CURRENT_TIMESTAMP,  -- 上传时间
-            file_size INTEGER,                     -- 文件大小（字节）
-            status TEXT DEFAULT 'active'           -- 状态: active, inactive
-        )
-        """)
+        try:
+            if self._writer is None:
+                self._writer = self._connect()
+        except Exception:
+            self._writer_lock.release()
+            raise
         
-        conn.commit()
+        self._record_wait("writer", time.perf_counter() - start)
+        return self._writer
+    
+    def _return_writer(self, conn):
+        """归还写连接，回滚未提交的事务以免泄漏给下一个请求"""
+        self._record_release("writer")
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        finally:
+            self._writer_lock.release()
     
     @contextmanager
-    def get_db(self):
-        """数据库上下文管理器"""
-        conn = self.get_connection()
+    def reader(self):
+        """只读连接上下文管理器"""
+        conn = self._checkout_reader()
         try:
             yield conn
-        except Exception as e:
-            conn.rollback()
-            raise e
+        finally:
+            self._return_reader(conn)
+    
+    @contextmanager
+    def writer(self):
+        """写连接上下文管理器"""
+        conn = self._checkout_writer()
+        try:
+            yield conn
+        finally:
+            self._return_writer(conn)
+    
+    def pool_stats(self):
+        """连接池状态与等待指标"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pool_size"] = self.pool_size
+        stats["readers_open"] = self._reader_count
+        stats["readers_idle"] = self._readers.qsize()
+        return stats
+    
+    def close_all(self):
+        """关闭连接池中的所有连接（应用关闭时调用）"""
+        self.closed = True
+        
+        # 关闭空闲的只读连接，使用中的连接会在归还时关闭
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            self._reader_count -= 1
+        
+        # 等待写连接空闲后关闭
+        if self._writer_lock.acquire(timeout=self.pool_timeout):
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            finally:
+                self._writer_lock.release()
+    
+    def init_db(self):
+        """检查数据库版本，只有存在待执行的迁移时才执行 DDL"""
+        with self.writer() as conn:
+            if migrate.get_current_version(conn) < migrate.latest_version():
+                migrate.upgrade(conn)
+    
+    @contextmanager
+    def get_db(self, readonly=False):
+        """数据库上下文管理器：只读请求使用连接池中的读连接，其余使用写连接"""
+        with (self.reader() if readonly else self.writer()) as conn:
+            try:
+                yield conn
+            except Exception as e:
+                conn.rollback()
+                raise e
 
 # 创建全局数据库实例
 db_manager = Database()
 
 # FastAPI 依赖项
-def get_db():
-    """数据库依赖"""
-    with db_manager.get_db() as conn:
-        yield conn
\ No newline at end of file
+async def read_request_body(request: Request):
+    """在取出写连接之前读完请求体：客户端上传表单再慢也不会占着唯一的写连接
+
+    读到的内容缓存在 request 中，路由里的 Form 参数和 await request.form() 直接使用缓存。
+    """
+    if request.method not in ("GET", "HEAD"):
+        try:
+            await request.body()
+        except RuntimeError:
+            # 路由声明了 Form 参数时 FastAPI 已经解析过表单，请求体已读完
+            pass
+
+def get_db(request: Request, _body: None = Depends(read_request_body)):
+    """数据库依赖：GET/HEAD 请求使用只读连接；其他请求读完请求体后才取写连接"""
+    readonly = request.method in ("GET", "HEAD")
+    with db_manager.get_db(readonly=readonly) as conn:
+        yield conn
+
+def get_read_db():
+    """只读数据库依赖：只查询、不写入的 POST 请求（如登录）使用，不占用写连接"""
+    with db_manager.get_db(readonly=True) as conn:
+        yield conn
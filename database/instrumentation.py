@@ -0,0 +1,310 @@
+"""SQL 语句埋点
+
+连接使用 InstrumentedConnection 创建后，conn.execute / conn.cursor() 得到的都是 InstrumentedCursor。
+每条语句记录：归一化 SQL、耗时（执行 + 读取结果）、返回行数、调用它的 service 方法。
+
+- 全局汇总：query_stats 按 (归一化 SQL, 调用方) 累计次数、耗时和行数
+- 慢查询：耗时超过 Config.SLOW_QUERY_MS 的语句连同 EXPLAIN QUERY PLAN 写入 Config.SLOW_QUERY_LOG
+- 请求汇总：QueryTrackingMiddleware 统计每个请求的语句数和 DB 总耗时，写入 Server-Timing 响应头；
+  超出路由预算时记录警告，并给出重复次数最多的语句（N+1 查询的典型特征）
+
+语句可能在数据库线程池中执行，调用方和所属请求通过 contextvars 传递（见 async_db.run_in_db_thread）。
+
+每条语句都要查找调用方并加锁汇总，埋点默认关闭；排查性能问题时设置环境变量 SQL_INSTRUMENTATION=1 开启。
+警告通过 logging（logger 名 database.instrumentation）输出。
+"""
+import os
+import re
+import sys
+import time
+import logging
+import sqlite3
+import threading
+import contextvars
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_current_request = contextvars.ContextVar("sql_request", default=None)
+_current_caller = contextvars.ContextVar("sql_caller", default=None)
+
+# ---------- SQL 归一化 ----------
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w?])-?\d+(?:\.\d+)?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """去掉字面量和多余空白，IN (?, ?, ...) 合并为 IN (?...)，用作统计的键"""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+# ---------- 调用方 ----------
+_CALLER_DIRS = tuple(os.sep + name + os.sep for name in ("services", "routes"))
+
+def find_caller():
+    """沿调用栈找到最近的 services/ 或 routes/ 中的函数，返回其限定名（如 ProjectService.get_project_info）"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if any(name in code.co_filename for name in _CALLER_DIRS):
+            return getattr(code, "co_qualname", code.co_name)
+        frame = frame.f_back
+    return _current_caller.get()
+
+def bind_caller(ctx, caller):
+    """在复制出的上下文中记录调用方，供数据库线程中的语句使用"""
+    ctx.run(_current_caller.set, caller)
+
+# ---------- 统计 ----------
+class QueryStats:
+    """按 (归一化 SQL, 调用方) 汇总的全局统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.slow_queries = 0
+
+    def record(self, sql, caller, seconds, rows):
+        key = (normalize_sql(sql), caller or "-")
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[3] += rows
+            if seconds > entry[2]:
+                entry[2] = seconds
+        tracker = _current_request.get()
+        if tracker is not None:
+            tracker.add(key[0], seconds)
+
+    def top(self, limit=10):
+        """按总耗时排序的前 limit 条语句"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {
+                "sql": sql,
+                "caller": caller,
+                "count": count,
+                "total_ms": round(total * 1000, 2),
+                "max_ms": round(max_seconds * 1000, 2),
+                "rows": rows
+            }
+            for (sql, caller), (count, total, max_seconds, rows) in items
+        ]
+
+    def by_caller(self):
+        """按调用方汇总：{调用方: (语句数, 总耗时秒)}"""
+        totals = {}
+        with self._lock:
+            for (_, caller), (count, seconds, _, _) in self._stats.items():
+                total = totals.get(caller, (0, 0.0))
+                totals[caller] = (total[0] + count, total[1] + seconds)
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.slow_queries = 0
+
+query_stats = QueryStats()
+
+_slow_log_lock = threading.Lock()
+
+def _log_slow_query(conn, sql, params, caller, seconds, rows):
+    """把慢查询及其执行计划追加到慢查询日志"""
+    try:
+        # 使用未埋点的游标，避免执行计划本身被统计
+        plan = [row[3] for row in sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params)]
+    except (sqlite3.Error, ValueError):
+        plan = []
+    lines = [
+        f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {seconds * 1000:.1f} ms, {rows} 行, {caller or '-'}",
+        "  " + _SPACE_RE.sub(" ", sql).strip(),
+    ]
+    lines += [f"    {detail}" for detail in plan] or ["    (无执行计划)"]
+    with _slow_log_lock:
+        query_stats.slow_queries += 1
+        directory = os.path.dirname(Config.SLOW_QUERY_LOG)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(Config.SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+# ---------- 连接与游标 ----------
+class InstrumentedCursor(sqlite3.Cursor):
+    """记录每条语句的耗时与行数；SELECT 在结果读完（或游标关闭/重用/释放）时才结束计时"""
+
+    _pending = None  # [sql, params, caller, seconds, rows]
+
+    def _start(self, sql, params, caller, seconds):
+        self._finish()
+        if self.description is None:
+            # 非查询语句：没有结果集，立即结束
+            self._report(sql, params, caller, seconds, max(self.rowcount, 0))
+        else:
+            self._pending = [sql, params, caller, seconds, 0]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self._report(*pending)
+
+    def _report(self, sql, params, caller, seconds, rows):
+        query_stats.record(sql, caller, seconds, rows)
+        if seconds * 1000 >= Config.SLOW_QUERY_MS:
+            _log_slow_query(self.connection, sql, params, caller, seconds, rows)
+
+    def _fetched(self, seconds, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[3] += seconds
+            pending[4] += rows
+            if done:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        caller = find_caller()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._start(sql, parameters, caller, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        caller = find_caller()
+        self._finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        # 参数可能是生成器，无法再用于执行计划
+        self._report(sql, None, caller, time.perf_counter() - start, max(self.rowcount, 0))
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(time.perf_counter() - start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - start, 0, True)
+            raise
+        self._fetched(time.perf_counter() - start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class InstrumentedConnection(sqlite3.Connection):
+    """cursor() 返回 InstrumentedCursor；conn.execute / executemany 是 C 实现的快捷方式，需要单独覆盖"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+# ---------- 请求汇总 ----------
+class RequestQueries:
+    """单个请求内的语句数、DB 耗时和每条归一化语句的次数"""
+
+    __slots__ = ("count", "seconds", "statements", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, sql, seconds):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[sql] += 1
+
+def route_budget(route):
+    """返回路由的 (语句数, DB 毫秒) 预算"""
+    return Config.ROUTE_QUERY_BUDGETS.get(
+        route, (Config.REQUEST_QUERY_BUDGET, Config.REQUEST_DB_TIME_BUDGET_MS)
+    )
+
+class QueryTrackingMiddleware:
+    """ASGI 中间件：统计每个请求执行的 SQL，超出预算时记录警告
+
+    使用纯 ASGI 实现而不是 BaseHTTPMiddleware，流式响应在发送正文期间执行的语句也会计入。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = RequestQueries()
+        token = _current_request.set(tracker)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and tracker.count:
+                timing = f'db;dur={tracker.seconds * 1000:.1f};desc="{tracker.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            if tracker.count:
+                self._check_budget(scope, tracker)
+
+    @staticmethod
+    def _check_budget(scope, tracker):
+        route = scope.get("route")
+        route = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+        max_count, max_ms = route_budget(route)
+        db_ms = tracker.seconds * 1000
+        if tracker.count <= max_count and db_ms <= max_ms:
+            return
+        sql, repeats = tracker.statements.most_common(1)[0]
+        message = "%s 超出 SQL 预算：%d 条语句（预算 %d），DB 耗时 %.1f ms（预算 %s ms）"
+        args = [route, tracker.count, max_count, db_ms, max_ms]
+        if repeats > 1:
+            message += "；重复最多的语句（%d 次）：%s"
+            args += [repeats, sql[:200]]
+        logger.warning(message, *args)
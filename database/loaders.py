@@ -0,0 +1,117 @@
+"""请求级批量加载器（DataLoader 模式）
+
+页面渲染时常见 “先查 N 个父记录，再逐个查子记录” 的 N+1 查询。
+BatchLoader 收集一批键后用一条 IN 查询取回所有子记录，并在本次请求内缓存结果。
+加载器与连接绑定，每个请求新建，不跨请求共享（避免读到过期数据）。
+
+用法：
+    loaders = Loaders(adb)
+    files_by_report = await loaders.report_files.load_many(report_ids)
+
+LazyRows 用于流式渲染的长列表：行在模板渲染到时才从游标读取（见 utils/templating.stream_template）。
+"""
+from collections import defaultdict
+from database.database import db_manager
+
+# 单条 IN 查询的最大参数个数（低于 SQLite 默认的 SQLITE_MAX_VARIABLE_NUMBER）
+CHUNK_SIZE = 500
+
+def _chunks(keys):
+    for i in range(0, len(keys), CHUNK_SIZE):
+        yield keys[i:i + CHUNK_SIZE]
+
+def _group_rows(conn, sql_template, keys):
+    """执行 sql_template（含 {placeholders}），按第一列分组返回 {key: [dict, ...]}"""
+    grouped = defaultdict(list)
+    for chunk in _chunks(keys):
+        placeholders = ",".join("?" * len(chunk))
+        cursor = conn.execute(sql_template.format(placeholders=placeholders), chunk)
+        columns = [col[0] for col in cursor.description]
+        for row in cursor.fetchall():
+            item = dict(zip(columns, row))
+            grouped[row[0]].append(item)
+    return grouped
+
+REPORT_FILES_BATCH_SQL = """
+    SELECT report_id, id, file_path, file_name, uploader_username,
+        uploader_realname, upload_time, file_size, sha256
+    FROM report_files
+    WHERE report_id IN ({placeholders})
+    ORDER BY report_id, upload_time DESC
+"""
+
+USER_QUALIFICATIONS_BATCH_SQL = """
+    SELECT username, qualification_type, qualification_number,
+        issue_date, expiry_date, issue_authority
+    FROM user_qualifications
+    WHERE username IN ({placeholders})
+    ORDER BY username, issue_date DESC
+"""
+
+def batch_report_files(conn, report_ids):
+    """多个报告的文件列表：{report_id: [文件, ...]}，每个报告内按上传时间倒序"""
+    return _group_rows(conn, REPORT_FILES_BATCH_SQL, report_ids)
+
+def batch_user_qualifications(conn, usernames):
+    """多个用户的资质列表：{username: [资质, ...]}，每个用户内按发证日期倒序"""
+    return _group_rows(conn, USER_QUALIFICATIONS_BATCH_SQL, usernames)
+
+class BatchLoader:
+    """按键批量加载并缓存：batch_fn(conn, keys) 返回 {key: value}，缺失的键取空列表"""
+
+    def __init__(self, adb, batch_fn):
+        self.adb = adb
+        self.batch_fn = batch_fn
+        self._cache = {}
+
+    async def load_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        missing = [key for key in keys if key not in self._cache]
+        if missing:
+            loaded = await self.adb.run(self.batch_fn, missing)
+            for key in missing:
+                self._cache[key] = loaded.get(key, [])
+        return {key: self._cache[key] for key in keys}
+
+    async def load(self, key):
+        return (await self.load_many([key]))[key]
+
+class Loaders:
+    """一个请求内使用的全部加载器"""
+
+    def __init__(self, adb):
+        self.report_files = BatchLoader(adb, batch_report_files)
+        self.user_qualifications = BatchLoader(adb, batch_user_qualifications)
+
+class LazyRows:
+    """在模板中按需读取的行
+
+    fetch(conn, *args) 是生成器，逐行产出模板使用的 dict。渲染到 {% if rows %} 时才取读连接并预读第一行，
+    {% for %} 继续从同一游标读取，读完即归还连接。只能迭代一次。
+    """
+
+    def __init__(self, fetch, *args):
+        self._fetch = fetch
+        self._args = args
+        self._rows = None
+        self._head = None
+
+    def _generate(self):
+        with db_manager.reader() as conn:
+            yield from self._fetch(conn, *self._args)
+
+    def _peek(self):
+        if self._rows is None:
+            self._rows = self._generate()
+            first = next(self._rows, None)
+            self._head = [] if first is None else [first]
+        return self._head
+
+    def __bool__(self):
+        return bool(self._peek())
+
+    def __iter__(self):
+        head = self._peek()
+        while head:
+            yield head.pop(0)
+        yield from self._rows
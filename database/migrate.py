@@ -0,0 +1,118 @@
+"""数据库版本迁移
+
+迁移文件位于 database/migrations/，文件名格式为 NNNN_描述.py，
+每个文件定义 upgrade(conn)。已执行的版本记录在 schema_version 表中。
+
+用法：
+    python -m database.migrate status     # 显示当前版本
+    python -m database.migrate pending    # 列出待执行的迁移
+    python -m database.migrate upgrade    # 执行所有待执行的迁移
+"""
+import os
+import re
+import sys
+import sqlite3
+import importlib
+from datetime import datetime
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+def discover_migrations():
+    """按版本号返回所有迁移 [(version, name, module)]"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        name = match.group(2)
+        module = importlib.import_module(f"database.migrations.{filename[:-3]}")
+        migrations.append((version, name, module))
+    return migrations
+
+def latest_version():
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def get_current_version(conn):
+    """读取当前数据库版本（schema_version 表不存在时为 0）"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+def pending_migrations(conn):
+    current = get_current_version(conn)
+    return [m for m in discover_migrations() if m[0] > current]
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+def upgrade(conn, verbose=True):
+    """依次执行所有待执行的迁移，每个迁移在独立的 IMMEDIATE 事务中完成"""
+    applied = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # 手动控制事务
+    try:
+        _ensure_version_table(conn)
+        for version, name, module in discover_migrations():
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 获得写锁后再检查一次，避免多个进程重复执行同一个迁移
+                if version <= get_current_version(conn):
+                    conn.execute("ROLLBACK")
+                    continue
+                module.upgrade(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append((version, name))
+            if verbose:
+                print(f"✅ 已执行迁移 {version:04d}_{name}")
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+def main(argv=None):
+    from config import Config
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "status"
+    db_path = argv[1] if len(argv) > 1 else Config.DATABASE_PATH
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if command == "status":
+            print(f"📊 当前版本: {get_current_version(conn)}，最新版本: {latest_version()}")
+        elif command == "pending":
+            pending = pending_migrations(conn)
+            if not pending:
+                print("✅ 没有待执行的迁移")
+            for version, name, module in pending:
+                print(f"{version:04d}_{name}: {(module.__doc__ or '').strip()}")
+        elif command == "upgrade":
+            applied = upgrade(conn)
+            if not applied:
+                print("✅ 数据库已是最新版本")
+        else:
+            print(__doc__)
+            return 1
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""初始表结构（与现有数据库一致）"""
+
+def upgrade(conn):
+    c = conn.cursor()
+
+    # 用户表
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        realname TEXT,
+        user_type TEXT,
+        password TEXT,
+        phone TEXT,
+        email TEXT,
+        hire_date TEXT,
+        education TEXT,
+        position TEXT,
+        department TEXT,
+        status TEXT DEFAULT 'active',  -- active-在职, inactive-离职
+        create_time TEXT DEFAULT CURRENT_TIMESTAMP,
+        update_time TEXT DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # 项目表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS projects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_no TEXT,                 -- ① 项目序号
+        name TEXT,                       -- ② 项目名称
+        project_type TEXT,               -- ③ 项目类型
+        client_name TEXT,                -- ④ 甲方名称
+        market_leader TEXT,              -- ⑤ 市场部负责人用户名
+        project_leader TEXT,             -- ⑥ 项目负责人用户名
+        progress TEXT,                   -- ⑦ 项目进度
+        report_numbers TEXT,             -- ⑧ 报告号（多个以逗号分隔）
+        amount REAL,                     -- ⑨ 合同金额
+        is_paid TEXT,                    -- ⑩ 是否收费（是/否）
+        creator TEXT,                    -- ⑪ 项目创建人用户名
+        creator_realname TEXT,           -- ⑫ 项目创建人真实姓名
+        start_date TEXT,                 -- ⑬ 开始日期
+        end_date TEXT,                   -- ⑭ 结束日期
+        status TEXT,                     -- ⑮ 状态
+        contract_file TEXT,
+        create_date TEXT
+    )
+    """)
+
+    # 报告表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS reports (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_no TEXT NOT NULL,         -- 报告号
+        project_id INTEGER,              -- 关联的项目ID
+        report_type TEXT,                -- 报告类型
+        file_paths TEXT,                 -- 文件路径（多个以逗号分隔）
+        creator TEXT,                    -- 创建人用户名
+        creator_realname TEXT,           -- 创建人真实姓名
+        create_date TEXT,                -- 创建日期
+        reviewer1 TEXT,                  -- 复核人1用户名
+        reviewer2 TEXT,                  -- 复核人2用户名
+        reviewer3 TEXT,                  -- 复核人3用户名
+        signer1 TEXT,                    -- 签字人1用户名
+        signer2 TEXT,                    -- 签字人2用户名
+        FOREIGN KEY (project_id) REFERENCES projects (id)
+    )
+    """)
+
+    # 报告文件表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS report_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_id INTEGER,               -- 关联的报告ID
+        file_path TEXT NOT NULL,         -- 文件路径
+        file_name TEXT NOT NULL,         -- 原文件名
+        uploader_username TEXT NOT NULL, -- 上传者用户名
+        uploader_realname TEXT NOT NULL, -- 上传者真实姓名
+        upload_time TEXT NOT NULL,       -- 上传时间
+        file_size INTEGER,               -- 文件大小（字节）
+        FOREIGN KEY (report_id) REFERENCES reports (id)
+    )
+    """)
+
+    # 合同文件表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS contract_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id INTEGER,               -- 关联的项目ID
+        file_path TEXT NOT NULL,          -- 文件路径
+        file_name TEXT NOT NULL,          -- 原文件名
+        uploader_username TEXT NOT NULL,  -- 上传者用户名
+        uploader_realname TEXT NOT NULL,  -- 上传者真实姓名
+        upload_time TEXT NOT NULL,        -- 上传时间
+        file_size INTEGER,                -- 文件大小（字节）
+        FOREIGN KEY (project_id) REFERENCES projects (id)
+    )
+    """)
+
+    # 用户资质表（多对多关系）
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS user_qualifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        qualification_type TEXT NOT NULL,
+        qualification_number TEXT,
+        issue_date TEXT,
+        expiry_date TEXT,
+        issue_authority TEXT,
+        FOREIGN KEY (username) REFERENCES users (username),
+        UNIQUE(username, qualification_type)
+    )
+    """)
+
+    # 公司资质表
+    c.execute('''CREATE TABLE IF NOT EXISTS company_qualifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,
+        owner TEXT,
+        file_path TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        update_time TEXT DEFAULT CURRENT_TIMESTAMP,
+        uploader_username TEXT,
+        status TEXT DEFAULT 'active'
+    )''')
+
+    # 报告模板表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS report_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,                -- 类别: asset, real_estate, land, other
+        owner TEXT,                            -- 维护人
+        file_path TEXT NOT NULL,               -- 文件路径
+        file_name TEXT NOT NULL,               -- 原文件名（同时作为模板名称）
+        uploader_username TEXT NOT NULL,       -- 上传者用户名
+        uploader_realname TEXT NOT NULL,       -- 上传者真实姓名
+        upload_time TEXT DEFAULT CURRENT_TIMESTAMP,  -- 上传时间
+        file_size INTEGER,                     -- 文件大小（字节）
+        status TEXT DEFAULT 'active'           -- 状态: active, inactive
+    )
+    """)
+
+    # 评估准则表
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS evaluation_standards (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,                -- 类别: national, industry, internal, other
+        owner TEXT,                            -- 维护人
+        file_path TEXT NOT NULL,               -- 文件路径
+        file_name TEXT NOT NULL,               -- 原文件名
+        uploader_username TEXT NOT NULL,       -- 上传者用户名
+        uploader_realname TEXT NOT NULL,       -- 上传者真实姓名
+        upload_time TEXT DEFAULT CURRENT_TIMESTAMP,  -- 上传时间
+        file_size INTEGER,                     -- 文件大小（字节）
+        status TEXT DEFAULT 'active'           -- 状态: active, inactive
+    )
+    """)
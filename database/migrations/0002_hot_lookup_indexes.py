@@ -0,0 +1,36 @@
+"""为 services/ 中的查询条件、关联和排序列建立二级索引"""
+
+INDEXES = [
+    # 项目：按编号查找、按创建时间排序、按负责人/创建人/状态/年份筛选
+    "CREATE INDEX IF NOT EXISTS idx_projects_project_no ON projects (project_no)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_create_date ON projects (create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_status_create_date ON projects (status, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_project_leader ON projects (project_leader, status)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_market_leader ON projects (market_leader, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_creator ON projects (creator, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_projects_start_year ON projects (strftime('%Y', start_date))",
+
+    # 报告：按项目列出、按创建人/复核人/签字人查找
+    "CREATE INDEX IF NOT EXISTS idx_reports_project_id ON reports (project_id, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_creator ON reports (creator, create_date)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_reviewer1 ON reports (reviewer1)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_reviewer2 ON reports (reviewer2)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_reviewer3 ON reports (reviewer3)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_signer1 ON reports (signer1)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_signer2 ON reports (signer2)",
+
+    # 文件：按报告/项目列出
+    "CREATE INDEX IF NOT EXISTS idx_report_files_report_id ON report_files (report_id, upload_time)",
+    "CREATE INDEX IF NOT EXISTS idx_contract_files_project_id ON contract_files (project_id, upload_time)",
+
+    # 资料库列表：按状态和类别筛选，按时间排序
+    "CREATE INDEX IF NOT EXISTS idx_company_qualifications_status ON company_qualifications (status, category, update_time)",
+    "CREATE INDEX IF NOT EXISTS idx_report_templates_status ON report_templates (status, category, upload_time)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluation_standards_status ON evaluation_standards (status, category, upload_time)",
+
+    # user_qualifications.username 已由 UNIQUE(username, qualification_type) 的自动索引覆盖
+]
+
+def upgrade(conn):
+    for sql in INDEXES:
+        conn.execute(sql)
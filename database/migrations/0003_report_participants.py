@@ -0,0 +1,19 @@
+"""新增 report_participants 表，替代 reviewer1..3 / signer1..2 的 OR 查询"""
+from database.participants import rebuild_report_participants
+
+def upgrade(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS report_participants (
+        report_id INTEGER NOT NULL,      -- 报告ID
+        username TEXT NOT NULL,          -- 参与人用户名
+        role TEXT NOT NULL,              -- 角色: reviewer-复核人, signer-签字人
+        slot INTEGER NOT NULL,           -- 槽位: 复核人 1-3，签字人 1-2
+        PRIMARY KEY (report_id, role, slot),
+        FOREIGN KEY (report_id) REFERENCES reports (id)
+    )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_report_participants_user
+        ON report_participants (username, role, report_id)
+    """)
+    rebuild_report_participants(conn)
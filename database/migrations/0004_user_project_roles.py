@@ -0,0 +1,17 @@
+"""新增 user_project_roles 表，预计算“我参与的项目”"""
+from database.project_roles import rebuild_user_project_roles
+
+def upgrade(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_project_roles (
+        username TEXT NOT NULL,          -- 用户名
+        project_id INTEGER NOT NULL,     -- 项目ID
+        role TEXT NOT NULL,              -- project_leader, market_leader, creator, reviewer, signer
+        PRIMARY KEY (username, project_id, role)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_project_roles_project
+        ON user_project_roles (project_id)
+    """)
+    rebuild_user_project_roles(conn)
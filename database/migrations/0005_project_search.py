@@ -0,0 +1,58 @@
+"""新增 projects_fts 全文检索索引（FTS5 trigram），由触发器与 projects/users 同步"""
+from database.search import LEADER_NAMES_SQL, rebuild_project_search
+
+INSERT_ROW = f"""
+    INSERT INTO projects_fts (rowid, project_no, name, client_name, report_numbers, leader_names)
+    VALUES (NEW.id, NEW.project_no, NEW.name, NEW.client_name, NEW.report_numbers,
+            {LEADER_NAMES_SQL.format(row="NEW")});
+"""
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+            project_no, name, client_name, report_numbers, leader_names,
+            tokenize = 'trigram'
+        )
+    """)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects
+        BEGIN
+            {INSERT_ROW}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF
+            project_no, name, client_name, report_numbers, project_leader, market_leader ON projects
+        BEGIN
+            DELETE FROM projects_fts WHERE rowid = OLD.id;
+            {INSERT_ROW}
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects
+        BEGIN
+            DELETE FROM projects_fts WHERE rowid = OLD.id;
+        END
+    """)
+
+    # 用户改名后，重写其负责的项目的负责人姓名
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS projects_fts_leader_rename AFTER UPDATE OF realname ON users
+        WHEN OLD.realname IS NOT NEW.realname
+        BEGIN
+            DELETE FROM projects_fts WHERE rowid IN (
+                SELECT id FROM projects WHERE project_leader = NEW.username
+                UNION SELECT id FROM projects WHERE market_leader = NEW.username
+            );
+            INSERT INTO projects_fts (rowid, project_no, name, client_name, report_numbers, leader_names)
+            SELECT p.id, p.project_no, p.name, p.client_name, p.report_numbers, {LEADER_NAMES_SQL.format(row="p")}
+            FROM projects p
+            WHERE p.id IN (
+                SELECT id FROM projects WHERE project_leader = NEW.username
+                UNION SELECT id FROM projects WHERE market_leader = NEW.username
+            );
+        END
+    """)
+
+    rebuild_project_search(conn)
@@ -0,0 +1,11 @@
+"""新增 project_no_sequences 表，按年份分配项目编号"""
+from database.numbering import rebuild_project_no_sequences
+
+def upgrade(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS project_no_sequences (
+        year INTEGER PRIMARY KEY,        -- 年份
+        last_seq INTEGER NOT NULL        -- 该年已分配的最大序号
+    )
+    """)
+    rebuild_project_no_sequences(conn)
@@ -0,0 +1,22 @@
+"""reports 新增结构化报告号列 (report_prefix, report_year, is_filing, report_seq)、唯一索引和空缺序号表"""
+from database.numbering import REPORT_SEQ_GAPS_DDL, backfill_report_numbers, rebuild_report_seq_gaps
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+    for name, sql_type in [("report_prefix", "TEXT"), ("report_year", "INTEGER"),
+                           ("is_filing", "INTEGER"), ("report_seq", "INTEGER")]:
+        if name not in columns:
+            conn.execute(f"ALTER TABLE reports ADD COLUMN {name} {sql_type}")
+
+    duplicates = backfill_report_numbers(conn)
+    if duplicates:
+        print(f"⚠️ 以下报告号重复，仅保留最早的一条参与编号: {', '.join(duplicates)}")
+
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_number
+        ON reports (report_prefix, report_year, is_filing, report_seq)
+    """)
+
+    for sql in REPORT_SEQ_GAPS_DDL:
+        conn.execute(sql)
+    rebuild_report_seq_gaps(conn)
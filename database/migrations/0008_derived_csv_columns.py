@@ -0,0 +1,55 @@
+"""projects.report_numbers / reports.file_paths 改由触发器从 reports / report_files 派生"""
+from database.consistency import REPORT_NUMBERS_SQL, FILE_PATHS_SQL, rebuild_report_numbers, rebuild_file_paths
+
+def _refresh_report_numbers(row):
+    return (f"UPDATE projects SET report_numbers = {REPORT_NUMBERS_SQL.format(project_id=f'{row}.project_id')} "
+            f"WHERE id = {row}.project_id;")
+
+def _refresh_file_paths(row):
+    return (f"UPDATE reports SET file_paths = {FILE_PATHS_SQL.format(report_id=f'{row}.report_id')} "
+            f"WHERE id = {row}.report_id;")
+
+def upgrade(conn):
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reports_report_numbers_insert AFTER INSERT ON reports
+        BEGIN
+            {_refresh_report_numbers("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reports_report_numbers_update AFTER UPDATE OF report_no, project_id ON reports
+        BEGIN
+            {_refresh_report_numbers("OLD")}
+            {_refresh_report_numbers("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS reports_report_numbers_delete AFTER DELETE ON reports
+        BEGIN
+            {_refresh_report_numbers("OLD")}
+        END
+    """)
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS report_files_file_paths_insert AFTER INSERT ON report_files
+        BEGIN
+            {_refresh_file_paths("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS report_files_file_paths_update AFTER UPDATE OF file_path, report_id ON report_files
+        BEGIN
+            {_refresh_file_paths("OLD")}
+            {_refresh_file_paths("NEW")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS report_files_file_paths_delete AFTER DELETE ON report_files
+        BEGIN
+            {_refresh_file_paths("OLD")}
+        END
+    """)
+
+    # 修正已有数据中与 reports / report_files 不一致的字段
+    rebuild_report_numbers(conn)
+    rebuild_file_paths(conn)
@@ -0,0 +1,7 @@
+"""新增 user_stats 物化表，由触发器维护用户 Dashboard 的统计数字"""
+from database.user_stats import USER_STATS_DDL, rebuild_user_stats
+
+def upgrade(conn):
+    for sql in USER_STATS_DDL:
+        conn.execute(sql)
+    rebuild_user_stats(conn)
@@ -0,0 +1,20 @@
+"""新增按内容寻址的文件存储 blobs，各文件表增加 sha256 列并由触发器维护引用数"""
+from database.blobs import BLOB_TABLES, blob_ref_triggers, rebuild_blob_refs
+
+def upgrade(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS blobs (
+        sha256 TEXT PRIMARY KEY,           -- 文件内容的 SHA-256
+        path TEXT NOT NULL,                -- 存储路径
+        size INTEGER NOT NULL,             -- 文件大小（字节）
+        ref_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT
+    ) WITHOUT ROWID
+    """)
+    for table in BLOB_TABLES:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "sha256" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN sha256 TEXT")
+        for sql in blob_ref_triggers(table):
+            conn.execute(sql)
+    rebuild_blob_refs(conn)
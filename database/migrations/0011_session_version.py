@@ -0,0 +1,6 @@
+"""users 新增 session_version 列：修改密码、用户类型或状态、删除用户时加一，使已签发的会话令牌失效"""
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    if "session_version" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN session_version INTEGER NOT NULL DEFAULT 0")
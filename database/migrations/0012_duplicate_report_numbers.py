@@ -0,0 +1,9 @@
+"""删除报告时，若还有重复的旧报告号行在使用同一个号，序号转给该行而不回收为空缺；修复此前已回收的序号"""
+from database.numbering import REPORT_SEQ_GAPS_DDL, promote_unnumbered_reports, rebuild_report_seq_gaps
+
+def upgrade(conn):
+    conn.execute("DROP TRIGGER IF EXISTS reports_release_seq")
+    for sql in REPORT_SEQ_GAPS_DDL:
+        conn.execute(sql)
+    promote_unnumbered_reports(conn)
+    rebuild_report_seq_gaps(conn)
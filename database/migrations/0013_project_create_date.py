@@ -0,0 +1,22 @@
+"""projects.create_date 为空的旧项目改为空字符串，并由触发器保证以后也不为 NULL
+
+游标分页按 (create_date, id) 行值比较，NULL 参与比较的结果为 NULL，这些项目在第一页之后无法翻到；
+空字符串排在所有日期之后，游标中也按空字符串编码，仍可使用 (create_date, id) 索引。
+"""
+
+def upgrade(conn):
+    conn.execute("UPDATE projects SET create_date = '' WHERE create_date IS NULL")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS projects_create_date_insert AFTER INSERT ON projects
+        WHEN NEW.create_date IS NULL
+        BEGIN
+            UPDATE projects SET create_date = '' WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS projects_create_date_update AFTER UPDATE OF create_date ON projects
+        WHEN NEW.create_date IS NULL
+        BEGIN
+            UPDATE projects SET create_date = '' WHERE id = NEW.id;
+        END
+    """)
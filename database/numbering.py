@@ -0,0 +1,217 @@
+"""项目编号与报告号的分配
+
+项目编号：project_no_sequences 为每个年份保存已分配的最大序号。分配时在写事务中先自增再读取，
+并发创建时由 SQLite 的写锁串行化，不会发出重复编号；
+编号只增不减，删除项目后不会被重新使用，事务回滚时则连同序号一起撤销。
+
+报告号：reports 表中以结构化列 (report_prefix, report_year, is_filing, report_seq) 保存，
+并有唯一索引。删除报告时由触发器把序号放入 report_seq_gaps，分配时优先取最小的空缺序号，
+否则取索引上的 MAX + 1，两者都是一次索引查找。
+"""
+import re
+
+def begin_immediate(conn):
+    """没有进行中的事务时开启 IMMEDIATE 事务（立即获取写锁）"""
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+def allocate_project_no(conn, year):
+    """分配 P{year}_{nnn} 格式的项目编号（需与插入项目在同一事务内提交）"""
+    begin_immediate(conn)
+    conn.execute("""
+        INSERT INTO project_no_sequences (year, last_seq) VALUES (?, 1)
+        ON CONFLICT (year) DO UPDATE SET last_seq = last_seq + 1
+    """, (year,))
+    seq = conn.execute("SELECT last_seq FROM project_no_sequences WHERE year = ?", (year,)).fetchone()[0]
+    return f"P{year}_{seq:03d}"
+
+def rebuild_project_no_sequences(conn):
+    """按现有项目编号重建各年份的序号（取每年的最大序号）"""
+    conn.execute("DELETE FROM project_no_sequences")
+    conn.execute("""
+        INSERT INTO project_no_sequences (year, last_seq)
+        SELECT CAST(substr(project_no, 2, 4) AS INTEGER), MAX(CAST(substr(project_no, 7) AS INTEGER))
+        FROM projects
+        WHERE project_no GLOB 'P[0-9][0-9][0-9][0-9]_[0-9]*'
+        GROUP BY substr(project_no, 2, 4)
+    """)
+
+# 报告号格式：川鼎房估[2025]字第A001号（A 表示备案）
+REPORT_NO_PREFIX = "川鼎"
+REPORT_NO_RE = re.compile(r"^川鼎(\S+?)\[(\d{4})\]字第(A?)(\d+)号$")
+
+def format_report_no(prefix, year, is_filing, seq):
+    return f"{REPORT_NO_PREFIX}{prefix}[{year}]字第{'A' if is_filing else ''}{seq:03d}号"
+
+def parse_report_no(report_no):
+    """解析报告号，返回 (prefix, year, is_filing, seq)；格式不符时返回 None"""
+    match = REPORT_NO_RE.match(report_no or "")
+    if not match:
+        return None
+    return match.group(1), int(match.group(2)), 1 if match.group(3) else 0, int(match.group(4))
+
+# 迁移前各项目独立编号，报告号可能重复：只有最早的一条保留结构化列，其余行的 report_seq 为空，
+# 仍保留原来的 report_no 文本（部分索引 idx_reports_unnumbered 只包含这些行）
+UNNUMBERED_REPORT_SQL = "SELECT MIN(id) FROM reports WHERE report_no = {row}.report_no AND report_seq IS NULL"
+
+# 空缺序号表及删除报告时回收序号的触发器（迁移 0007、0012 与基准测试共用）
+# 删除的报告号还有重复的行在使用时，把序号转给其中最早的一条，不作为空缺，以免再次分配出同一个报告号
+REPORT_SEQ_GAPS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS report_seq_gaps (
+        report_prefix TEXT NOT NULL,
+        report_year INTEGER NOT NULL,
+        is_filing INTEGER NOT NULL,
+        report_seq INTEGER NOT NULL,
+        PRIMARY KEY (report_prefix, report_year, is_filing, report_seq)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_reports_unnumbered ON reports (report_no) WHERE report_seq IS NULL
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_release_seq AFTER DELETE ON reports
+    WHEN OLD.report_seq IS NOT NULL
+    BEGIN
+        UPDATE reports
+        SET report_prefix = OLD.report_prefix, report_year = OLD.report_year,
+            is_filing = OLD.is_filing, report_seq = OLD.report_seq
+        WHERE id = ({UNNUMBERED_REPORT_SQL.format(row="OLD")});
+        INSERT OR IGNORE INTO report_seq_gaps (report_prefix, report_year, is_filing, report_seq)
+        SELECT OLD.report_prefix, OLD.report_year, OLD.is_filing, OLD.report_seq
+        WHERE NOT EXISTS (
+            SELECT 1 FROM reports
+            WHERE report_prefix = OLD.report_prefix AND report_year = OLD.report_year
+              AND is_filing = OLD.is_filing AND report_seq = OLD.report_seq
+        );
+    END
+    """,
+]
+
+# 最小的空缺序号（参数为 报告前缀、年份、是否备案）
+REPORT_SEQ_GAP_SQL = """
+    SELECT MIN(g.report_seq) FROM report_seq_gaps g
+    WHERE g.report_prefix = ?1 AND g.report_year = ?2 AND g.is_filing = ?3
+      AND NOT EXISTS (
+        SELECT 1 FROM reports r
+        WHERE r.report_prefix = ?1 AND r.report_year = ?2 AND r.is_filing = ?3
+          AND r.report_seq = g.report_seq
+      )
+"""
+
+REPORT_SEQ_MAX_SQL = """
+    SELECT MAX(report_seq) FROM reports
+    WHERE report_prefix = ? AND report_year = ? AND is_filing = ?
+"""
+
+def allocate_report_seq(conn, prefix, year, is_filing):
+    """分配报告序号：优先取最小的空缺序号，没有空缺时取 MAX + 1（需与插入报告在同一事务内提交）"""
+    begin_immediate(conn)
+    key = (prefix, year, is_filing)
+    # 跳过已被占用的空缺记录（正常情况下不会出现，防止手工改数据后分配到重复序号）
+    row = conn.execute(REPORT_SEQ_GAP_SQL, key).fetchone()
+    if row[0] is not None:
+        conn.execute("""
+            DELETE FROM report_seq_gaps
+            WHERE report_prefix = ? AND report_year = ? AND is_filing = ? AND report_seq = ?
+        """, (*key, row[0]))
+        return row[0]
+    row = conn.execute(REPORT_SEQ_MAX_SQL, key).fetchone()
+    return (row[0] or 0) + 1
+
+def rebuild_report_seq_gaps(conn):
+    """按现有报告重建空缺序号表（每组 1..MAX 之间未使用的序号）"""
+    conn.execute("DELETE FROM report_seq_gaps")
+    used = {}
+    for prefix, year, is_filing, seq in conn.execute("""
+        SELECT report_prefix, report_year, is_filing, report_seq FROM reports
+        WHERE report_seq IS NOT NULL
+    """):
+        used.setdefault((prefix, year, is_filing), set()).add(seq)
+    for key, seqs in used.items():
+        conn.executemany("""
+            INSERT INTO report_seq_gaps (report_prefix, report_year, is_filing, report_seq)
+            VALUES (?, ?, ?, ?)
+        """, ((*key, seq) for seq in range(1, max(seqs)) if seq not in seqs))
+
+def promote_unnumbered_reports(conn):
+    """report_seq 为空、但报告号已没有其他行占用的报告重新取得结构化列，返回处理的行数"""
+    promoted = 0
+    rows = conn.execute("SELECT id, report_no FROM reports WHERE report_seq IS NULL ORDER BY id").fetchall()
+    for report_id, report_no in rows:
+        parts = parse_report_no(report_no)
+        if parts is None or conn.execute("""
+            SELECT 1 FROM reports
+            WHERE report_prefix = ? AND report_year = ? AND is_filing = ? AND report_seq = ?
+        """, parts).fetchone():
+            continue
+        conn.execute("""
+            UPDATE reports SET report_prefix = ?, report_year = ?, is_filing = ?, report_seq = ?
+            WHERE id = ?
+        """, (*parts, report_id))
+        promoted += 1
+    return promoted
+
+def backfill_report_numbers(conn):
+    """从 report_no 解析结构化列；同一报告号重复出现时只保留最早的一条参与唯一约束"""
+    seen = set()
+    duplicates = []
+    rows = conn.execute("SELECT id, report_no FROM reports ORDER BY id").fetchall()
+    for report_id, report_no in rows:
+        parts = parse_report_no(report_no)
+        if parts in seen:
+            duplicates.append(report_no)
+            parts = None
+        if parts:
+            seen.add(parts)
+        conn.execute("""
+            UPDATE reports SET report_prefix = ?, report_year = ?, is_filing = ?, report_seq = ?
+            WHERE id = ?
+        """, (*(parts or (None, None, None, None)), report_id))
+    return duplicates
+
+def benchmark(count=100000, rounds=200):
+    """在内存数据库中生成 count 条同年度报告，测量报告序号分配的耗时"""
+    import sqlite3
+    import time
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, report_no TEXT NOT NULL,
+            report_prefix TEXT, report_year INTEGER, is_filing INTEGER, report_seq INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX idx_reports_number
+        ON reports (report_prefix, report_year, is_filing, report_seq)
+    """)
+    for sql in REPORT_SEQ_GAPS_DDL:
+        conn.execute(sql)
+    conn.executemany(
+        "INSERT INTO reports (report_no, report_prefix, report_year, is_filing, report_seq) VALUES (?, ?, ?, ?, ?)",
+        ((format_report_no("房估", 2025, 0, seq), "房估", 2025, 0, seq) for seq in range(1, count + 1))
+    )
+    conn.commit()
+
+    def measure(label):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            seq = allocate_report_seq(conn, "房估", 2025, 0)
+            conn.rollback()
+        elapsed = (time.perf_counter() - start) / rounds * 1000
+        print(f"  {label}: 序号 {seq}，平均 {elapsed:.3f} ms")
+
+    print(f"📊 {count} 条同年度报告")
+    measure("无空缺")
+    conn.execute("DELETE FROM reports WHERE report_seq = ?", (count // 2,))
+    conn.commit()
+    measure("中间空缺")
+    conn.execute("DELETE FROM reports WHERE report_seq = 1")
+    conn.commit()
+    measure("首个空缺")
+    conn.close()
+
+if __name__ == "__main__":
+    import sys
+    benchmark(*(int(arg) for arg in sys.argv[1:]))
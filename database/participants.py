@@ -0,0 +1,42 @@
+"""报告参与人（复核人、签字人）规范化表的维护
+
+reports 表中的 reviewer1..3 / signer1..2 同步写入 report_participants，
+按用户查找“我复核/签字的报告”时即可走 (username, role) 索引。
+"""
+
+# (角色, 槽位, reports 表中的列名)
+PARTICIPANT_SLOTS = [
+    ("reviewer", 1, "reviewer1"),
+    ("reviewer", 2, "reviewer2"),
+    ("reviewer", 3, "reviewer3"),
+    ("signer", 1, "signer1"),
+    ("signer", 2, "signer2"),
+]
+
+def sync_report_participants(c, report_id, reviewers, signers):
+    """用报告当前的复核人/签字人重写该报告的参与人记录"""
+    c.execute("DELETE FROM report_participants WHERE report_id = ?", (report_id,))
+    rows = []
+    for slot, username in enumerate(reviewers, start=1):
+        if username:
+            rows.append((report_id, username, "reviewer", slot))
+    for slot, username in enumerate(signers, start=1):
+        if username:
+            rows.append((report_id, username, "signer", slot))
+    c.executemany("""
+        INSERT INTO report_participants (report_id, username, role, slot)
+        VALUES (?, ?, ?, ?)
+    """, rows)
+
+def delete_report_participants(c, report_id):
+    c.execute("DELETE FROM report_participants WHERE report_id = ?", (report_id,))
+
+def rebuild_report_participants(conn):
+    """根据 reports 表全量重建 report_participants"""
+    conn.execute("DELETE FROM report_participants")
+    for role, slot, column in PARTICIPANT_SLOTS:
+        conn.execute(f"""
+            INSERT INTO report_participants (report_id, username, role, slot)
+            SELECT id, {column}, ?, ? FROM reports
+            WHERE {column} IS NOT NULL AND {column} != ''
+        """, (role, slot))
@@ -0,0 +1,38 @@
+"""用户与项目角色的预计算索引 user_project_roles 的维护
+
+一个用户在某个项目中的角色来自项目本身（项目负责人、市场部负责人、创建人）
+以及该项目下报告的复核人/签字人（report_participants）。
+项目或报告发生变化时按项目整体重算，保证删除某份报告后不会误删仍然有效的角色。
+"""
+
+PROJECT_ROLES_SQL = """
+    SELECT project_leader, id, 'project_leader' FROM projects
+        WHERE {where} AND project_leader IS NOT NULL AND project_leader != ''
+    UNION SELECT market_leader, id, 'market_leader' FROM projects
+        WHERE {where} AND market_leader IS NOT NULL AND market_leader != ''
+    UNION SELECT creator, id, 'creator' FROM projects
+        WHERE {where} AND creator IS NOT NULL AND creator != ''
+    UNION SELECT rp.username, r.project_id, rp.role FROM report_participants rp
+        JOIN reports r ON r.id = rp.report_id
+        WHERE r.project_id IS NOT NULL AND {report_where}
+"""
+
+DELETE_PROJECT_ROLES_SQL = "DELETE FROM user_project_roles WHERE project_id = ?"
+
+def refresh_project_roles(c, project_id):
+    """重算单个项目的所有用户角色"""
+    c.execute(DELETE_PROJECT_ROLES_SQL, (project_id,))
+    sql = PROJECT_ROLES_SQL.format(where="id = ?", report_where="r.project_id = ?")
+    c.execute(f"""
+        INSERT OR IGNORE INTO user_project_roles (username, project_id, role)
+        {sql}
+    """, (project_id,) * 4)
+
+def rebuild_user_project_roles(conn):
+    """全量重建 user_project_roles"""
+    conn.execute("DELETE FROM user_project_roles")
+    sql = PROJECT_ROLES_SQL.format(where="1 = 1", report_where="1 = 1")
+    conn.execute(f"""
+        INSERT OR IGNORE INTO user_project_roles (username, project_id, role)
+        {sql}
+    """)
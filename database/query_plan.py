@@ -0,0 +1,202 @@
+"""热点查询的执行计划检查
+
+hot_queries() 从 services/ 和 database/ 中导入热点查询实际执行的 SQL（参数只用于生成执行计划），
+服务中的查询修改后这里检查的就是修改后的语句。触发器中的查找把 NEW./OLD. 列替换为参数后检查。
+
+check_query_plans 对每条查询执行 EXPLAIN QUERY PLAN：只有 SEARCH（按索引查找）算作使用了索引，
+SCAN 一律视为全表扫描——包括 USING INDEX / USING COVERING INDEX，那只是按索引顺序遍历整张表。
+确实需要遍历的查询（如按 create_date 索引顺序读取首页）登记在 INTENTIONAL_SCANS 中并写明原因。
+
+用法：
+    python -m database.query_plan [db_path]
+"""
+import re
+import sys
+import sqlite3
+
+_TRIGGER_ROW_RE = re.compile(r"\b(?:NEW|OLD)\.\w+")
+
+SAMPLE_USER = "zhangwen"
+SAMPLE_SHA256 = "0" * 64
+
+# 允许的 SCAN：{查询名: {计划行: 原因}}
+INTENTIONAL_SCANS = {
+    "admin_projects_first_page": {
+        "SCAN p USING INDEX idx_projects_create_date": "按 (create_date, id) 索引顺序读取，LIMIT 截断，只读一页",
+    },
+    "admin_projects_count": {
+        "SCAN p USING COVERING INDEX idx_projects_start_year": "无筛选条件的总数只能数全部行（只读索引），结果缓存 COUNT_CACHE_TTL 秒",
+    },
+    "project_years": {
+        "SCAN projects USING INDEX idx_projects_start_year": "年份筛选器需要所有项目的开始年份，按年份索引顺序去重",
+    },
+    # 虚表的计划行总是 SCAN；M 约束表示由 FTS5 全文索引完成 MATCH
+    "project_search": {
+        "SCAN projects_fts VIRTUAL TABLE INDEX 0:M5": "FTS5 全文索引查找",
+    },
+    "project_search_count": {
+        "SCAN projects_fts VIRTUAL TABLE INDEX 0:M5": "FTS5 全文索引查找",
+    },
+    "project_search_short_term": {
+        "SCAN projects_fts VIRTUAL TABLE INDEX 0:": "少于 3 个字的检索词无法使用 trigram 索引，只能对 projects_fts 做 LIKE",
+    },
+}
+
+def trigger_lookup(sql):
+    """触发器中的语句：NEW./OLD. 列替换为参数"""
+    return _TRIGGER_ROW_RE.sub("?", sql)
+
+def hot_queries():
+    """{查询名: (sql, 参数)}；参数为 None 时每个 ? 绑定 NULL"""
+    from utils.pagination import keyset_query, encode_cursor
+    from database.search import project_filters, ranked_search_query
+    from database.loaders import REPORT_FILES_BATCH_SQL, USER_QUALIFICATIONS_BATCH_SQL
+    from database.numbering import REPORT_SEQ_GAP_SQL, REPORT_SEQ_MAX_SQL, UNNUMBERED_REPORT_SQL
+    from database.project_roles import DELETE_PROJECT_ROLES_SQL
+    from database.user_stats import (
+        USER_STATS_ROW_SQL, PROJECT_MEMBERS_SQL, OTHER_PROJECT_ROLE_SQL, OTHER_PARTICIPANT_SLOT_SQL
+    )
+    from database.blobs import BLOB_LOOKUP_SQL, BLOB_RELEASE_SQL, BLOB_REF_SQL
+    from services.project_service import (
+        PROJECT_YEARS_SQL, PROJECT_INFO_SQL, PROJECT_CONTRACT_FILES_SQL, PROJECT_REPORTS_SQL
+    )
+    from services.report_service import REPORT_IN_PROJECT_SQL, SIGNER_QUALIFIED_SQL
+    from services.qualification_service import USER_QUALIFICATION_TYPES_SQL
+    from services.user_service import (
+        PARTICIPATED_PROJECT_IDS, USER_PROJECT_CONDITIONS, USER_PROJECTS_SQL, USER_REPORTS_SQL,
+        USER_PROJECT_REFS_SQL, company_qualifications_query, active_files_query
+    )
+    from services.export_service import DOSSIER_PROJECT_SQL, DOSSIER_CONTRACT_FILES_SQL, DOSSIER_REPORTS_SQL
+
+    def page(filters, cursor=None):
+        from_clause, where, params, _ = filters
+        sql, params, _ = keyset_query("SELECT p.*" + from_clause + where, params, cursor, 20)
+        return sql, params
+
+    def count(filters):
+        from_clause, where, params, _ = filters
+        return "SELECT COUNT(*)" + from_clause + where, params
+
+    def search(filters):
+        from_clause, where, params, _ = filters
+        return ranked_search_query(from_clause, where, params, 20, 0)
+
+    older = encode_cursor("2025-06-01", 100, "next")
+    newer = encode_cursor("2025-06-01", 100, "prev")
+    user_projects = dict(where=f" WHERE p.id IN ({PARTICIPATED_PROJECT_IDS})", params=[SAMPLE_USER])
+
+    queries = {
+        # ---------- ProjectService ----------
+        "project_info": (PROJECT_INFO_SQL, ("P2025_001",)),
+        "project_contract_files": (PROJECT_CONTRACT_FILES_SQL, (1,)),
+        "project_reports": (PROJECT_REPORTS_SQL, (1,)),
+        "project_years": (PROJECT_YEARS_SQL, ()),
+        "admin_projects_first_page": page(project_filters()),
+        "admin_projects_next_page": page(project_filters(), older),
+        "admin_projects_prev_page_by_status": page(project_filters(status="active"), newer),
+        "admin_projects_page_by_status": page(project_filters(status="active")),
+        "admin_projects_page_by_year": page(project_filters(year="2025")),
+        "admin_projects_count": count(project_filters()),
+        "admin_projects_count_by_status": count(project_filters(status="active")),
+        "project_search": search(project_filters("中和市")),
+        "project_search_count": count(project_filters("中和市")),
+        "project_search_short_term": page(project_filters("张三")),
+        "report_files_batch": (REPORT_FILES_BATCH_SQL.format(placeholders="?,?,?"), (1, 2, 3)),
+        "user_qualifications_batch": (USER_QUALIFICATIONS_BATCH_SQL.format(placeholders="?,?"),
+                                      (SAMPLE_USER, "admin")),
+
+        # ---------- ReportService ----------
+        "report_in_project": (REPORT_IN_PROJECT_SQL, (1, 1)),
+        "signer_qualified": (SIGNER_QUALIFIED_SQL, (SAMPLE_USER, "资产评估师")),
+        "user_qualification_types": (USER_QUALIFICATION_TYPES_SQL, (SAMPLE_USER,)),
+        "report_seq_gap": (REPORT_SEQ_GAP_SQL, ("房估", 2025, 0)),
+        "report_seq_max": (REPORT_SEQ_MAX_SQL, ("房估", 2025, 0)),
+        "project_roles_refresh": (DELETE_PROJECT_ROLES_SQL, (1,)),
+
+        # ---------- UserService ----------
+        "user_stats_row": (USER_STATS_ROW_SQL, (SAMPLE_USER,)),
+        "user_projects_page": page(project_filters(**user_projects)),
+        "user_projects_next_page_by_status": page(project_filters(status="active", **user_projects), older),
+        "user_projects_count": count(project_filters(**user_projects)),
+        "user_project_refs": (USER_PROJECT_REFS_SQL, (SAMPLE_USER,) * 3),
+        "company_qualifications_by_category": company_qualifications_query("营业执照"),
+        "company_qualifications_active": company_qualifications_query(),
+        "report_templates_active": active_files_query("report_templates"),
+        "evaluation_standards_active": active_files_query("evaluation_standards"),
+
+        # ---------- ExportService ----------
+        "export_project": (DOSSIER_PROJECT_SQL, ("P2025_001",)),
+        "export_contract_files": (DOSSIER_CONTRACT_FILES_SQL, (1,)),
+        "export_reports": (DOSSIER_REPORTS_SQL, (1,)),
+
+        # ---------- 文件存储 ----------
+        "blob_lookup": (BLOB_LOOKUP_SQL, (SAMPLE_SHA256,)),
+        "blob_release": (BLOB_RELEASE_SQL, (SAMPLE_SHA256,)),
+
+        # ---------- 触发器中的查找 ----------
+        "trigger_blob_ref": (trigger_lookup(BLOB_REF_SQL.format(delta="+ 1", row="NEW")), None),
+        "trigger_project_members": (trigger_lookup(PROJECT_MEMBERS_SQL.format(row="NEW")), None),
+        "trigger_other_project_role": (trigger_lookup(OTHER_PROJECT_ROLE_SQL.format(row="NEW")), None),
+        "trigger_other_participant_slot": (trigger_lookup(OTHER_PARTICIPANT_SLOT_SQL.format(row="NEW")), None),
+        "trigger_unnumbered_report": (trigger_lookup(UNNUMBERED_REPORT_SQL.format(row="OLD")), None),
+    }
+    for report_type, sql in USER_REPORTS_SQL.items():
+        queries[f"user_reports_{report_type}"] = (sql, (SAMPLE_USER,))
+    for project_type, condition in USER_PROJECT_CONDITIONS.items():
+        queries[f"user_projects_{project_type}"] = (USER_PROJECTS_SQL.format(condition=condition), (SAMPLE_USER,))
+    return queries
+
+def explain(conn, sql, params=()):
+    """返回执行计划的 detail 列表"""
+    if params is None:
+        params = (None,) * sql.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+def is_full_scan(detail, allowed=()):
+    """SCAN 即为全表扫描（常量行、物化的子查询和 allowed 中登记的计划行除外）"""
+    if not detail.startswith("SCAN "):
+        return False
+    if detail.startswith(("SCAN CONSTANT ROW", "SCAN (subquery")):
+        return False
+    return detail not in allowed
+
+def check_query_plans(conn, queries=None):
+    """检查所有登记查询，返回 {查询名: [全表扫描的计划行]}（空字典表示全部通过）"""
+    failures = {}
+    for name, (sql, params) in (queries or hot_queries()).items():
+        allowed = INTENTIONAL_SCANS.get(name, {})
+        scans = [detail for detail in explain(conn, sql, params) if is_full_scan(detail, allowed)]
+        if scans:
+            failures[name] = scans
+    return failures
+
+def main(argv=None):
+    from config import Config
+
+    argv = sys.argv[1:] if argv is None else argv
+    db_path = argv[0] if argv else Config.DATABASE_PATH
+    # 导入服务模块时会按 Config.DATABASE_PATH 创建连接池，指向被检查的数据库
+    Config.DATABASE_PATH = db_path
+    queries = hot_queries()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, (sql, params) in queries.items():
+            allowed = INTENTIONAL_SCANS.get(name, {})
+            print(f"{name}:")
+            for detail in explain(conn, sql, params):
+                marker = "❌" if is_full_scan(detail, allowed) else "  "
+                reason = f"  （{allowed[detail]}）" if detail in allowed else ""
+                print(f"  {marker} {detail}{reason}")
+        failures = check_query_plans(conn, queries)
+    finally:
+        conn.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} 条热点查询使用了全表扫描: {', '.join(failures)}")
+        return 1
+    print(f"\n✅ {len(queries)} 条热点查询均使用索引查找（或已登记的顺序读取）")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
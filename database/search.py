@@ -0,0 +1,98 @@
+"""项目全文检索索引 projects_fts 的维护与查询
+
+projects_fts 是 FTS5 虚表（trigram 分词，适合中文子串匹配），rowid 与 projects.id 相同，
+收录项目编号、名称、甲方名称、报告号以及项目负责人/市场部负责人的真实姓名。
+由 projects 和 users 上的触发器保持同步（见迁移 0005_project_search）。
+
+trigram 分词要求每个检索词至少 3 个字符，更短的检索词（如两个字的姓名）
+对 projects_fts 的各列做 LIKE 匹配。
+"""
+import html
+
+TRIGRAM_MIN_LENGTH = 3
+
+# 负责人真实姓名（{row} 为 NEW 或表别名）
+LEADER_NAMES_SQL = (
+    "(SELECT group_concat(realname, ' ') FROM users "
+    "WHERE username IN ({row}.project_leader, {row}.market_leader))"
+)
+
+# 高亮标记先用控制字符占位，转义 HTML 后再替换为 <mark>
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+HIGHLIGHT_COLUMNS = f"""
+    highlight(projects_fts, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}') AS project_no_highlight,
+    highlight(projects_fts, 1, '{_MARK_OPEN}', '{_MARK_CLOSE}') AS name_highlight,
+    highlight(projects_fts, 2, '{_MARK_OPEN}', '{_MARK_CLOSE}') AS client_name_highlight,
+    snippet(projects_fts, -1, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 12) AS search_snippet
+"""
+
+# 检索时的 FROM 子句与相关度排序（项目编号权重最高，其次是名称/甲方、报告号、负责人）
+SEARCH_FROM = " FROM projects_fts JOIN projects p ON p.id = projects_fts.rowid"
+RANK_ORDER = " ORDER BY bm25(projects_fts, 10.0, 5.0, 5.0, 3.0, 2.0), p.create_date DESC, p.id DESC"
+
+# 短检索词的 LIKE 条件（参数为同一个 %词% 重复 5 次）
+LIKE_CONDITION = (
+    " AND (projects_fts.project_no LIKE ? OR projects_fts.name LIKE ? OR projects_fts.client_name LIKE ?"
+    " OR projects_fts.report_numbers LIKE ? OR projects_fts.leader_names LIKE ?)"
+)
+
+def build_match_query(search):
+    """把搜索框输入转换为 FTS5 MATCH 表达式；含过短的检索词时返回 None"""
+    terms = (search or "").split()
+    if not terms or any(len(term) < TRIGRAM_MIN_LENGTH for term in terms):
+        return None
+    # 每个词作为短语（转义双引号），多个词之间为 AND
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def project_filters(search=None, status=None, year=None, where=" WHERE 1=1", params=()):
+    """项目列表（管理员、用户项目页）的筛选条件，返回 (from_clause, where, params, match)
+
+    where / params 为已有的条件；检索词足够长时使用全文索引（match 不为空，按相关度排序），否则对索引各列做 LIKE。
+    """
+    params = list(params)
+    from_clause = " FROM projects p"
+    match = build_match_query(search)
+    if match:
+        from_clause = SEARCH_FROM
+        where += " AND projects_fts MATCH ?"
+        params.append(match)
+    elif search and search.strip():
+        from_clause = SEARCH_FROM
+        where += LIKE_CONDITION
+        params.extend([f"%{search.strip()}%"] * 5)
+    
+    # 状态筛选
+    if status and status != 'all':
+        where += " AND p.status = ?"
+        params.append(status)
+    
+    # 年份筛选
+    if year and year.strip():
+        where += " AND strftime('%Y', p.start_date) = ?"
+        params.append(year)
+    return from_clause, where, params, match
+
+def ranked_search_query(from_clause, where, params, limit, offset):
+    """全文检索的一页：带高亮列，按相关度排序，只支持页码翻页；返回 (sql, params)"""
+    return (f"SELECT p.*, {HIGHLIGHT_COLUMNS}" + from_clause + where + RANK_ORDER + " LIMIT ? OFFSET ?",
+            list(params) + [limit, offset])
+
+def render_highlights(project):
+    """转义高亮字段中的 HTML，并把占位符替换为 <mark> 标签"""
+    for key in ("project_no_highlight", "name_highlight", "client_name_highlight", "search_snippet"):
+        value = project.get(key)
+        if value:
+            project[key] = (html.escape(value)
+                            .replace(_MARK_OPEN, "<mark>")
+                            .replace(_MARK_CLOSE, "</mark>"))
+    return project
+
+def rebuild_project_search(conn):
+    """全量重建 projects_fts"""
+    conn.execute("DELETE FROM projects_fts")
+    conn.execute(f"""
+        INSERT INTO projects_fts (rowid, project_no, name, client_name, report_numbers, leader_names)
+        SELECT p.id, p.project_no, p.name, p.client_name, p.report_numbers, {LEADER_NAMES_SQL.format(row="p")}
+        FROM projects p
+    """)
@@ -0,0 +1,224 @@
+"""用户 Dashboard 统计的物化表 user_stats
+
+每个用户一行，保存按项目状态分列的“负责的项目数”“参与的项目数”，
+以及创建/复核/签字的报告数。计数由 projects、user_project_roles、reports、
+report_participants 上的触发器增量维护，业务代码的写入路径无需额外处理；
+/user_dashboard 只需按主键读取一行。
+
+全部计数为 0 的行不影响结果，重建时不会生成，一致性检查也会忽略。
+
+用法（从零重算）：
+    python -m database.user_stats [db_path]
+"""
+import sys
+import sqlite3
+
+PROJECT_STATUSES = ["active", "completed", "paused", "cancelled"]
+REPORT_COLUMNS = ["created_reports", "reviewed_reports", "signed_reports"]
+STATUS_COLUMNS = [f"{kind}_{status}" for kind in ("responsible", "participated") for status in PROJECT_STATUSES]
+COUNTER_COLUMNS = STATUS_COLUMNS + REPORT_COLUMNS
+
+# 一致性检查用的快照（忽略全 0 的行）
+SNAPSHOT_SQL = f"SELECT * FROM user_stats WHERE {' + '.join(COUNTER_COLUMNS)} > 0"
+
+def _status_deltas(kind, *changes):
+    """生成 SET 子句：changes 为 (状态表达式, 增量)，对应状态列加上增量"""
+    assignments = []
+    for status in PROJECT_STATUSES:
+        column = f"{kind}_{status}"
+        terms = " ".join(
+            f"{'+' if delta > 0 else '-'} (CASE WHEN {expr} = '{status}' THEN {abs(delta)} ELSE 0 END)"
+            for expr, delta in changes
+        )
+        assignments.append(f"{column} = {column} {terms}")
+    return ", ".join(assignments)
+
+def _report_delta(role_expr, delta):
+    sign = "+" if delta > 0 else "-"
+    return (f"reviewed_reports = reviewed_reports {sign} ({role_expr} = 'reviewer'), "
+            f"signed_reports = signed_reports {sign} ({role_expr} = 'signer')")
+
+def _ensure_row(username_expr):
+    return (f"INSERT OR IGNORE INTO user_stats (username) "
+            f"SELECT {username_expr} WHERE {username_expr} IS NOT NULL AND {username_expr} != '';")
+
+_PROJECT_STATUS = "(SELECT status FROM projects WHERE id = {row}.project_id)"
+
+# 触发器中的查找（{row} 为 NEW 或 OLD），database/query_plan.py 检查它们的执行计划
+PROJECT_MEMBERS_SQL = "SELECT username FROM user_project_roles WHERE project_id = {row}.id"
+OTHER_PROJECT_ROLE_SQL = """
+        SELECT 1 FROM user_project_roles
+        WHERE username = {row}.username AND project_id = {row}.project_id AND role != {row}.role
+"""
+OTHER_PARTICIPANT_SLOT_SQL = """
+        SELECT 1 FROM report_participants
+        WHERE username = {row}.username AND role = {row}.role AND report_id = {row}.report_id AND slot != {row}.slot
+"""
+
+USER_STATS_ROW_SQL = f"SELECT {', '.join(COUNTER_COLUMNS)} FROM user_stats WHERE username = ?"
+
+USER_STATS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS user_stats (
+        username TEXT PRIMARY KEY,
+        {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in COUNTER_COLUMNS)}
+    ) WITHOUT ROWID
+    """,
+
+    # 负责的项目：projects.project_leader + status
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_user_stats_insert AFTER INSERT ON projects
+    BEGIN
+        {_ensure_row("NEW.project_leader")}
+        UPDATE user_stats SET {_status_deltas("responsible", ("NEW.status", 1))}
+        WHERE username = NEW.project_leader;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_user_stats_update AFTER UPDATE OF project_leader, status ON projects
+    BEGIN
+        UPDATE user_stats SET {_status_deltas("responsible", ("OLD.status", -1))}
+        WHERE username = OLD.project_leader;
+        {_ensure_row("NEW.project_leader")}
+        UPDATE user_stats SET {_status_deltas("responsible", ("NEW.status", 1))}
+        WHERE username = NEW.project_leader;
+        UPDATE user_stats SET {_status_deltas("participated", ("OLD.status", -1), ("NEW.status", 1))}
+        WHERE OLD.status IS NOT NEW.status
+          AND username IN ({PROJECT_MEMBERS_SQL.format(row="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_user_stats_delete AFTER DELETE ON projects
+    BEGIN
+        UPDATE user_stats SET {_status_deltas("responsible", ("OLD.status", -1))}
+        WHERE username = OLD.project_leader;
+        UPDATE user_stats SET {_status_deltas("participated", ("OLD.status", -1))}
+        WHERE username IN ({PROJECT_MEMBERS_SQL.format(row="OLD")});
+    END
+    """,
+
+    # 参与的项目：同一用户在同一项目的第一个角色 +1，最后一个角色删除时 -1
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_project_roles_user_stats_insert AFTER INSERT ON user_project_roles
+    WHEN NOT EXISTS ({OTHER_PROJECT_ROLE_SQL.format(row="NEW")}    )
+    BEGIN
+        {_ensure_row("NEW.username")}
+        UPDATE user_stats SET {_status_deltas("participated", (_PROJECT_STATUS.format(row="NEW"), 1))}
+        WHERE username = NEW.username;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_project_roles_user_stats_delete AFTER DELETE ON user_project_roles
+    WHEN NOT EXISTS (
+        SELECT 1 FROM user_project_roles WHERE username = OLD.username AND project_id = OLD.project_id
+    )
+    BEGIN
+        UPDATE user_stats SET {_status_deltas("participated", (_PROJECT_STATUS.format(row="OLD"), -1))}
+        WHERE username = OLD.username;
+    END
+    """,
+
+    # 创建的报告：reports.creator
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_user_stats_insert AFTER INSERT ON reports
+    BEGIN
+        {_ensure_row("NEW.creator")}
+        UPDATE user_stats SET created_reports = created_reports + 1 WHERE username = NEW.creator;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS reports_user_stats_update AFTER UPDATE OF creator ON reports
+    BEGIN
+        UPDATE user_stats SET created_reports = created_reports - 1 WHERE username = OLD.creator;
+        {_ensure_row("NEW.creator")}
+        UPDATE user_stats SET created_reports = created_reports + 1 WHERE username = NEW.creator;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reports_user_stats_delete AFTER DELETE ON reports
+    BEGIN
+        UPDATE user_stats SET created_reports = created_reports - 1 WHERE username = OLD.creator;
+    END
+    """,
+
+    # 复核/签字的报告：同一报告同一角色占多个槽位时只计一次
+    f"""
+    CREATE TRIGGER IF NOT EXISTS report_participants_user_stats_insert AFTER INSERT ON report_participants
+    WHEN NOT EXISTS ({OTHER_PARTICIPANT_SLOT_SQL.format(row="NEW")}    )
+    BEGIN
+        {_ensure_row("NEW.username")}
+        UPDATE user_stats SET {_report_delta("NEW.role", 1)} WHERE username = NEW.username;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS report_participants_user_stats_delete AFTER DELETE ON report_participants
+    WHEN NOT EXISTS (
+        SELECT 1 FROM report_participants
+        WHERE username = OLD.username AND role = OLD.role AND report_id = OLD.report_id
+    )
+    BEGIN
+        UPDATE user_stats SET {_report_delta("OLD.role", -1)} WHERE username = OLD.username;
+    END
+    """,
+]
+
+def rebuild_user_stats(conn):
+    """从 projects / user_project_roles / reports / report_participants 全量重算 user_stats"""
+    status_sums = ", ".join(
+        f"SUM(CASE WHEN {kind}_status = '{status}' THEN 1 ELSE 0 END)"
+        for kind in ("responsible", "participated") for status in PROJECT_STATUSES
+    )
+    conn.execute("DELETE FROM user_stats")
+    conn.execute(f"""
+        INSERT INTO user_stats (username, {", ".join(COUNTER_COLUMNS)})
+        SELECT username, {status_sums}, SUM(created), SUM(reviewed), SUM(signed)
+        FROM (
+            SELECT project_leader AS username, status AS responsible_status, NULL AS participated_status,
+                   0 AS created, 0 AS reviewed, 0 AS signed
+            FROM projects WHERE project_leader IS NOT NULL AND project_leader != ''
+            UNION ALL
+            SELECT upr.username, NULL, p.status, 0, 0, 0
+            FROM (SELECT DISTINCT username, project_id FROM user_project_roles) upr
+            JOIN projects p ON p.id = upr.project_id
+            UNION ALL
+            SELECT creator, NULL, NULL, 1, 0, 0
+            FROM reports WHERE creator IS NOT NULL AND creator != ''
+            UNION ALL
+            SELECT username, NULL, NULL, 0, role = 'reviewer', role = 'signer'
+            FROM (SELECT DISTINCT username, report_id, role FROM report_participants)
+        )
+        GROUP BY username
+    """)
+
+def get_user_stats(conn, username):
+    """读取单个用户的统计，返回 Dashboard 使用的结构（没有记录时全部为 0）"""
+    row = conn.execute(USER_STATS_ROW_SQL, (username,)).fetchone()
+    values = dict(zip(COUNTER_COLUMNS, row or [0] * len(COUNTER_COLUMNS)))
+    stats = {
+        kind + "_projects": {status: values[f"{kind}_{status}"] for status in PROJECT_STATUSES}
+        for kind in ("responsible", "participated")
+    }
+    stats.update({column: values[column] for column in REPORT_COLUMNS})
+    return stats
+
+def main(argv=None):
+    from config import Config
+    from database import migrate
+
+    argv = sys.argv[1:] if argv is None else argv
+    db_path = argv[0] if argv else Config.DATABASE_PATH
+    conn = sqlite3.connect(db_path)
+    try:
+        if migrate.get_current_version(conn) < migrate.latest_version():
+            print("❌ 数据库不是最新版本，请先运行 python -m database.migrate upgrade")
+            return 1
+        with conn:
+            rebuild_user_stats(conn)
+        count = conn.execute(f"SELECT COUNT(*) FROM ({SNAPSHOT_SQL})").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"✅ user_stats 已重建，共 {count} 个用户有统计数据")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,42 @@
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse
-from starlette.middleware.sessions import SessionMiddleware
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse, Response
 from database.database import db_manager
+from database.async_db import async_db, db_executor, checkout_executor
+from database.instrumentation import QueryTrackingMiddleware, query_stats
+from utils.loop_monitor import loop_lag_monitor
+from utils.metrics import MetricsMiddleware, registry, render_metrics
+from utils.templating import precompile_templates, render_summary
+from utils.compression import CompressionMiddleware, PrecompressedStaticFiles
+from utils.assets import assets
+from services.user_directory import user_directory
+from auth.auth import metrics_access
 from routes import auth_routes, project_routes, report_routes, user_routes
+import os
+import logging
 import uvicorn
 import config
 
+# 应用日志（SQL 预算、指标采集失败等警告）；访问日志由 uvicorn 输出
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 app = FastAPI(
     title="项目管理系统",
     description="基于 FastAPI 的项目管理系统",
     version="1.0.0"
 )
 
-# 添加会话中间件
-app.add_middleware(SessionMiddleware, secret_key=config.Config.SECRET_KEY)
+# SQL 统计中间件：每个请求的语句数和 DB 耗时，超出预算时告警
+if config.Config.SQL_INSTRUMENTATION:
+    app.add_middleware(QueryTrackingMiddleware)
+
+# 响应压缩（gzip / brotli），指标中记录的是压缩后的大小
+app.add_middleware(CompressionMiddleware)
 
-# 挂载静态文件和模板
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+# 请求指标中间件（最外层，耗时包含其他中间件）
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+# 挂载静态文件，优先发送预压缩的 .br / .gz 文件（python -m utils.compression 生成）
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 # 全局异常处理
 @app.exception_handler(404)
@@ -46,19 +63,83 @@ app.include_router(user_routes.router)
 # 健康检查端点
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "服务运行正常"}
+    return {
+        "status": "healthy",
+        "message": "服务运行正常",
+        "loop_lag": loop_lag_monitor.stats()
+    }
+
+# 抓取时读取的指标：连接池、SQL 汇总、事件循环延迟
+def _pool_stat(key):
+    return lambda: db_manager.pool_stats()[key]
+
+def _pool_stats_by_kind(template):
+    def collect():
+        stats = db_manager.pool_stats()
+        return {(kind,): stats[template.format(kind=kind)] for kind in ("reader", "writer")}
+    return collect
+
+registry.callback("db_pool_checkouts_total", "取出连接的次数", "counter",
+                  _pool_stats_by_kind("{kind}_checkouts"), ("kind",))
+registry.callback("db_pool_wait_seconds_total", "等待连接的总时间", "counter",
+                  _pool_stats_by_kind("{kind}_wait_seconds"), ("kind",))
+registry.callback("db_pool_connections_in_use", "正在使用的连接数", "gauge",
+                  lambda: {("reader",): db_manager.pool_stats()["readers_in_use"],
+                           ("writer",): db_manager.pool_stats()["writer_in_use"]}, ("kind",))
+registry.callback("db_pool_max_wait_seconds", "等待连接的最长时间", "gauge", _pool_stat("max_wait_seconds"))
+registry.callback("db_pool_timeouts_total", "等待连接超时的次数", "counter", _pool_stat("timeouts"))
+registry.callback("db_pool_readers_open", "已创建的只读连接数", "gauge", _pool_stat("readers_open"))
+registry.callback("db_pool_readers_idle", "空闲的只读连接数", "gauge", _pool_stat("readers_idle"))
+registry.callback("db_pool_size", "只读连接池大小", "gauge", _pool_stat("pool_size"))
+registry.callback("db_queries_total", "按调用方统计的 SQL 语句数", "counter",
+                  lambda: {(caller,): count for caller, (count, _) in query_stats.by_caller().items()}, ("caller",))
+registry.callback("db_query_seconds_total", "按调用方统计的 SQL 耗时", "counter",
+                  lambda: {(caller,): seconds for caller, (_, seconds) in query_stats.by_caller().items()}, ("caller",))
+registry.callback("db_slow_queries_total", "慢查询条数", "counter", lambda: query_stats.slow_queries)
+registry.callback("event_loop_lag_max_seconds", "事件循环最大延迟", "gauge", lambda: loop_lag_monitor.max_lag)
+registry.callback("event_loop_lag_seconds", "事件循环最近一次延迟", "gauge", lambda: loop_lag_monitor.last_lag)
+
+# Prometheus 抓取端点（公网可达，需要令牌或管理员登录）
+@app.get("/metrics", dependencies=[Depends(metrics_access)])
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # 应用关闭时关闭数据库连接
 @app.on_event("shutdown")
-def shutdown_event():
-    db_manager.close_connection()
-    print("🗄️ 数据库连接已关闭")
+async def shutdown_event():
+    await loop_lag_monitor.stop()
+    checkout_executor.shutdown(wait=True)
+    db_executor.shutdown(wait=True)
+    db_manager.close_all()
+    print("🗄️ 数据库连接池已关闭")
+    if config.Config.DEBUG and config.Config.SQL_INSTRUMENTATION:
+        print(f"📊 SQL 总耗时排行（慢查询 {query_stats.slow_queries} 条）：")
+        for item in query_stats.top(10):
+            print(f"  {item['total_ms']:>9.1f} ms  {item['count']:>5} 次  {item['caller']}  {item['sql'][:120]}")
+        print("📊 模板渲染耗时：")
+        for name, count, avg_ms in render_summary():
+            print(f"  {avg_ms:>9.2f} ms  {count:>5} 次  {name}")
 
 # 应用启动事件
 @app.on_event("startup")
 async def startup_event():
+    loop_lag_monitor.start()
+    # 构建带指纹的页面脚本和样式（已是最新时只校验）
+    bundles = assets.build()
+    # 预编译全部模板（读取或生成字节码缓存）
+    timings = precompile_templates()
+    # 预热用户目录缓存
+    async with async_db.connection(readonly=True) as adb:
+        users = await adb.run(user_directory.load)
     print("🚀 项目管理系统启动成功")
     print("📊 数据库初始化完成")
+    print(f"👥 用户目录已加载 {len(users)} 个用户")
+    print(f"🧩 已预编译 {len(timings)} 个模板，耗时 {sum(timings.values()):.0f} ms")
+    print(f"📦 已构建 {len(bundles)} 个静态资源（{config.Config.ASSET_BUILD_DIR}）")
+    if config.Config.ASSET_AUTORELOAD:
+        print("🔧 ASSET_AUTORELOAD 已开启：源文件修改后自动重新构建（仅用于开发）")
+    if not os.environ.get("SECRET_KEY"):
+        print(f"🔧 未设置环境变量 SECRET_KEY，使用 {config.SECRET_KEY_FILE} 中的随机密钥（多台机器部署时须设置相同的 SECRET_KEY）")
 
 if __name__ == "__main__":
     uvicorn.run(
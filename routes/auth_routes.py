@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
-from database.database import db_manager, get_db
+from utils.templating import templates
+from database.database import db_manager, get_read_db
 import sqlite3
-from auth.auth import create_session, verify_user_credentials, delete_session
+from auth.auth import create_session, verify_user_credentials
+from auth.sessions import SESSION_COOKIE
+from config import Config
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -21,14 +22,15 @@ async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: sqlite3.Connection = Depends(get_db)
+    db: sqlite3.Connection = Depends(get_read_db)
 ):
     user = verify_user_credentials(username, password, db)
     
     if user:
-        session_id = create_session(username, user[3])
+        token = create_session(username, user["user_type"], user["session_version"])
         response = RedirectResponse(url="/user_dashboard", status_code=303)  # 修改这里
-        response.set_cookie(key="session_id", value=session_id, httponly=True)
+        response.set_cookie(key=SESSION_COOKIE, value=token, max_age=Config.SESSION_MAX_AGE,
+                            httponly=True, samesite="lax")
         return response
     else:
         return templates.TemplateResponse("login.html", {
@@ -38,10 +40,7 @@ async def login(
 
 @router.get("/logout")
 async def logout(request: Request):
-    session_id = request.cookies.get("session_id")
-    if session_id:
-        delete_session(session_id)
-    
+    # 会话不保存在服务端，删除 cookie 即可
     response = RedirectResponse(url="/", status_code=303)
-    response.delete_cookie("session_id")
+    response.delete_cookie(SESSION_COOKIE)
     return response
\ No newline at end of file
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Request, Query, Form, Depends, HTTPException, File, UploadFile
 from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
+from utils.templating import stream_template
 from database.database import db_manager, get_db
+from database.async_db import WriteSession, get_write_session
 from auth.auth import login_required
-from services.project_service import ProjectService
+from services.project_service import ProjectService, PROJECT_YEARS_SQL
+from services.export_service import export_service
 import sqlite3
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 project_service = ProjectService()
 
 def admin_required(user: dict = Depends(login_required)):
@@ -46,19 +47,14 @@ async def admin(
             
             # 获取所有项目的年份列表（用于年份筛选器）
             c = db.cursor()
-            c.execute("""
-                SELECT DISTINCT strftime('%Y', start_date) as year 
-                FROM projects 
-                WHERE start_date IS NOT NULL AND start_date != ''
-                ORDER BY year DESC
-            """)
+            c.execute(PROJECT_YEARS_SQL)
             years = [row[0] for row in c.fetchall()]
             
             # 计算显示范围
             start_item = ((project_data["current_page"] - 1) * project_data["page_size"]) + 1
             end_item = min(project_data["current_page"] * project_data["page_size"], project_data["total_count"])
             
-            return templates.TemplateResponse("admin_projects.html", {
+            return stream_template("admin_projects.html", {
                 "request": request,
                 "user": user,
                 "projects": project_data["projects"],
@@ -89,6 +85,8 @@ async def get_admin_projects_api(
     search: str = Query(None),
     status: str = Query("all"),
     year: str = Query(None),
+    cursor: str = Query(None),
+    with_count: bool = Query(True),
     user: dict = Depends(admin_required),
     db: sqlite3.Connection = Depends(get_db)
 ):
@@ -100,6 +98,8 @@ async def get_admin_projects_api(
             search=search,
             status=status,
             year=year,
+            cursor=cursor,
+            with_count=with_count,
             db=db
         )
         
@@ -149,6 +149,14 @@ async def project_info(
 ):
     return await project_service.get_project_info(request, project_no, user, db)
 
+@router.get("/project/{project_no}/export.zip")
+async def export_project(
+    project_no: str,
+    user: dict = Depends(login_required)
+):
+    """打包下载项目的合同文件、报告文件和清单（不通过 get_db 取连接，避免下载期间一直占用）"""
+    return await export_service.export_project(project_no, user)
+
 @router.post("/project/{project_no}/cancel")
 async def cancel_project(
     project_no: str,
@@ -198,7 +206,7 @@ async def add_contract_files(
     project_no: str,
     contract_files: list[UploadFile] = File(...),
     user: dict = Depends(login_required),
-    db: sqlite3.Connection = Depends(get_db)
+    db: WriteSession = Depends(get_write_session)
 ):
     print("add contract router")
     return await project_service.add_contract_files(project_no, request, user, db)
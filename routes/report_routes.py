@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Request, Form, File, UploadFile, Depends, HTTPException
 from fastapi.responses import RedirectResponse
 from database.database import db_manager, get_db
+from database.async_db import WriteSession, get_write_session
 from auth.auth import login_required
 from services.report_service import ReportService
 import sqlite3
@@ -19,7 +20,7 @@ async def update_report(
     signer2: str = Form(None),
     report_files: list[UploadFile] = File([]),
     user: dict = Depends(login_required),
-    db: sqlite3.Connection = Depends(get_db)
+    db: WriteSession = Depends(get_write_session)
 ):
     return await report_service.update_report(
         project_no, report_no, reviewer1, reviewer2, reviewer3,
@@ -1,16 +1,22 @@
 from fastapi import APIRouter, Request, Query, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from utils.templating import templates, stream_template
 from database.database import db_manager, get_db
-from auth.auth import login_required
+from database.async_db import WriteSession, get_write_session
+from auth.auth import login_required, create_session
+from auth.sessions import SESSION_COOKIE
+from config import Config
 from datetime import datetime
+import os
 import sqlite3
 from fastapi import UploadFile, File
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 from services.user_service import user_service
+from services.download_service import download_service
+from utils.uploads import stage_upload, store_staged, discard_staged
+from database.blobs import remove_files
 
 @router.get("/user_dashboard", response_class=HTMLResponse)
 async def user_dashboard(
@@ -20,7 +26,7 @@ async def user_dashboard(
 ):
     """用户首页 - Dashboard"""
     data = await user_service.get_user_dashboard_data(request, user, db)
-    return templates.TemplateResponse("user_dashboard.html", {
+    return stream_template("user_dashboard.html", {
         "request": request,
         "user": user,
         "dashboard_data": data
@@ -35,7 +41,7 @@ async def user_projects(
 ):
     """用户项目页面"""
     projects = await user_service.get_user_projects_data(request, user, type, db)
-    return templates.TemplateResponse("user_projects.html", {
+    return stream_template("user_projects.html", {
         "request": request,
         "user": user,
         "projects": projects,
@@ -178,7 +184,11 @@ async def change_password(
         }
         
         result = await user_service.change_password(user["username"], password_data, db)
-        return JSONResponse({"success": True, "message": result["message"]})
+        response = JSONResponse({"success": True, "message": result["message"]})
+        # 旧令牌已随会话版本失效，为当前浏览器签发新令牌，其他设备需要重新登录
+        response.set_cookie(key=SESSION_COOKIE, value=create_session(user["username"], user["user_type"], result["session_version"]),
+                            max_age=Config.SESSION_MAX_AGE, httponly=True, samesite="lax")
+        return response
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)}, status_code=400)\
 
@@ -197,9 +207,10 @@ async def user_manager(
         # 获取所有用户信息
         users = await user_service.get_all_users(db)
         
-        # 为每个用户获取资质信息
+        # 一次查询获取所有用户的资质信息
+        qualifications = await user_service.get_users_qualifications([u["username"] for u in users], db)
         for user_item in users:
-            user_item["qualifications"] = await user_service.get_user_qualifications(user_item["username"], db)
+            user_item["qualifications"] = qualifications[user_item["username"]]
         
         return templates.TemplateResponse("user_manager.html", {
             "request": request,
@@ -536,7 +547,7 @@ async def company_qualifications(
             "error": str(e)
         })
 
-@router.get("/company_qualifications/download/{qualification_id}")
+@router.api_route("/company_qualifications/download/{qualification_id}", methods=["GET", "HEAD"])
 async def download_company_qualification(
     request: Request,
     qualification_id: int,
@@ -548,7 +559,7 @@ async def download_company_qualification(
     try:
         c = db.cursor()
         c.execute("""
-            SELECT file_path, file_name 
+            SELECT file_path, file_name, sha256
             FROM company_qualifications 
             WHERE id = ? AND status = 'active'
         """, (qualification_id,))
@@ -560,52 +571,22 @@ async def download_company_qualification(
         file_path = result[0]
         file_name = result[1]
         
-        # 检查文件是否存在
-        import os
-        if not os.path.exists(file_path):
-            # 尝试在静态目录下查找
+        # 旧数据的文件可能只保存在静态目录下
+        if not result[2] and not os.path.exists(file_path):
             static_path = os.path.join("static", "uploads", "company_qualifications", os.path.basename(file_path))
             if os.path.exists(static_path):
                 file_path = static_path
-            else:
-                raise HTTPException(status_code=404, detail="文件不存在")
-        
-        # 获取文件扩展名
-        ext = os.path.splitext(file_name)[1].lower()
-        
-        # 设置响应头
-        from fastapi.responses import FileResponse
-        
-        # 方法：不设置文件名，让浏览器根据URL决定
-        # 只设置预览或下载模式
-        if preview:
-            content_disposition = 'inline'
-        else:
-            content_disposition = 'attachment'
-        
-        # 设置媒体类型
-        media_types = {
-            '.pdf': 'application/pdf',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.bmp': 'image/bmp'
-        }
         
-        media_type = media_types.get(ext, 'application/octet-stream')
+        # 资质名称通常不含扩展名，补上存储文件的扩展名以确定类型和下载文件名
+        if not os.path.splitext(file_name)[1]:
+            file_name += os.path.splitext(file_path)[1]
         
-        # 返回文件响应，不设置filename参数
-        response = FileResponse(
-            path=file_path,
-            media_type=media_type
+        # 预览时在浏览器内打开，否则下载
+        return download_service.file_response(
+            request, file_path, file_name, sha256=result[2],
+            disposition="inline" if preview else "attachment"
         )
         
-        # 只设置基本的Content-Disposition
-        response.headers['Content-Disposition'] = content_disposition
-        
-        return response
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -619,38 +600,29 @@ async def admin_add_company_qualification(
     certificate_file: UploadFile = File(...),
     file_name: str = Form(...),
     user: dict = Depends(login_required),
-    db: sqlite3.Connection = Depends(get_db)
+    db: WriteSession = Depends(get_write_session)
 ):
     """管理员添加公司资质（支持文件上传）"""
     if user.get("user_type") != "admin":
         return JSONResponse({"success": False, "message": "权限不足"}, status_code=403)
     
     try:
-        # 创建上传目录
-        import os
-        upload_dir = "static/uploads/company_qualifications"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # 生成文件路径
-        file_extension = certificate_file.filename.split('.')[-1]
-        safe_filename = f"{certificate_file.filename.replace(' ', '_')}.{file_extension}"
-        file_path = f"{upload_dir}/{safe_filename}"
-        
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            content = await certificate_file.read()
-            buffer.write(content)
-        
-        qualification_data = {
-            "category": category,
-            "owner": owner,
-            "file_path": file_path,
-            "file_name": file_name,
-            "uploader_username": user["username"]
-        }
-        
-        result = await user_service.add_company_qualification(qualification_data, db)
-        return JSONResponse({"success": True, "message": result["message"]})
+        # 文件先写入临时目录（校验类型和大小、计算哈希），这期间不占用写连接
+        staged = await stage_upload(certificate_file)
+        try:
+            await db.acquire()
+            qualification_data = {
+                "category": category,
+                "owner": owner,
+                "file_name": file_name,
+                "uploader_username": user["username"]
+            }
+            
+            # 名称检查通过后才放入按内容寻址的存储
+            result = await user_service.add_company_qualification(qualification_data, staged, db)
+            return JSONResponse({"success": True, "message": result["message"]})
+        finally:
+            discard_staged([staged])
     except HTTPException as e:
         return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     except Exception as e:
@@ -711,7 +683,7 @@ async def report_templates(
             "error": str(e)
         })
 
-@router.get("/report_templates/download/{template_id}")
+@router.api_route("/report_templates/download/{template_id}", methods=["GET", "HEAD"])
 async def download_report_template(
     request: Request,
     template_id: int,
@@ -722,7 +694,7 @@ async def download_report_template(
     try:
         c = db.cursor()
         c.execute("""
-            SELECT file_path, file_name 
+            SELECT file_path, file_name, sha256
             FROM report_templates 
             WHERE id = ? AND status = 'active'
         """, (template_id,))
@@ -731,21 +703,7 @@ async def download_report_template(
         if not result:
             raise HTTPException(status_code=404, detail="模板文件不存在")
         
-        file_path = result[0]
-        file_name = result[1]
-        
-        # 检查文件是否存在
-        import os
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="文件不存在")
-        
-        # 返回文件流
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=file_path,
-            filename=file_name,
-            media_type='application/octet-stream'
-        )
+        return download_service.file_response(request, result[0], result[1], sha256=result[2])
         
     except HTTPException:
         raise
@@ -759,50 +717,44 @@ async def admin_add_report_template(
     owner: str = Form(None),
     template_file: UploadFile = File(...),
     user: dict = Depends(login_required),
-    db: sqlite3.Connection = Depends(get_db)
+    db: WriteSession = Depends(get_write_session)
 ):
     """管理员添加报告模板"""
     if user.get("user_type") != "admin":
         return JSONResponse({"success": False, "message": "权限不足"}, status_code=403)
     
     try:
-        # 创建上传目录
-        import os
-        upload_dir = "static/uploads/report_templates"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # 生成安全文件名
-        import time
-        safe_filename = f"{int(time.time())}_{template_file.filename.replace(' ', '_')}"
-        file_path = f"{upload_dir}/{safe_filename}"
-        
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            content = await template_file.read()
-            buffer.write(content)
-        
-        # 获取文件大小
-        file_size = os.path.getsize(file_path)
-        
-        # 插入数据库
-        c = db.cursor()
-        c.execute("""
-            INSERT INTO report_templates 
-            (category, owner, file_path, file_name, 
-             uploader_username, uploader_realname, file_size)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            category,
-            owner,
-            file_path,
-            template_file.filename,  # 使用原始文件名
-            user["username"],
-            user.get("realname", user["username"]),
-            file_size
-        ))
-        db.commit()
-        
-        return JSONResponse({"success": True, "message": "报告模板添加成功"})
+        # 文件先写入临时目录（校验类型和大小、计算哈希），这期间不占用写连接
+        staged = await stage_upload(template_file)
+        try:
+            await db.acquire()
+            # 放入按内容寻址的存储，相同文件只保存一份
+            saved = store_staged(staged, "report_template", db)
+            
+            # 插入数据库
+            c = db.cursor()
+            c.execute("""
+                INSERT INTO report_templates 
+                (category, owner, file_path, file_name, 
+                 uploader_username, uploader_realname, file_size, sha256)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                category,
+                owner,
+                saved.path,
+                template_file.filename,  # 使用原始文件名
+                user["username"],
+                user.get("realname", user["username"]),
+                saved.size,
+                saved.sha256
+            ))
+            db.commit()
+            
+            return JSONResponse({"success": True, "message": "报告模板添加成功"})
+        finally:
+            discard_staged([staged])
+    except HTTPException as e:
+        return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
@@ -821,27 +773,17 @@ async def admin_delete_report_template(
         c = db.cursor()
         
         # 检查模板是否存在
-        c.execute("SELECT file_name, file_path FROM report_templates WHERE id = ?", (template_id,))
+        c.execute("SELECT file_name, file_path, sha256 FROM report_templates WHERE id = ?", (template_id,))
         template = c.fetchone()
         if not template:
             return JSONResponse({"success": False, "message": "模板不存在"}, status_code=404)
         
         file_name = template[0]
-        file_path = template[1]
-        
-        # 硬删除：先删除物理文件，再删除数据库记录
-        import os
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as file_error:
-                print(f"删除文件失败: {str(file_error)}")
-                # 可以选择继续删除数据库记录，或者返回错误信息
-                # return JSONResponse({"success": False, "message": f"删除文件失败: {str(file_error)}"}, status_code=500)
         
-        # 删除数据库记录（硬删除）
+        # 硬删除：先删除数据库记录，提交后再删除物理文件（其他记录仍引用同一内容时保留）
         c.execute("DELETE FROM report_templates WHERE id = ?", (template_id,))
         db.commit()
+        remove_files(db, [(template[1], template[2])])
         
         return JSONResponse({"success": True, "message": f"报告模板 '{file_name}' 已删除"})
     except Exception as e:
@@ -879,7 +821,7 @@ async def evaluation_standards(
             "error": str(e)
         })
 
-@router.get("/evaluation_standards/download/{standard_id}")
+@router.api_route("/evaluation_standards/download/{standard_id}", methods=["GET", "HEAD"])
 async def download_evaluation_standard(
     request: Request,
     standard_id: int,
@@ -890,7 +832,7 @@ async def download_evaluation_standard(
     try:
         c = db.cursor()
         c.execute("""
-            SELECT file_path, file_name 
+            SELECT file_path, file_name, sha256
             FROM evaluation_standards 
             WHERE id = ? AND status = 'active'
         """, (standard_id,))
@@ -899,21 +841,7 @@ async def download_evaluation_standard(
         if not result:
             raise HTTPException(status_code=404, detail="准则文件不存在")
         
-        file_path = result[0]
-        file_name = result[1]
-        
-        # 检查文件是否存在
-        import os
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="文件不存在")
-        
-        # 返回文件流
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=file_path,
-            filename=file_name,
-            media_type='application/octet-stream'
-        )
+        return download_service.file_response(request, result[0], result[1], sha256=result[2])
         
     except HTTPException:
         raise
@@ -927,50 +855,44 @@ async def admin_add_evaluation_standard(
     owner: str = Form(None),
     standard_file: UploadFile = File(...),
     user: dict = Depends(login_required),
-    db: sqlite3.Connection = Depends(get_db)
+    db: WriteSession = Depends(get_write_session)
 ):
     """管理员添加评估准则"""
     if user.get("user_type") != "admin":
         return JSONResponse({"success": False, "message": "权限不足"}, status_code=403)
     
     try:
-        # 创建上传目录
-        import os
-        upload_dir = "static/uploads/evaluation_standards"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # 生成安全文件名
-        import time
-        safe_filename = f"{int(time.time())}_{standard_file.filename.replace(' ', '_')}"
-        file_path = f"{upload_dir}/{safe_filename}"
-        
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            content = await standard_file.read()
-            buffer.write(content)
-        
-        # 获取文件大小
-        file_size = os.path.getsize(file_path)
-        
-        # 插入数据库
-        c = db.cursor()
-        c.execute("""
-            INSERT INTO evaluation_standards 
-            (category, owner, file_path, file_name, 
-             uploader_username, uploader_realname, file_size)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            category,
-            owner,
-            file_path,
-            standard_file.filename,  # 使用原始文件名
-            user["username"],
-            user.get("realname", user["username"]),
-            file_size
-        ))
-        db.commit()
-        
-        return JSONResponse({"success": True, "message": "评估准则添加成功"})
+        # 文件先写入临时目录（校验类型和大小、计算哈希），这期间不占用写连接
+        staged = await stage_upload(standard_file)
+        try:
+            await db.acquire()
+            # 放入按内容寻址的存储，相同文件只保存一份
+            saved = store_staged(staged, "evaluation_standard", db)
+            
+            # 插入数据库
+            c = db.cursor()
+            c.execute("""
+                INSERT INTO evaluation_standards 
+                (category, owner, file_path, file_name, 
+                 uploader_username, uploader_realname, file_size, sha256)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                category,
+                owner,
+                saved.path,
+                standard_file.filename,  # 使用原始文件名
+                user["username"],
+                user.get("realname", user["username"]),
+                saved.size,
+                saved.sha256
+            ))
+            db.commit()
+            
+            return JSONResponse({"success": True, "message": "评估准则添加成功"})
+        finally:
+            discard_staged([staged])
+    except HTTPException as e:
+        return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     except Exception as e:
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
@@ -989,25 +911,17 @@ async def admin_delete_evaluation_standard(
         c = db.cursor()
         
         # 检查准则是否存在
-        c.execute("SELECT file_name, file_path FROM evaluation_standards WHERE id = ?", (standard_id,))
+        c.execute("SELECT file_name, file_path, sha256 FROM evaluation_standards WHERE id = ?", (standard_id,))
         standard = c.fetchone()
         if not standard:
             return JSONResponse({"success": False, "message": "准则不存在"}, status_code=404)
         
         file_name = standard[0]
-        file_path = standard[1]
-        
-        # 硬删除：先删除物理文件，再删除数据库记录
-        import os
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as file_error:
-                print(f"删除文件失败: {str(file_error)}")
         
-        # 删除数据库记录（硬删除）
+        # 硬删除：先删除数据库记录，提交后再删除物理文件（其他记录仍引用同一内容时保留）
         c.execute("DELETE FROM evaluation_standards WHERE id = ?", (standard_id,))
         db.commit()
+        remove_files(db, [(standard[1], standard[2])])
         
         return JSONResponse({"success": True, "message": f"评估准则 '{file_name}' 已删除"})
     except Exception as e:
@@ -1020,6 +934,8 @@ async def get_user_projects_paginated(
     limit: int = Query(20, ge=1, le=100),
     search: str = Query(None),
     status: str = Query("all"),
+    cursor: str = Query(None),
+    with_count: bool = Query(True),
     user: dict = Depends(login_required),
     db: sqlite3.Connection = Depends(get_db)
 ):
@@ -1031,6 +947,8 @@ async def get_user_projects_paginated(
             limit=limit,
             search=search,
             status=status,
+            cursor=cursor,
+            with_count=with_count,
             db=db
         )
         
@@ -0,0 +1,207 @@
+"""文件下载服务
+
+资质、模板、准则的下载统一由 download_service.file_response 生成响应：
+
+- ETag：存储中的文件使用 sha256（强 ETag），旧文件使用 修改时间-大小
+- If-None-Match / If-Modified-Since：未变化时返回 304，不发送正文
+- Range / If-Range：单个字节区间返回 206，无法满足的区间返回 416；
+  多个区间按 RFC 9110 允许的方式忽略，返回完整文件
+- Content-Disposition：同时给出 ASCII 的 filename 和 UTF-8 编码的 filename*，中文文件名不乱码
+- 发送正文：服务器支持 ASGI zerocopysend 扩展时交给 sendfile(2)，
+  支持 pathsend 时整文件交给服务器，否则在线程中按块读取
+
+基准测试见 bench_downloads.py。
+"""
+import os
+import re
+import stat
+import mimetypes
+import unicodedata
+import anyio
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+from fastapi import HTTPException
+from starlette.responses import Response
+
+CHUNK_SIZE = 256 * 1024
+
+_RANGE_RE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+_UNSAFE_FILENAME_RE = re.compile(r'[\x00-\x1f\x7f"\\;]')
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(header, size):
+    """解析 Range 头，返回 (start, end) 闭区间；不是单个 bytes 区间时返回 None，区间无效时抛 RangeNotSatisfiable"""
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    match = _RANGE_RE.match(ranges)
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # 后缀区间：bytes=-500 表示最后 500 字节
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = size - 1 if last == "" else min(int(last), size - 1)
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+def _etag_values(header):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def _weak_match(header, etag):
+    """If-None-Match 使用弱比较：忽略 W/ 前缀"""
+    strip = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    return any(tag == "*" or strip(tag) == strip(etag) for tag in _etag_values(header))
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def content_disposition(file_name, disposition="attachment"):
+    """生成 Content-Disposition：filename 为 ASCII 兜底名，filename* 为 UTF-8 原名（RFC 6266 / 5987）"""
+    file_name = _UNSAFE_FILENAME_RE.sub("_", os.path.basename(file_name or "")).strip()
+    if not file_name:
+        return disposition
+    stem, ext = os.path.splitext(file_name)
+    ascii_stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode().strip()
+    ascii_ext = ext.encode("ascii", "ignore").decode()
+    fallback = (ascii_stem or "download") + ascii_ext
+    value = f'{disposition}; filename="{fallback}"'
+    if fallback != file_name:
+        value += f"; filename*=UTF-8''{quote(file_name, safe='')}"
+    return value
+
+class FileRangeResponse(Response):
+    """发送文件的一个区间（或整个文件）；响应头由 DownloadService 准备好"""
+
+    def __init__(self, path, status_code, headers, media_type, offset=0, count=0):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.offset = offset
+        self.count = count
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        extensions = scope.get("extensions") or {}
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.count,
+                })
+        elif "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        else:
+            await self._send_chunks(send)
+
+    async def _send_chunks(self, send):
+        remaining = self.count
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.offset)
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # 文件在发送途中被截断：结束正文，连接由服务器按 Content-Length 处理
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+class DownloadService:
+    def stat_file(self, file_path):
+        """返回文件的 os.stat_result，文件不存在或不是普通文件时 404"""
+        try:
+            stat_result = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError, TypeError):
+            raise HTTPException(status_code=404, detail="文件不存在")
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404, detail="文件不存在")
+        return stat_result
+
+    def make_etag(self, stat_result, sha256=None):
+        if sha256:
+            return f'"{sha256}"'
+        return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    def is_not_modified(self, request, etag, mtime):
+        """If-None-Match 优先；没有它时才看 If-Modified-Since"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _weak_match(if_none_match, etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            since = _parse_http_date(if_modified_since)
+            return since is not None and int(mtime) <= since
+        return False
+
+    def range_applies(self, request, etag, last_modified):
+        """If-Range 只接受强 ETag 或与 Last-Modified 完全一致的日期"""
+        if_range = request.headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(("W/", '"')):
+            return if_range == etag
+        return if_range == last_modified
+
+    def file_response(self, request, file_path, file_name=None, sha256=None,
+                      disposition="attachment", media_type=None):
+        """生成支持 304 / 206 的文件响应"""
+        stat_result = self.stat_file(file_path)
+        size = stat_result.st_size
+        etag = self.make_etag(stat_result, sha256)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        if media_type is None:
+            media_type = mimetypes.guess_type(file_name or file_path)[0] or "application/octet-stream"
+
+        headers = {
+            "etag": etag,
+            "last-modified": last_modified,
+            "accept-ranges": "bytes",
+            # 文件需登录后访问：只允许浏览器缓存，每次使用前用 ETag 验证
+            "cache-control": "private, no-cache",
+            "content-disposition": content_disposition(file_name or os.path.basename(file_path), disposition),
+        }
+
+        if request.method in ("GET", "HEAD") and self.is_not_modified(request, etag, stat_result.st_mtime):
+            del headers["content-disposition"]
+            return Response(status_code=304, headers=headers)
+
+        start, end = 0, size - 1
+        status_code = 200
+        range_header = request.headers.get("range")
+        if range_header and request.method == "GET" and self.range_applies(request, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={
+                    "content-range": f"bytes */{size}",
+                    "accept-ranges": "bytes",
+                })
+            if byte_range is not None:
+                start, end = byte_range
+                status_code = 206
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        count = max(end - start + 1, 0)
+        headers["content-length"] = str(count)
+        return FileRangeResponse(file_path, status_code, headers, media_type, offset=start, count=count)
+
+download_service = DownloadService()
@@ -0,0 +1,159 @@
+"""项目资料打包导出
+
+/project/{project_no}/export.zip 把项目的合同文件、全部报告文件和清单打成一个 ZIP：
+
+    清单.json            项目、报告和文件的元数据
+    清单.csv             每个文件一行（带 BOM，Excel 可直接打开）
+    合同文件/<文件名>
+    报告/<报告号>/<文件名>
+
+元数据在返回响应前一次查询完毕，文件内容在发送时逐块读取并写入 ZIP（utils/zipstream.py），
+内存占用与附件总大小无关。磁盘上缺失的文件不放入压缩包，在清单中标记为 missing。
+"""
+import io
+import os
+import csv
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from database.async_db import async_db
+from database.loaders import batch_report_files
+from services.download_service import content_disposition
+from utils.zipstream import stream_zip
+
+PROJECT_COLUMNS = [
+    "project_no", "name", "project_type", "client_name", "market_leader", "project_leader",
+    "progress", "amount", "is_paid", "creator", "start_date", "end_date", "status", "create_date"
+]
+REPORT_COLUMNS = [
+    "report_no", "report_type", "creator", "create_date",
+    "reviewer1", "reviewer2", "reviewer3", "signer1", "signer2"
+]
+DOSSIER_PROJECT_SQL = f"SELECT id, {', '.join(PROJECT_COLUMNS)} FROM projects WHERE project_no = ?"
+DOSSIER_CONTRACT_FILES_SQL = """
+    SELECT file_path, file_name, file_size, sha256, uploader_username, upload_time
+    FROM contract_files WHERE project_id = ? ORDER BY upload_time, id
+"""
+DOSSIER_REPORTS_SQL = f"SELECT id, {', '.join(REPORT_COLUMNS)} FROM reports WHERE project_id = ? ORDER BY id"
+
+CSV_HEADER = ["类别", "报告号", "文件名", "压缩包内路径", "大小", "上传人", "上传时间", "sha256", "缺失"]
+
+def _safe_name(name, fallback):
+    """压缩包内的路径片段：去掉目录分隔符和控制字符"""
+    name = "".join("_" if ch in '/\\:*?"<>|' or ord(ch) < 32 else ch for ch in (name or "")).strip(" .")
+    return name or fallback
+
+class _ArcNames:
+    """同一目录下的重名文件依次加上 (2)、(3)..."""
+
+    def __init__(self):
+        self._used = set()
+
+    def add(self, directory, file_name):
+        stem, ext = os.path.splitext(file_name)
+        candidate, n = f"{directory}/{file_name}", 1
+        while candidate.lower() in self._used:
+            n += 1
+            candidate = f"{directory}/{stem} ({n}){ext}"
+        self._used.add(candidate.lower())
+        return candidate
+
+def _file_entry(row, arcnames, directory):
+    file_name = _safe_name(row["file_name"], os.path.basename(row["file_path"] or "") or "文件")
+    missing = not (row["file_path"] and os.path.isfile(row["file_path"]))
+    return {
+        "file_name": row["file_name"],
+        "path": None if missing else arcnames.add(directory, file_name),
+        "source": row["file_path"],
+        "file_size": row["file_size"],
+        "sha256": row["sha256"],
+        "uploader_username": row["uploader_username"],
+        "upload_time": row["upload_time"],
+        "missing": missing,
+    }
+
+def load_dossier(conn, project_no):
+    """在数据库线程中执行：读取项目、合同文件、报告和报告文件，返回清单；项目不存在时返回 None"""
+    project = conn.execute(DOSSIER_PROJECT_SQL, (project_no,)).fetchone()
+    if not project:
+        return None
+    arcnames = _ArcNames()
+
+    contract_rows = conn.execute(DOSSIER_CONTRACT_FILES_SQL, (project["id"],)).fetchall()
+    contract_files = [_file_entry(row, arcnames, "合同文件") for row in contract_rows]
+
+    report_rows = conn.execute(DOSSIER_REPORTS_SQL, (project["id"],)).fetchall()
+    files_by_report = batch_report_files(conn, [row["id"] for row in report_rows])
+    reports = []
+    for row in report_rows:
+        directory = "报告/" + _safe_name(row["report_no"], f"报告{row['id']}")
+        # 加载器按上传时间倒序返回，压缩包内按上传顺序排列
+        files = [_file_entry(file_row, arcnames, directory) for file_row in reversed(files_by_report[row["id"]])]
+        reports.append({**{column: row[column] for column in REPORT_COLUMNS}, "files": files})
+
+    return {
+        "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "project": {column: project[column] for column in PROJECT_COLUMNS},
+        "contract_files": contract_files,
+        "reports": reports,
+    }
+
+def manifest_csv(dossier):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    rows = [("合同文件", "", entry) for entry in dossier["contract_files"]]
+    rows += [("报告文件", report["report_no"], entry) for report in dossier["reports"] for entry in report["files"]]
+    for kind, report_no, entry in rows:
+        writer.writerow([
+            kind, report_no, entry["file_name"], entry["path"] or "", entry["file_size"] or "",
+            entry["uploader_username"] or "", entry["upload_time"] or "", entry["sha256"] or "",
+            "是" if entry["missing"] else ""
+        ])
+    return output.getvalue().encode("utf-8-sig")
+
+def _public(entries):
+    """清单中不包含服务器上的存储路径"""
+    return [{key: value for key, value in entry.items() if key != "source"} for entry in entries]
+
+def manifest_json(dossier):
+    manifest = dict(dossier, contract_files=_public(dossier["contract_files"]), reports=[
+        dict(report, files=_public(report["files"])) for report in dossier["reports"]
+    ])
+    return json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+
+def zip_entries(dossier):
+    """清单在前，随后是合同文件和各报告的文件"""
+    yield "清单.json", manifest_json(dossier)
+    yield "清单.csv", manifest_csv(dossier)
+    entries = list(dossier["contract_files"])
+    for report in dossier["reports"]:
+        entries += report["files"]
+    for entry in entries:
+        if entry["path"]:
+            yield entry["path"], entry["source"]
+
+class ExportService:
+    async def export_project(self, project_no, user):
+        """流式返回项目资料 ZIP
+
+        只在读取清单时借用一个只读连接，读完立即归还；打包和发送文件期间不占用连接池。
+        """
+        async with async_db.connection(readonly=True) as adb:
+            dossier = await adb.run(load_dossier, project_no)
+        if dossier is None:
+            raise HTTPException(status_code=404, detail="项目不存在")
+
+        project = dossier["project"]
+        file_name = f"{project['project_no']}_{_safe_name(project['name'], '项目')}.zip"
+        return StreamingResponse(
+            stream_zip(zip_entries(dossier)),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": content_disposition(file_name),
+                "Cache-Control": "no-store",
+            }
+        )
+
+export_service = ExportService()
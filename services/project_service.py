@@ -1,14 +1,51 @@
 from fastapi import HTTPException, Request, UploadFile, File, Form
 from fastapi.responses import RedirectResponse, FileResponse
-from fastapi.templating import Jinja2Templates
+from utils.templating import templates, stream_template
 from datetime import datetime
 import sqlite3
-import os
 import shutil
 from typing import List
-from utils.helpers import secure_filename
+from database.async_db import AsyncConnection
+from database.loaders import Loaders, LazyRows
+from database.project_roles import refresh_project_roles
+from database.numbering import allocate_project_no
+from services.user_directory import user_directory
+from utils.pagination import keyset_query, keyset_page, count_cache
+from database.search import project_filters, ranked_search_query, render_highlights
+from utils.uploads import stage_uploads, store_staged, discard_staged
+from database.blobs import remove_files
 
-templates = Jinja2Templates(directory="templates")
+
+# 有开始日期的项目年份（年份筛选器）
+PROJECT_YEARS_SQL = """
+    SELECT DISTINCT strftime('%Y', start_date) as year 
+    FROM projects 
+    WHERE start_date IS NOT NULL AND start_date != ''
+    ORDER BY year DESC
+"""
+
+# 项目详情页：项目、合同文件、报告
+PROJECT_INFO_SQL = """
+    SELECT 
+        id, project_no, name, project_type, client_name, 
+        market_leader, project_leader, progress, report_numbers, 
+        amount, is_paid, creator, creator_realname, start_date, end_date, 
+        status, contract_file, create_date
+    FROM projects WHERE project_no=?
+"""
+
+PROJECT_CONTRACT_FILES_SQL = """
+    SELECT id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size
+    FROM contract_files 
+    WHERE project_id = ? 
+    ORDER BY upload_time DESC
+"""
+
+PROJECT_REPORTS_SQL = """
+    SELECT id, report_no, report_type, file_paths, creator, creator_realname, create_date, 
+        reviewer1, reviewer2, reviewer3, signer1, signer2
+    FROM reports WHERE project_id = ? ORDER BY create_date DESC
+"""
 
 class ProjectService:
     def _get_project_permission(self, user, project_creator, project_leader):
@@ -43,63 +80,26 @@ class ProjectService:
         return True
 
     # 在 project_service.py 中修改 get_admin_page 方法
+    def _iter_admin_projects(self, conn):
+        """逐行产出管理页的项目（附负责人真实姓名），供 LazyRows 在渲染时读取"""
+        for row in conn.execute("SELECT * FROM projects ORDER BY create_date DESC, id DESC"):
+            project = dict(row)
+            # 从用户目录缓存中查询真实姓名
+            for field in ("project_leader", "market_leader"):
+                project[f"{field}_realname"] = user_directory.realname(project[field], conn) if project.get(field) else ""
+            yield project
+
     async def get_admin_page(self, request: Request, user: dict, db):
-        """获取管理员页面（初始加载）"""
+        """获取管理员页面（初始加载）：项目表格在渲染时逐行读取，页面边渲染边发送"""
         try:
-            # 获取所有项目（初始加载使用）
-            c = db.cursor()
-            c.execute("SELECT * FROM projects ORDER BY create_date DESC")
-            rows = c.fetchall()
-            
-            projects = []
-            if rows:
-                column_names = [col[0] for col in c.description]
-                
-                # 收集所有需要查询的用户名
-                usernames_to_query = set()
-                for row in rows:
-                    project_dict = dict(zip(column_names, row))
-                    
-                    if project_dict.get("project_leader"):
-                        usernames_to_query.add(project_dict["project_leader"])
-                    if project_dict.get("market_leader"):
-                        usernames_to_query.add(project_dict["market_leader"])
-                    
-                    projects.append(project_dict)
-                
-                # 批量查询用户真实姓名
-                user_realnames = {}
-                if usernames_to_query:
-                    c2 = db.cursor()
-                    placeholders = ','.join('?' * len(usernames_to_query))
-                    c2.execute(f"SELECT username, realname FROM users WHERE username IN ({placeholders})", list(usernames_to_query))
-                    for row in c2.fetchall():
-                        user_realnames[row[0]] = row[1]
-                    c2.close()
-                
-                # 处理每个项目，添加真实姓名
-                for project in projects:
-                    if project.get("project_leader"):
-                        project["project_leader_realname"] = user_realnames.get(project["project_leader"], project["project_leader"])
-                    else:
-                        project["project_leader_realname"] = ""
-                    
-                    if project.get("market_leader"):
-                        project["market_leader_realname"] = user_realnames.get(project["market_leader"], project["market_leader"])
-                    else:
-                        project["market_leader_realname"] = ""
+            adb = AsyncConnection(db)
+            await user_directory.refresh(adb)
+            total_count = (await adb.fetchone("SELECT COUNT(*) FROM projects"))[0]
             
             # 获取所有项目的年份列表
-            c.execute("""
-                SELECT DISTINCT strftime('%Y', start_date) as year 
-                FROM projects 
-                WHERE start_date IS NOT NULL AND start_date != ''
-                ORDER BY year DESC
-            """)
-            years = [row[0] for row in c.fetchall()]
+            years = [row[0] for row in await adb.fetchall(PROJECT_YEARS_SQL)]
             
             # 计算分页相关信息
-            total_count = len(projects)
             current_page = 1
             page_size = 20
             total_pages = max(1, (total_count + page_size - 1) // page_size)
@@ -108,10 +108,10 @@ class ProjectService:
             start_item = ((current_page - 1) * page_size) + 1
             end_item = min(current_page * page_size, total_count)
             
-            return templates.TemplateResponse("admin_projects.html", {
+            return stream_template("admin_projects.html", {
                 "request": request,
                 "user": user,
-                "projects": projects,
+                "projects": LazyRows(self._iter_admin_projects),
                 "years": years,
                 "total_count": total_count,
                 "total_pages": total_pages,
@@ -128,9 +128,8 @@ class ProjectService:
 
     async def get_create_project_page(self, request, user, db):
         c = db.cursor()
-        c.execute("SELECT username, realname FROM users")
-        users_data = c.fetchall()
-        users = [{"username": row[0], "realname": row[1] or row[0]} for row in users_data]
+        users = [{"username": u["username"], "realname": u["realname"] or u["username"]}
+                 for u in user_directory.all_users(db)]
         
         return templates.TemplateResponse("create_project.html", {
             "request": request,
@@ -140,19 +139,8 @@ class ProjectService:
         })
 
     def generate_project_no(self, db):
-        """生成项目编号：P2025_031 格式"""
-        current_year = datetime.now().year
-        
-        c = db.cursor()
-        c.execute("""
-            SELECT COUNT(*) FROM projects 
-            WHERE project_no LIKE ?
-        """, (f"P{current_year}_%",))
-        
-        current_count = c.fetchone()[0]
-        next_number = current_count + 1
-        
-        return f"P{current_year}_{next_number:03d}"
+        """生成项目编号：P2025_031 格式（开启写事务，须与插入项目一起提交）"""
+        return allocate_project_no(db, datetime.now().year)
 
     async def create_project(self, name, project_type, client_name, market_leader, 
                        project_leader, amount, creator, start_date, user, db):
@@ -168,9 +156,7 @@ class ProjectService:
             
             # 获取当前用户的真实姓名
             c = db.cursor()
-            c.execute("SELECT realname FROM users WHERE username = ?", (creator,))
-            creator_realname_result = c.fetchone()
-            creator_realname = creator_realname_result[0] if creator_realname_result else creator
+            creator_realname = user_directory.realname(creator, db)
             
             c.execute("""
                 INSERT INTO projects (
@@ -183,7 +169,9 @@ class ProjectService:
                 project_leader, progress, report_numbers, amount, is_paid, 
                 creator, creator_realname, start_date, end_date, status, "", create_date
             ))
+            refresh_project_roles(c, c.lastrowid)
             db.commit()
+            count_cache.clear()
 
             return RedirectResponse(url="/user_dashboard", status_code=303)
 
@@ -192,49 +180,31 @@ class ProjectService:
             raise HTTPException(status_code=500, detail=f"创建项目失败: {str(e)}")
 
     async def get_project_info(self, request, project_no, user, db):
-        c = db.cursor()
-        c.execute("""
-            SELECT 
-                id, project_no, name, project_type, client_name, 
-                market_leader, project_leader, progress, report_numbers, 
-                amount, is_paid, creator, creator_realname, start_date, end_date, 
-                status, contract_file, create_date
-            FROM projects WHERE project_no=?
-        """, (project_no,))
-        
-        project = c.fetchone()
+        adb = AsyncConnection(db)
+        project = await adb.fetchone(PROJECT_INFO_SQL, (project_no,))
         
         if not project:
             raise HTTPException(status_code=404, detail="项目不存在")
         
-        columns = [description[0] for description in c.description]
-        project_dict = dict(zip(columns, project))
+        project_dict = dict(project)
         
         # 将负责人用户名转换为真实姓名
+        await user_directory.refresh(adb)
         if project_dict["market_leader"]:
-            c.execute("SELECT realname FROM users WHERE username = ?", (project_dict["market_leader"],))
-            market_leader_result = c.fetchone()
-            project_dict["market_leader_realname"] = market_leader_result[0] if market_leader_result else project_dict["market_leader"]
+            project_dict["market_leader_realname"] = user_directory.realname(project_dict["market_leader"], db)
         else:
             project_dict["market_leader_realname"] = ""
         
         if project_dict["project_leader"]:
-            c.execute("SELECT realname FROM users WHERE username = ?", (project_dict["project_leader"],))
-            project_leader_result = c.fetchone()
-            project_dict["project_leader_realname"] = project_leader_result[0] if project_leader_result else project_dict["project_leader"]
+            project_dict["project_leader_realname"] = user_directory.realname(project_dict["project_leader"], db)
         else:
             project_dict["project_leader_realname"] = ""
         
         # 获取合同文件信息
-        c.execute("""
-            SELECT id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size
-            FROM contract_files 
-            WHERE project_id = ? 
-            ORDER BY upload_time DESC
-        """, (project_dict["id"],))
+        contract_rows = await adb.fetchall(PROJECT_CONTRACT_FILES_SQL, (project_dict["id"],))
         
         contract_files = []
-        for row in c.fetchall():
+        for row in contract_rows:
             contract_files.append({
                 "id": row[0],
                 "file_path": row[1],
@@ -246,14 +216,14 @@ class ProjectService:
             })
         
         # 获取报告信息
-        c.execute("""
-            SELECT id, report_no, report_type, file_paths, creator, creator_realname, create_date, 
-                reviewer1, reviewer2, reviewer3, signer1, signer2
-            FROM reports WHERE project_id = ? ORDER BY create_date DESC
-        """, (project_dict["id"],))
+        report_rows = await adb.fetchall(PROJECT_REPORTS_SQL, (project_dict["id"],))
+
+        # 一次查询取回所有报告的文件
+        loaders = Loaders(adb)
+        files_by_report = await loaders.report_files.load_many([row[0] for row in report_rows])
 
         reports = []
-        for row in c.fetchall():
+        for row in report_rows:
             report_data = {
                 "id": row[0],
                 "report_no": row[1],
@@ -270,41 +240,26 @@ class ProjectService:
                 "files": []
             }
             
-            c.execute("""
-                SELECT rf.id, rf.file_path, rf.file_name, rf.uploader_username, 
-                    rf.uploader_realname, rf.upload_time, rf.file_size
-                FROM report_files rf
-                WHERE rf.report_id = ?
-                ORDER BY rf.upload_time DESC
-            """, (row[0],))
-            
-            file_info = c.fetchall()
-            for file_row in file_info:
+            for file_row in files_by_report[row[0]]:
                 report_data["files"].append({
-                    "id": file_row[0],
-                    "file_path": file_row[1],
-                    "file_name": file_row[2],
-                    "uploader_username": file_row[3],
-                    "uploader_realname": file_row[4],
-                    "upload_time": file_row[5],
-                    "file_size": file_row[6]
+                    "id": file_row["id"],
+                    "file_path": file_row["file_path"],
+                    "file_name": file_row["file_name"],
+                    "uploader_username": file_row["uploader_username"],
+                    "uploader_realname": file_row["uploader_realname"],
+                    "upload_time": file_row["upload_time"],
+                    "file_size": file_row["file_size"]
                 })
             
             reports.append(report_data)
         
-        # 获取用户列表时包含资质信息
-        c.execute("SELECT username, realname FROM users")
-        users_data = c.fetchall()
+        # 获取用户列表时包含资质信息（来自用户目录缓存）
         users = []
-        for row in users_data:
-            # 获取每个用户的资质
-            c.execute("SELECT qualification_type FROM user_qualifications WHERE username = ?", (row[0],))
-            qualifications = [qual_row[0] for qual_row in c.fetchall()]
-            
+        for entry in user_directory.all_users(db):
             users.append({
-                "username": row[0], 
-                "realname": row[1] or row[0],
-                "qualifications": qualifications
+                "username": entry["username"], 
+                "realname": entry["realname"] or entry["username"],
+                "qualifications": list(entry["qualifications"])
             })
         
         # 检查当前用户是否有操作权限：管理员或项目负责人
@@ -330,6 +285,7 @@ class ProjectService:
         c = db.cursor()
         c.execute("UPDATE projects SET status = ? WHERE project_no = ?", (status, project_no))
         db.commit()
+        count_cache.clear()
         return RedirectResponse(url=f"/project/{project_no}", status_code=303)
 
     async def update_project_progress(self, project_no, progress, user, db):
@@ -385,9 +341,8 @@ class ProjectService:
         project_dict = dict(zip(columns, project))
         
         # 获取用户列表用于选择框
-        c.execute("SELECT username, realname FROM users")
-        users_data = c.fetchall()
-        users = [{"username": row[0], "realname": row[1] or row[0]} for row in users_data]
+        users = [{"username": u["username"], "realname": u["realname"] or u["username"]}
+                 for u in user_directory.all_users(db)]
         
         return templates.TemplateResponse("edit_project.html", {
             "request": request,
@@ -406,12 +361,14 @@ class ProjectService:
             c = db.cursor()
             
             # 验证项目是否存在
-            c.execute("SELECT status FROM projects WHERE project_no = ?", (project_no,))
+            c.execute("SELECT id, status FROM projects WHERE project_no = ?", (project_no,))
             result = c.fetchone()
             
             if not result:
                 raise HTTPException(status_code=404, detail="项目不存在")
             
+            project_id = result[0]
+            
             # 更新项目信息
             c.execute("""
                 UPDATE projects 
@@ -423,8 +380,10 @@ class ProjectService:
                 name, project_type, client_name, market_leader,
                 project_leader, amount, is_paid, start_date, project_no
             ))
+            refresh_project_roles(c, project_id)
             
             db.commit()
+            count_cache.clear()
             
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
@@ -433,8 +392,19 @@ class ProjectService:
             raise HTTPException(status_code=500, detail=f"更新项目失败: {str(e)}")
 
     async def add_contract_files(self, project_no, request, user, db):
-        """添加合同文件"""
+        """添加合同文件（db 为 WriteSession：文件写入临时目录后才取写连接）"""
+        staged = []
         try:
+            form_data = await request.form()
+            contract_files = form_data.getlist("contract_files")
+            
+            if not contract_files:
+                raise HTTPException(status_code=400, detail="请选择要上传的文件")
+            
+            # 先检查并把文件写入临时目录（计算哈希），任何一个不合格都不写入；这期间不占用写连接
+            staged = await stage_uploads(contract_files)
+            await db.acquire()
+            
             # 检查权限
             self._check_project_permission_by_no(project_no, user, db)
             
@@ -450,51 +420,36 @@ class ProjectService:
             if status in ['completed', 'cancelled']:
                 raise HTTPException(status_code=400, detail=f"项目状态为{status}，无法添加合同文件")
             
-            form_data = await request.form()
-            contract_files = form_data.getlist("contract_files")
-            
-            if not contract_files:
-                raise HTTPException(status_code=400, detail="请选择要上传的文件")
-            
             # 获取当前用户的真实姓名
-            c.execute("SELECT realname FROM users WHERE username = ?", (user["username"],))
-            uploader_realname_result = c.fetchone()
-            uploader_realname = uploader_realname_result[0] if uploader_realname_result else user["username"]
+            uploader_realname = user_directory.realname(user["username"], db)
             
             upload_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            for contract_file in contract_files:
-                if contract_file.filename:
-                    contract_filename = secure_filename(contract_file.filename)
-                    
-                    # 创建项目专用的上传目录
-                    contract_dir = os.path.join('static/uploads/contract_file', project_no)
-                    os.makedirs(contract_dir, exist_ok=True)  # 创建目录，如果不存在的话
-                    
-                    contract_path = os.path.join(contract_dir, contract_filename)
-                    
-                    with open(contract_path, "wb") as f:
-                        content = await contract_file.read()
-                        f.write(content)
-                    
-                    file_size = os.path.getsize(contract_path)
-                    
-                    # 插入到 contract_files 表
-                    c.execute("""
-                        INSERT INTO contract_files 
-                        (project_id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        project_id, contract_path, contract_file.filename, user["username"],
-                        uploader_realname, upload_time, file_size
-                    ))
+            for item in staged:
+                # 按内容保存，相同文件只占一份磁盘空间
+                saved = store_staged(item, "contract", db)
+                
+                # 插入到 contract_files 表（插入时由触发器增加文件引用数）
+                c.execute("""
+                    INSERT INTO contract_files 
+                    (project_id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size, sha256)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    project_id, saved.path, saved.filename, user["username"],
+                    uploader_realname, upload_time, saved.size, saved.sha256
+                ))
             
             db.commit()
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
+        except HTTPException:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"添加合同文件失败: {str(e)}")
+        finally:
+            discard_staged(staged)
 
     async def delete_contract_file(self, project_no, file_id, user, db):
         """删除合同文件"""
@@ -517,26 +472,19 @@ class ProjectService:
                 raise HTTPException(status_code=400, detail="只有进行中的项目可以删除合同文件")
             
             # 获取文件信息
-            c.execute("SELECT file_path FROM contract_files WHERE id = ? AND project_id = ?", (file_id, project_id))
+            c.execute("SELECT file_path, sha256 FROM contract_files WHERE id = ? AND project_id = ?", (file_id, project_id))
             file_result = c.fetchone()
             
             if not file_result:
                 raise HTTPException(status_code=404, detail="文件不存在")
             
-            file_path = file_result[0]
-            
-            # 删除物理文件
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"🗑️ 已删除合同文件: {file_path}")
-                except Exception as e:
-                    print(f"⚠️ 删除合同文件失败 {file_path}: {e}")
-            
             # 从数据库删除文件记录
             c.execute("DELETE FROM contract_files WHERE id = ? AND project_id = ?", (file_id, project_id))
             
             db.commit()
+            
+            # 提交后再删除物理文件（其他记录仍引用同一内容时保留）
+            remove_files(db, [tuple(file_result)])
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
         except Exception as e:
@@ -545,76 +493,47 @@ class ProjectService:
         
     async def get_admin_projects_paginated(self, page: int = 1, limit: int = 20, 
                                      search: str = None, status: str = None, 
-                                     year: str = None, db=None):
-        """分页获取所有项目（管理员使用）"""
+                                     year: str = None, cursor: str = None,
+                                     with_count: bool = True, db=None):
+        """分页获取所有项目（管理员使用）
+
+        传入 cursor（上一次返回的 next_cursor/prev_cursor）时按游标翻页，
+        否则按页码定位。with_count=False 时不计算总数。
+        """
         try:
             c = db.cursor()
             
-            # 计算偏移量
-            offset = (page - 1) * limit
-            
-            # 构建基础查询
-            base_query = """
-                SELECT p.* 
-                FROM projects p
-                WHERE 1=1
-            """
-            
-            # 构建计数查询
-            count_query = """
-                SELECT COUNT(*) 
-                FROM projects p
-                WHERE 1=1
-            """
-            
-            # 查询参数
-            params = []
-            count_params = []
-            
-            # 添加搜索条件
-            if search and search.strip():
-                search_term = f"%{search.strip()}%"
-                base_query += " AND (p.project_no LIKE ? OR p.name LIKE ? OR p.client_name LIKE ?)"
-                count_query += " AND (p.project_no LIKE ? OR p.name LIKE ? OR p.client_name LIKE ?)"
-                params.extend([search_term, search_term, search_term])
-                count_params.extend([search_term, search_term, search_term])
-            
-            # 添加状态筛选条件
-            if status and status != 'all':
-                base_query += " AND p.status = ?"
-                count_query += " AND p.status = ?"
-                params.append(status)
-                count_params.append(status)
-            
-            # 添加年份筛选条件
-            if year and year.strip():
-                base_query += " AND strftime('%Y', p.start_date) = ?"
-                count_query += " AND strftime('%Y', p.start_date) = ?"
-                params.append(year)
-                count_params.append(year)
-            
-            # 添加排序和分页
-            base_query += " ORDER BY p.create_date DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            # 执行计数查询
-            c.execute(count_query, count_params)
-            total_count = c.fetchone()[0]
-            
-            # 执行数据查询
-            c.execute(base_query, params)
-            rows = c.fetchall()
-            
-            # 获取列名
-            column_names = [col[0] for col in c.description] if rows else []
+            # 构建筛选条件（搜索、状态、年份）
+            from_clause, where, params, match = project_filters(search, status, year)
+            
+            # 总数按筛选条件缓存，翻页时不重复计数
+            total_count = None
+            if with_count:
+                def count():
+                    c.execute("SELECT COUNT(*)" + from_clause + where, params)
+                    return c.fetchone()[0]
+                total_count = count_cache.get_or_count(("admin", where, tuple(params)), count)
+            
+            if match:
+                # 全文检索结果按相关度排序，只支持页码翻页
+                c.execute(*ranked_search_query(from_clause, where, params, limit, (page - 1) * limit))
+                column_names = [col[0] for col in c.description]
+                rows = [render_highlights(dict(zip(column_names, row))) for row in c.fetchall()]
+                next_cursor = prev_cursor = None
+            else:
+                # 执行数据查询（游标分页）
+                query, query_params, direction = keyset_query(
+                    "SELECT p.*" + from_clause + where, params, cursor, limit, page)
+                c.execute(query, query_params)
+                column_names = [col[0] for col in c.description]
+                rows = [dict(zip(column_names, row)) for row in c.fetchall()]
+                rows, next_cursor, prev_cursor = keyset_page(rows, limit, direction, page)
             
             # 收集所有需要查询的用户名
             usernames_to_query = set()
             projects = []
             
-            for row in rows:
-                project_dict = dict(zip(column_names, row))
-                
+            for project_dict in rows:
                 if project_dict.get("project_leader"):
                     usernames_to_query.add(project_dict["project_leader"])
                 if project_dict.get("market_leader"):
@@ -622,16 +541,8 @@ class ProjectService:
                 
                 projects.append(project_dict)
             
-            # 批量查询用户真实姓名
-            user_realnames = {}
-            if usernames_to_query:
-                c2 = db.cursor()
-                placeholders = ','.join('?' * len(usernames_to_query))
-                c2.execute(f"SELECT username, realname FROM users WHERE username IN ({placeholders})", 
-                        list(usernames_to_query))
-                for row in c2.fetchall():
-                    user_realnames[row[0]] = row[1]
-                c2.close()
+            # 从用户目录缓存中查询真实姓名
+            user_realnames = user_directory.realnames(usernames_to_query, db)
             
             # 处理每个项目，添加真实姓名
             for project in projects:
@@ -662,16 +573,20 @@ class ProjectService:
                 project.setdefault("status", "active")
             
             # 计算总页数
-            total_pages = max(1, (total_count + limit - 1) // limit)  # 向上取整
+            total_pages = max(1, (total_count + limit - 1) // limit) if total_count is not None else None  # 向上取整
             
             return {
                 "projects": projects,
                 "total_count": total_count,
                 "total_pages": total_pages,
                 "current_page": page,
-                "page_size": limit
+                "page_size": limit,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"分页获取管理员项目失败: {str(e)}")
             raise HTTPException(status_code=500, detail=f"获取项目列表失败: {str(e)}")
\ No newline at end of file
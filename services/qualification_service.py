@@ -1,6 +1,8 @@
 from fastapi import HTTPException
 from typing import List
 
+USER_QUALIFICATION_TYPES_SQL = "SELECT qualification_type FROM user_qualifications WHERE username = ?"
+
 class QualificationService:
     # 需要签字的报告类型
     SIGNATURE_REQUIRED_TYPES = ["房地产估价报告", "资产评估报告", "土地报告"]
@@ -18,7 +20,7 @@ class QualificationService:
     def get_user_qualifications(self, username: str, db) -> List[str]:
         """获取用户的所有资质"""
         c = db.cursor()
-        c.execute("SELECT qualification_type FROM user_qualifications WHERE username = ?", (username,))
+        c.execute(USER_QUALIFICATION_TYPES_SQL, (username,))
         qualifications = [row[0] for row in c.fetchall()]
         return qualifications
     
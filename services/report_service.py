@@ -1,9 +1,28 @@
 from fastapi import HTTPException
 from fastapi.responses import RedirectResponse
 from datetime import datetime
-import os
-from utils.helpers import secure_filename
 from services.qualification_service import qualification_service
+from database.participants import sync_report_participants, delete_report_participants
+from database.project_roles import refresh_project_roles
+from database.numbering import allocate_report_seq, format_report_no
+from services.user_directory import user_directory
+from utils.uploads import stage_uploads, store_staged, discard_staged
+from database.blobs import remove_files
+from utils.pagination import count_cache
+
+# 项目下的报告（更新报告时读取现有的复核人/签字人）
+REPORT_IN_PROJECT_SQL = """
+    SELECT id, report_no, reviewer1, reviewer2, reviewer3, signer1, signer2, 
+        creator, report_type 
+    FROM reports 
+    WHERE id = ? AND project_id = ?
+"""
+
+# 签字人是否具备指定资质（参数为 用户名、资质类型）
+SIGNER_QUALIFIED_SQL = """
+    SELECT COUNT(*) FROM user_qualifications 
+    WHERE username = ? AND qualification_type = ?
+"""
 
 class ReportService:
     def __check_report_permission(self, user, project_creator, project_leader, report_creator):
@@ -11,7 +30,13 @@ class ReportService:
 
     async def update_report(self, project_no, report_id, reviewer1, reviewer2, reviewer3,
                       signer1, signer2, report_files, user, db):
+        """更新报告（db 为 WriteSession：文件写入临时目录后才取写连接）"""
+        staged = []
         try:
+            # 先检查并把文件写入临时目录（计算哈希），任何一个不合格都不写入；这期间不占用写连接
+            staged = await stage_uploads(report_files)
+            await db.acquire()
+            
             c = db.cursor()
             # 使用 project_no 查询项目状态
             c.execute("SELECT id, status FROM projects WHERE project_no = ?", (project_no,))
@@ -26,26 +51,20 @@ class ReportService:
                 raise HTTPException(status_code=400, detail=f"项目状态为{status}，无法更新报告")
             
             # 获取报告信息，包括创建人和报告类型
-            c.execute("""
-                SELECT id, report_no, file_paths, reviewer1, reviewer2, reviewer3, signer1, signer2, 
-                    creator, report_type 
-                FROM reports 
-                WHERE id = ? AND project_id = ?
-            """, (report_id, project_id))
+            c.execute(REPORT_IN_PROJECT_SQL, (report_id, project_id))
             result = c.fetchone()
             
             if not result:
                 raise HTTPException(status_code=404, detail="报告不存在")
             
             report_no = result[1]  # 获取报告号
-            existing_files = result[2] if result[2] else ""
-            existing_reviewer1 = result[3]
-            existing_reviewer2 = result[4]
-            existing_reviewer3 = result[5]
-            existing_signer1 = result[6]
-            existing_signer2 = result[7]
-            report_creator = result[8]
-            report_type = result[9]
+            existing_reviewer1 = result[2]
+            existing_reviewer2 = result[3]
+            existing_reviewer3 = result[4]
+            existing_signer1 = result[5]
+            existing_signer2 = result[6]
+            report_creator = result[7]
+            report_type = result[8]
             
             # 权限验证：只有管理员、项目创建人、项目负责人或报告创建人可以编辑
             c.execute("SELECT creator, project_leader FROM projects WHERE project_no = ?", (project_no,))
@@ -59,41 +78,6 @@ class ReportService:
             if not self.__check_report_permission(user, project_creator, project_leader, report_creator):
                 raise HTTPException(status_code=403, detail="没有权限编辑此报告")
         
-            file_paths = []
-            for report_file in report_files:
-                if report_file.filename:
-                    report_filename = secure_filename(report_file.filename)
-                    # 修改文件路径，使用 project_no 而不是 project_id
-                    report_path = os.path.join('static/uploads/reports/', report_no, report_filename)
-                    os.makedirs(os.path.dirname(report_path), exist_ok=True)
-                    
-                    with open(report_path, "wb") as f:
-                        content = await report_file.read()
-                        f.write(content)
-                    
-                    file_paths.append(report_path)
-                    
-                    file_size = os.path.getsize(report_path)
-                    
-                    c.execute("SELECT realname FROM users WHERE username = ?", (user["username"],))
-                    uploader_realname_result = c.fetchone()
-                    uploader_realname = uploader_realname_result[0] if uploader_realname_result else user["username"]
-                    
-                    upload_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    c.execute("""
-                        INSERT INTO report_files 
-                        (report_id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        report_id, report_path, report_file.filename, user["username"],
-                        uploader_realname, upload_time, file_size
-                    ))
-            
-            if file_paths:
-                all_files = existing_files + "," + ",".join(file_paths) if existing_files else ",".join(file_paths)
-            else:
-                all_files = existing_files
-            
             final_reviewer1 = reviewer1 if reviewer1 is not None else existing_reviewer1
             final_reviewer2 = reviewer2 if reviewer2 is not None else existing_reviewer2
             final_reviewer3 = reviewer3 if reviewer3 is not None else existing_reviewer3
@@ -131,31 +115,21 @@ class ReportService:
                 required_qualification = qualification_map.get(report_type)
                 if required_qualification:
                     # 验证第一个签字人资质
-                    c.execute("""
-                        SELECT COUNT(*) FROM user_qualifications 
-                        WHERE username = ? AND qualification_type = ?
-                    """, (final_signer1, required_qualification))
+                    c.execute(SIGNER_QUALIFIED_SQL, (final_signer1, required_qualification))
                     signer1_qualified = c.fetchone()[0] > 0
                     
                     # 验证第二个签字人资质
-                    c.execute("""
-                        SELECT COUNT(*) FROM user_qualifications 
-                        WHERE username = ? AND qualification_type = ?
-                    """, (final_signer2, required_qualification))
+                    c.execute(SIGNER_QUALIFIED_SQL, (final_signer2, required_qualification))
                     signer2_qualified = c.fetchone()[0] > 0
                     
                     if not signer1_qualified or not signer2_qualified:
                         unqualified_signers = []
                         if not signer1_qualified:
-                            c.execute("SELECT realname FROM users WHERE username = ?", (final_signer1,))
-                            signer1_realname_result = c.fetchone()
-                            signer1_realname = signer1_realname_result[0] if signer1_realname_result else final_signer1
+                            signer1_realname = user_directory.realname(final_signer1, db)
                             unqualified_signers.append(signer1_realname)
                         
                         if not signer2_qualified:
-                            c.execute("SELECT realname FROM users WHERE username = ?", (final_signer2,))
-                            signer2_realname_result = c.fetchone()
-                            signer2_realname = signer2_realname_result[0] if signer2_realname_result else final_signer2
+                            signer2_realname = user_directory.realname(final_signer2, db)
                             unqualified_signers.append(signer2_realname)
                         
                         raise HTTPException(
@@ -163,18 +137,44 @@ class ReportService:
                             detail=f"{report_type}需要{required_qualification}资质才能签字。以下签字人不具备资质：{', '.join(unqualified_signers)}"
                         )
             
+            # 验证全部通过后才放入存储；reports.file_paths 由 report_files 上的触发器维护
+            for item in staged:
+                # 按内容保存，相同文件只占一份磁盘空间
+                saved = store_staged(item, "report", db)
+                
+                uploader_realname = user_directory.realname(user["username"], db)
+                
+                upload_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                c.execute("""
+                    INSERT INTO report_files 
+                    (report_id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size, sha256)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    report_id, saved.path, saved.filename, user["username"],
+                    uploader_realname, upload_time, saved.size, saved.sha256
+                ))
+            
             c.execute("""
                 UPDATE reports 
                 SET reviewer1 = ?, reviewer2 = ?, reviewer3 = ?, 
-                    signer1 = ?, signer2 = ?, file_paths = ?
+                    signer1 = ?, signer2 = ?
                 WHERE id = ? AND project_id = ?
             """, (
                 final_reviewer1, final_reviewer2, final_reviewer3,
-                final_signer1, final_signer2, all_files,
+                final_signer1, final_signer2,
                 report_id, project_id
             ))
             
+            sync_report_participants(
+                c, report_id,
+                [final_reviewer1, final_reviewer2, final_reviewer3],
+                [final_signer1, final_signer2]
+            )
+            refresh_project_roles(c, project_id)
+            
             db.commit()
+            # 参与人变化会改变“我参与的项目”的总数
+            count_cache.clear()
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
         except HTTPException:
@@ -182,6 +182,8 @@ class ReportService:
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"更新报告失败: {str(e)}")
+        finally:
+            discard_staged(staged)
 
     async def generate_report_no(self, project_no, report_type, is_filing, reviewer1, reviewer2,
                         reviewer3, signer1, signer2, user, db):
@@ -219,31 +221,21 @@ class ReportService:
                 required_qualification = qualification_map.get(report_type)
                 if required_qualification:
                     # 验证第一个签字人资质
-                    c.execute("""
-                        SELECT COUNT(*) FROM user_qualifications 
-                        WHERE username = ? AND qualification_type = ?
-                    """, (signer1, required_qualification))
+                    c.execute(SIGNER_QUALIFIED_SQL, (signer1, required_qualification))
                     signer1_qualified = c.fetchone()[0] > 0
                     
                     # 验证第二个签字人资质
-                    c.execute("""
-                        SELECT COUNT(*) FROM user_qualifications 
-                        WHERE username = ? AND qualification_type = ?
-                    """, (signer2, required_qualification))
+                    c.execute(SIGNER_QUALIFIED_SQL, (signer2, required_qualification))
                     signer2_qualified = c.fetchone()[0] > 0
                     
                     if not signer1_qualified or not signer2_qualified:
                         unqualified_signers = []
                         if not signer1_qualified:
-                            c.execute("SELECT realname FROM users WHERE username = ?", (signer1,))
-                            signer1_realname_result = c.fetchone()
-                            signer1_realname = signer1_realname_result[0] if signer1_realname_result else signer1
+                            signer1_realname = user_directory.realname(signer1, db)
                             unqualified_signers.append(signer1_realname)
                         
                         if not signer2_qualified:
-                            c.execute("SELECT realname FROM users WHERE username = ?", (signer2,))
-                            signer2_realname_result = c.fetchone()
-                            signer2_realname = signer2_realname_result[0] if signer2_realname_result else signer2
+                            signer2_realname = user_directory.realname(signer2, db)
                             unqualified_signers.append(signer2_realname)
                         
                         raise HTTPException(
@@ -281,84 +273,35 @@ class ReportService:
                 raise HTTPException(status_code=400, detail=f"{report_type}需要选择是否备案")
             
             report_prefix = report_type_prefixes[report_type]
-            year_pattern = f"[{current_year}]字第"
-            
-            # 修改：按年度查询同类型报告
-            if report_type in filing_required_types and is_filing == "是":
-                pattern = f"%{report_prefix}{year_pattern}A%号"
-            else:
-                pattern = f"%{report_prefix}{year_pattern}%号"
-            
-            c.execute("""
-                SELECT report_no FROM reports 
-                WHERE report_no LIKE ? AND project_id = ?
-            """, (pattern, project_id))
-            
-            existing_reports = c.fetchall()
-            
-            existing_numbers = []
-            for report in existing_reports:
-                report_no = report[0]
-                
-                # 提取序号部分
-                if report_type in filing_required_types and is_filing == "是":
-                    # 格式：川鼎房估[2025]字第A001号
-                    prefix_len = len(f"川鼎{report_prefix}{year_pattern}A")
-                    number_part = report_no[prefix_len:-1]  # 去掉最后的"号"
-                else:
-                    # 格式：川鼎房估[2025]字第001号
-                    prefix_len = len(f"川鼎{report_prefix}{year_pattern}")
-                    number_part = report_no[prefix_len:-1]  # 去掉最后的"号"
-                
-                if number_part.isdigit():
-                    existing_numbers.append(int(number_part))
-            
-            # 找到下一个可用的序号
-            next_number = 1
-            while next_number in existing_numbers:
-                next_number += 1
+            filing = 1 if report_type in filing_required_types and is_filing == "是" else 0
             
-            sequence_no = f"{next_number:03d}"
-            
-            prefix = "川鼎"
-            middle = f"[{current_year}]字第"
-            
-            if report_type in filing_required_types and is_filing == "是":
-                suffix = f"A{sequence_no}号"
-            else:
-                suffix = f"{sequence_no}号"
-            
-            report_no = f"{prefix}{report_type_prefixes[report_type]}{middle}{suffix}"
+            # 在写事务中按 (类型, 年份, 备案) 索引分配最小的空缺序号
+            report_seq = allocate_report_seq(db, report_prefix, current_year, filing)
+            report_no = format_report_no(report_prefix, current_year, filing, report_seq)
             
             create_date = now.strftime("%Y-%m-%d %H:%M:%S")
             
             # 获取当前用户的真实姓名
-            c.execute("SELECT realname FROM users WHERE username = ?", (user["username"],))
-            creator_realname_result = c.fetchone()
-            creator_realname = creator_realname_result[0] if creator_realname_result else user["username"]
+            creator_realname = user_directory.realname(user["username"], db)
             
             c.execute("""
                 INSERT INTO reports (
                     report_no, project_id, report_type, file_paths, creator, creator_realname, create_date,
-                    reviewer1, reviewer2, reviewer3, signer1, signer2
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    reviewer1, reviewer2, reviewer3, signer1, signer2,
+                    report_prefix, report_year, is_filing, report_seq
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 report_no, project_id, report_type, "", user["username"], creator_realname, create_date,
-                reviewer1, reviewer2, reviewer3, signer1, signer2
+                reviewer1, reviewer2, reviewer3, signer1, signer2,
+                report_prefix, current_year, filing, report_seq
             ))
             
-            c.execute("SELECT report_numbers FROM projects WHERE project_no = ?", (project_no,))
-            result = c.fetchone()
-            existing_report_numbers = result[0] if result and result[0] else ""
-            
-            if existing_report_numbers:
-                new_report_numbers = existing_report_numbers + "," + report_no
-            else:
-                new_report_numbers = report_no
-            
-            c.execute("UPDATE projects SET report_numbers = ? WHERE project_no = ?", (new_report_numbers, project_no))
+            sync_report_participants(c, c.lastrowid, [reviewer1, reviewer2, reviewer3], [signer1, signer2])
+            refresh_project_roles(c, project_id)
+            # projects.report_numbers 由 reports 上的触发器维护
             
             db.commit()
+            count_cache.clear()
             
             return {"report_no": report_no}
             
@@ -382,15 +325,13 @@ class ReportService:
                 raise HTTPException(status_code=400, detail="只有进行中的项目可以删除报告")
             
             # 获取报告信息，包括创建人和报告号
-            c.execute("SELECT id, report_no, file_paths, creator FROM reports WHERE id = ? AND project_id = ?", (report_id, project_id))
+            c.execute("SELECT id, creator FROM reports WHERE id = ? AND project_id = ?", (report_id, project_id))
             result = c.fetchone()
             
             if not result:
                 raise HTTPException(status_code=404, detail="报告不存在")
             
-            report_no = result[1]  # 获取报告号
-            file_paths = result[2]
-            report_creator = result[3]
+            report_creator = result[1]
             
             # 权限验证：只有管理员、项目创建人、项目负责人或报告创建人可以删除
             c.execute("SELECT creator, project_leader FROM projects WHERE project_no = ?", (project_no,))
@@ -405,49 +346,25 @@ class ReportService:
                 raise HTTPException(status_code=403, detail="没有权限删除此报告")
             
             # 获取报告的所有文件信息（从 report_files 表）
-            c.execute("SELECT file_path FROM report_files WHERE report_id = ?", (report_id,))
-            file_records = c.fetchall()
-            
-            # 删除物理文件（从 report_files 表获取的文件路径）
-            for file_record in file_records:
-                file_path = file_record[0]
-                if file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        print(f"🗑️ 已删除文件: {file_path}")
-                    except Exception as e:
-                        print(f"⚠️ 删除文件失败 {file_path}: {e}")
-            
-            # 同时删除原有的文件路径中的文件（为了兼容性）
-            if file_paths:
-                for file_path in file_paths.split(','):
-                    if file_path.strip() and os.path.exists(file_path.strip()):
-                        try:
-                            os.remove(file_path.strip())
-                            print(f"🗑️ 已删除文件: {file_path.strip()}")
-                        except Exception as e:
-                            print(f"⚠️ 删除文件失败 {file_path.strip()}: {e}")
+            c.execute("SELECT file_path, sha256 FROM report_files WHERE report_id = ?", (report_id,))
+            file_records = [tuple(row) for row in c.fetchall()]
             
             # 删除 report_files 表中的文件记录
             c.execute("DELETE FROM report_files WHERE report_id = ?", (report_id,))
             
+            # 删除报告参与人记录
+            delete_report_participants(c, report_id)
+            
             # 从 reports 表中删除报告记录
             c.execute("DELETE FROM reports WHERE id = ? AND project_id = ?", (report_id, project_id))
-            
-            # 更新项目的 report_numbers 字段
-            c.execute("SELECT report_numbers FROM projects WHERE project_no = ?", (project_no,))
-            result = c.fetchone()
-            
-            if result and result[0]:
-                existing_report_numbers = result[0]
-                # 从报告号列表中移除被删除的报告号
-                report_list = existing_report_numbers.split(',')
-                if report_no in report_list:
-                    report_list.remove(report_no)
-                    new_report_numbers = ','.join(report_list) if report_list else ""
-                    c.execute("UPDATE projects SET report_numbers = ? WHERE project_no = ?", (new_report_numbers, project_no))
+            refresh_project_roles(c, project_id)
+            # projects.report_numbers 由 reports 上的触发器维护
             
             db.commit()
+            count_cache.clear()
+            
+            # 提交后再删除物理文件（其他记录仍引用同一内容时保留）
+            remove_files(db, file_records)
             
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
@@ -498,38 +415,21 @@ class ReportService:
                 raise HTTPException(status_code=403, detail="没有权限删除此文件")
             
             # 获取文件信息
-            c.execute("SELECT file_path FROM report_files WHERE id = ? AND report_id = ?", (file_id, report_id))
+            c.execute("SELECT file_path, sha256 FROM report_files WHERE id = ? AND report_id = ?", (file_id, report_id))
             file_result = c.fetchone()
             
             if not file_result:
                 raise HTTPException(status_code=404, detail="文件不存在")
             
-            file_path = file_result[0]
-            
-            # 删除物理文件
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    print(f"🗑️ 已删除文件: {file_path}")
-                except Exception as e:
-                    print(f"⚠️ 删除文件失败 {file_path}: {e}")
-            
             # 从数据库删除文件记录
+            # reports.file_paths 由 report_files 上的触发器维护
             c.execute("DELETE FROM report_files WHERE id = ? AND report_id = ?", (file_id, report_id))
             
-            # 更新报告的 file_paths 字段（为了兼容性）
-            c.execute("SELECT file_paths FROM reports WHERE id = ?", (report_id,))
-            report_file_paths = c.fetchone()
-            
-            if report_file_paths and report_file_paths[0]:
-                file_paths_list = report_file_paths[0].split(',')
-                if file_path in file_paths_list:
-                    file_paths_list.remove(file_path)
-                    new_file_paths = ','.join(file_paths_list) if file_paths_list else ""
-                    c.execute("UPDATE reports SET file_paths = ? WHERE id = ?", (new_file_paths, report_id))
-            
             db.commit()
             
+            # 提交后再删除物理文件（其他记录仍引用同一内容时保留）
+            remove_files(db, [tuple(file_result)])
+            
             return RedirectResponse(url=f"/project/{project_no}", status_code=303)
             
         except Exception as e:
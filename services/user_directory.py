@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from config import Config
+
+class UserDirectory:
+    """进程内的用户目录缓存：用户名 → 真实姓名、用户类型、资质
+
+    整个目录以不可变快照的形式保存，读取时无需加锁；
+    用户或资质变化时调用 invalidate()，下次读取时重新加载。
+    多进程部署时其他 worker 依靠 TTL 过期刷新。
+    """
+
+    def __init__(self, ttl=Config.USER_CACHE_TTL):
+        self.ttl = ttl
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db):
+        """从数据库全量加载用户目录（两条查询）"""
+        c = db.cursor()
+        c.execute("SELECT username, realname, user_type, status, session_version FROM users ORDER BY id")
+        users = {}
+        for row in c.fetchall():
+            users[row[0]] = {
+                "username": row[0],
+                "realname": row[1],
+                "user_type": row[2],
+                "status": row[3],
+                "session_version": row[4],
+                "qualifications": []
+            }
+
+        c.execute("SELECT username, qualification_type FROM user_qualifications ORDER BY id")
+        for row in c.fetchall():
+            if row[0] in users:
+                users[row[0]]["qualifications"].append(row[1])
+
+        with self._lock:
+            self._snapshot = users
+            self._loaded_at = time.monotonic()
+        return users
+
+    def invalidate(self):
+        """用户或资质变更后使缓存失效"""
+        with self._lock:
+            self._snapshot = None
+
+    def is_stale(self):
+        return self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def refresh(self, adb):
+        """异步路径中使用：缓存过期时在数据库线程中重新加载，避免阻塞事件循环"""
+        if self.is_stale():
+            await adb.run(self.load)
+
+    def _users(self, db) -> Dict[str, dict]:
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+            snapshot = self.load(db)
+        return snapshot
+
+    def get(self, username: str, db) -> Optional[dict]:
+        return self._users(db).get(username)
+
+    def lookup(self, username: str, connect) -> Optional[dict]:
+        """与 get 相同，但只在缓存过期时才调用 connect() 取连接（用于没有请求连接的会话校验）"""
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+            with connect() as conn:
+                snapshot = self.load(conn)
+        return snapshot.get(username)
+
+    def realname(self, username: str, db):
+        """用户名 → 真实姓名，用户不存在时返回用户名本身"""
+        entry = self._users(db).get(username)
+        return entry["realname"] if entry else username
+
+    def realnames(self, usernames, db) -> Dict[str, str]:
+        """批量查询真实姓名，只包含存在的用户"""
+        users = self._users(db)
+        return {name: users[name]["realname"] for name in usernames if name in users}
+
+    def all_users(self, db) -> List[dict]:
+        """按创建顺序返回所有用户"""
+        return list(self._users(db).values())
+
+user_directory = UserDirectory()
@@ -1,12 +1,97 @@
 from fastapi import HTTPException
-from fastapi.templating import Jinja2Templates
+from utils.templating import templates
 from datetime import datetime, timedelta
 import sqlite3
 from typing import Dict, List
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from database.async_db import AsyncConnection
+from database.loaders import Loaders, LazyRows
+from database.user_stats import get_user_stats
+from database.blobs import remove_files
+from utils.uploads import store_staged
+from services.user_directory import user_directory
+from utils.pagination import keyset_query, keyset_page, count_cache
+from database.search import project_filters, ranked_search_query, render_highlights
 
-templates = Jinja2Templates(directory="templates")
+
+# 用户参与的项目ID：项目负责人、市场部负责人、创建人，或任一报告的复核人/签字人
+# 来自预计算的 user_project_roles，按 username 主键前缀做范围扫描（参数为用户名）
+PARTICIPATED_PROJECT_IDS = """
+    SELECT project_id FROM user_project_roles WHERE username = ?
+"""
+
+# 用户项目页的筛选条件：responsible 我负责的，created 我创建的，participated 我参与的（参数为用户名）
+USER_PROJECT_CONDITIONS = {
+    "responsible": "p.project_leader = ?",
+    "created": "p.creator = ?",
+    "participated": f"p.id IN ({PARTICIPATED_PROJECT_IDS})",
+}
+
+# 用户项目页（{condition} 取自 USER_PROJECT_CONDITIONS）
+USER_PROJECTS_SQL = """
+    SELECT p.*, 
+        (SELECT COUNT(*) FROM reports r WHERE r.project_id = p.id) as report_count
+    FROM projects p
+    WHERE {condition}
+    ORDER BY p.create_date DESC
+"""
+
+# 用户报告页：created 我创建的，reviewed 我复核的，signed 我签字的（参数为用户名）
+_USER_REPORTS_SELECT = """
+    SELECT r.*, p.name as project_name, p.project_no
+    FROM reports r
+    JOIN projects p ON r.project_id = p.id
+"""
+USER_REPORTS_SQL = {
+    "created": _USER_REPORTS_SELECT + """
+    WHERE r.creator = ?
+    ORDER BY r.create_date DESC
+    """,
+    "reviewed": _USER_REPORTS_SELECT + """
+    WHERE r.id IN (
+        SELECT report_id FROM report_participants 
+        WHERE username = ? AND role = 'reviewer'
+    )
+    ORDER BY r.create_date DESC
+    """,
+    "signed": _USER_REPORTS_SELECT + """
+    WHERE r.id IN (
+        SELECT report_id FROM report_participants 
+        WHERE username = ? AND role = 'signer'
+    )
+    ORDER BY r.create_date DESC
+    """,
+}
+
+# 删除用户前检查关联的项目（参数为同一个用户名重复 3 次）
+USER_PROJECT_REFS_SQL = "SELECT COUNT(*) FROM projects WHERE creator = ? OR project_leader = ? OR market_leader = ?"
+
+def company_qualifications_query(category=None):
+    """公司资质列表的查询，返回 (sql, params)"""
+    where, params = "", []
+    if category and category != 'all':
+        where, params = "category = ? AND ", [category]
+    return f"""
+        SELECT id, category, owner, file_path, file_name,
+            datetime(update_time, 'localtime') as update_time,
+            uploader_username, status
+        FROM company_qualifications 
+        WHERE {where}status = 'active'
+        ORDER BY update_time DESC
+    """, params
+
+def active_files_query(table, category=None):
+    """报告模板（report_templates）/ 评估准则（evaluation_standards）列表的查询，返回 (sql, params)"""
+    query = f"SELECT id, category, owner, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size FROM {table} WHERE status = 'active'"
+    params = []
+    
+    if category and category != 'all':
+        query += " AND category = ?"
+        params.append(category)
+    
+    query += " ORDER BY upload_time DESC"
+    return query, params
 
 class UserService:
     def __init__(self):
@@ -68,6 +153,7 @@ class UserService:
         update_query = f"UPDATE users SET {', '.join(update_fields)} WHERE username = ?"
         c.execute(update_query, update_values)
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "个人信息更新成功"}
 
@@ -94,118 +180,55 @@ class UserService:
         # new_password_hash = hash_password(new_password)
         new_password_hash = new_password  # 暂时直接存储，实际应用中应该使用哈希
         
-        c.execute("UPDATE users SET password = ? WHERE username = ?", (new_password_hash, username))
+        # 会话版本加一：此前在其他设备上登录的会话全部失效
+        c.execute("UPDATE users SET password = ?, session_version = session_version + 1 WHERE username = ?",
+                  (new_password_hash, username))
+        session_version = c.execute("SELECT session_version FROM users WHERE username = ?", (username,)).fetchone()[0]
         db.commit()
+        user_directory.invalidate()
         
-        return {"message": "密码修改成功"}
+        return {"message": "密码修改成功", "session_version": session_version}
 
     async def get_user_dashboard_data(self, request, user, db):
-        """获取用户Dashboard数据"""
-        c = db.cursor()
-        username = user["username"]
-        
-        # 1. 项目统计数据
-        # 负责的项目数（项目负责人）
-        c.execute("""
-            SELECT status, COUNT(*) FROM projects 
-            WHERE project_leader = ? 
-            GROUP BY status
-        """, (username,))
-        responsible_projects = dict(c.fetchall())
-        
-        # 参与的项目数（项目负责人、市场部负责人、创建人、复核人或签字人）
-        c.execute("""
-            SELECT p.status, COUNT(DISTINCT p.id) 
-            FROM projects p
-            LEFT JOIN reports r ON p.id = r.project_id
-            WHERE p.project_leader = ? 
-            OR p.market_leader = ? 
-            OR p.creator = ?
-            OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-            OR r.signer1 = ? OR r.signer2 = ?
-            GROUP BY p.status
-        """, (username, username, username, username, username, username, username, username))
-        participated_projects = dict(c.fetchall())
-        
-        # 2. 报告统计数据
-        # 创建的报告数
-        c.execute("SELECT COUNT(*) FROM reports WHERE creator = ?", (username,))
-        created_reports = c.fetchone()[0]
-        
-        # 复核的报告数
-        c.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE reviewer1 = ? OR reviewer2 = ? OR reviewer3 = ?
-        """, (username, username, username))
-        reviewed_reports = c.fetchone()[0]
-        
-        # 签字的报告数
-        c.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE signer1 = ? OR signer2 = ?
-        """, (username, username))
-        signed_reports = c.fetchone()[0]
-        
-        # 3. 获取用户参与的所有项目详细信息
-        user_projects = await self.get_user_all_projects(username, db)
-        
-        return {
-            "responsible_projects": responsible_projects,
-            "participated_projects": participated_projects,
-            "created_reports": created_reports,
-            "reviewed_reports": reviewed_reports,
-            "signed_reports": signed_reports,
-            "user_projects": user_projects
-        }
+        """获取用户Dashboard数据（读取 user_stats 中该用户的一行）"""
+        adb = AsyncConnection(db)
+        # 负责/参与的项目按状态计数，创建/复核/签字的报告数；
+        # 由触发器随项目和报告的写入增量维护，见 database/user_stats.py
+        # 项目列表由页面通过 /user_dashboard/projects 分页加载
+        return await adb.run(get_user_stats, user["username"])
 
     async def get_user_all_projects(self, username: str, db):
         """获取用户参与的所有项目详细信息"""
-        c = db.cursor()
+        adb = AsyncConnection(db)
         
         # 获取用户参与的所有项目（项目负责人、市场部负责人、创建人、复核人或签字人）
-        c.execute("""
-            SELECT DISTINCT p.*
+        rows = await adb.fetchall(f"""
+            SELECT p.*
             FROM projects p
-            LEFT JOIN reports r ON p.id = r.project_id
-            WHERE p.project_leader = ? 
-               OR p.market_leader = ? 
-               OR p.creator = ?
-               OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-               OR r.signer1 = ? OR r.signer2 = ?
+            WHERE p.id IN ({PARTICIPATED_PROJECT_IDS})
             ORDER BY p.create_date DESC
-        """, (username, username, username, username, username, username, username, username))
+        """, (username,))
         
         projects = []
-        rows = c.fetchall()
         
         if not rows:
             return projects
-            
-        # 获取列名
-        column_names = [col[0] for col in c.description]
         
         # 收集所有需要查询的用户名
         usernames_to_query = set()
         for row in rows:
-            project_dict = dict(zip(column_names, row))
-            if project_dict.get("project_leader"):
-                usernames_to_query.add(project_dict["project_leader"])
-            if project_dict.get("market_leader"):
-                usernames_to_query.add(project_dict["market_leader"])
-        
-        # 批量查询用户真实姓名 - 使用新的游标
-        user_realnames = {}
-        if usernames_to_query:
-            c2 = db.cursor()
-            placeholders = ','.join('?' * len(usernames_to_query))
-            c2.execute(f"SELECT username, realname FROM users WHERE username IN ({placeholders})", list(usernames_to_query))
-            for row in c2.fetchall():
-                user_realnames[row[0]] = row[1]
-            c2.close()
+            if row["project_leader"]:
+                usernames_to_query.add(row["project_leader"])
+            if row["market_leader"]:
+                usernames_to_query.add(row["market_leader"])
+        
+        # 批量查询用户真实姓名
+        await user_directory.refresh(adb)
+        user_realnames = user_directory.realnames(usernames_to_query, db)
         
         # 处理每个项目
         for row in rows:
-            project_dict = dict(zip(column_names, row))
+            project_dict = dict(row)
             
             # 设置项目负责人真实姓名
             if project_dict.get("project_leader"):
@@ -235,76 +258,17 @@ class UserService:
         
         return projects
 
-    async def get_user_projects_data(self, request, user, project_type, db):
-        """获取用户项目数据"""
-        c = db.cursor()
-        username = user["username"]
-        
-        if project_type == "responsible":
-            # 我负责的项目（项目负责人）
-            c.execute("""
-                SELECT p.*, 
-                    (SELECT COUNT(*) FROM reports r WHERE r.project_id = p.id) as report_count
-                FROM projects p
-                WHERE p.project_leader = ?
-                ORDER BY p.create_date DESC
-            """, (username,))
-        elif project_type == "created":
-            # 我创建的项目
-            c.execute("""
-                SELECT p.*, 
-                    (SELECT COUNT(*) FROM reports r WHERE r.project_id = p.id) as report_count
-                FROM projects p
-                WHERE p.creator = ?
-                ORDER BY p.create_date DESC
-            """, (username,))
-        else:  # participated
-            # 我参与的项目（项目负责人、市场部负责人、创建人、复核人或签字人）
-            c.execute("""
-                SELECT DISTINCT p.*, 
-                    (SELECT COUNT(*) FROM reports r WHERE r.project_id = p.id) as report_count
-                FROM projects p
-                LEFT JOIN reports r ON p.id = r.project_id
-                WHERE p.project_leader = ? 
-                   OR p.market_leader = ? 
-                   OR p.creator = ?
-                   OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-                   OR r.signer1 = ? OR r.signer2 = ?
-                ORDER BY p.create_date DESC
-            """, (username, username, username, username, username, username, username, username))
-        
-        projects = []
-        rows = c.fetchall()
-        
-        if not rows:
-            return projects
-            
-        column_names = [col[0] for col in c.description]
-        
-        # 收集所有需要查询的用户名
-        usernames_to_query = set()
-        for row in rows:
-            project_dict = dict(zip(column_names, row))
-            if project_dict.get("project_leader"):
-                usernames_to_query.add(project_dict["project_leader"])
-        
-        # 批量查询用户真实姓名 - 使用新的游标
-        user_realnames = {}
-        if usernames_to_query:
-            c2 = db.cursor()
-            placeholders = ','.join('?' * len(usernames_to_query))
-            c2.execute(f"SELECT username, realname FROM users WHERE username IN ({placeholders})", list(usernames_to_query))
-            for row in c2.fetchall():
-                user_realnames[row[0]] = row[1]
-            c2.close()
+    def _iter_user_projects(self, conn, username, project_type):
+        """逐行产出用户项目页的项目（附报告数和负责人真实姓名），供 LazyRows 在渲染时读取"""
+        condition = USER_PROJECT_CONDITIONS.get(project_type, USER_PROJECT_CONDITIONS["participated"])
+        rows = conn.execute(USER_PROJECTS_SQL.format(condition=condition), (username,))
         
-        # 处理每个项目
         for row in rows:
-            project_dict = dict(zip(column_names, row))
+            project_dict = dict(row)
             
-            # 设置项目负责人真实姓名
+            # 设置项目负责人真实姓名（用户目录缓存）
             if project_dict.get("project_leader"):
-                project_dict["project_leader_realname"] = user_realnames.get(project_dict["project_leader"], project_dict["project_leader"])
+                project_dict["project_leader_realname"] = user_directory.realname(project_dict["project_leader"], conn)
             else:
                 project_dict["project_leader_realname"] = ""
             
@@ -320,42 +284,20 @@ class UserService:
             project_dict.setdefault("start_date", "")
             project_dict.setdefault("status", "active")
             
-            projects.append(project_dict)
-        
-        return projects
+            yield project_dict
+
+    async def get_user_projects_data(self, request, user, project_type, db):
+        """获取用户项目数据：返回 LazyRows，页面渲染到列表时才逐行读取"""
+        await user_directory.refresh(AsyncConnection(db))
+        return LazyRows(self._iter_user_projects, user["username"], project_type)
 
     async def get_user_reports_data(self, request, user, report_type, db):
         """获取用户报告数据"""
         c = db.cursor()
         username = user["username"]
         
-        if report_type == "created":
-            # 我创建的报告
-            c.execute("""
-                SELECT r.*, p.name as project_name, p.project_no
-                FROM reports r
-                JOIN projects p ON r.project_id = p.id
-                WHERE r.creator = ?
-                ORDER BY r.create_date DESC
-            """, (username,))
-        elif report_type == "reviewed":
-            # 我复核的报告
-            c.execute("""
-                SELECT r.*, p.name as project_name, p.project_no
-                FROM reports r
-                JOIN projects p ON r.project_id = p.id
-                WHERE r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-                ORDER BY r.create_date DESC
-            """, (username, username, username))
-        else:  # signed
-            # 我签字的报告
-            c.execute("""
-                SELECT r.*, p.name as project_name, p.project_no
-                FROM reports r
-                JOIN projects p ON r.project_id = p.id
-                WHERE r.signer1 = ? OR r.signer2 = ?
-                ORDER BY r.create_date DESC
-            """, (username, username))
+        # 我创建的 / 我复核的 / 我签字的报告，其他取值按签字处理
+        c.execute(USER_REPORTS_SQL.get(report_type, USER_REPORTS_SQL["signed"]), (username,))
         
         reports = []
         for row in c.fetchall():
@@ -365,86 +307,55 @@ class UserService:
         return reports
 
     async def get_user_projects_paginated(self, username: str, page: int = 1, limit: int = 20, 
-                                    search: str = None, status: str = None, db=None):
-        """分页获取用户参与的项目（支持后端搜索）"""
+                                    search: str = None, status: str = None, cursor: str = None,
+                                    with_count: bool = True, db=None):
+        """分页获取用户参与的项目（支持后端搜索和游标翻页）"""
         try:
             c = db.cursor()
             
-            # 计算偏移量
-            offset = (page - 1) * limit
-            
-            # 构建基础查询 - 用户参与的所有项目
-            base_query = """
-                SELECT DISTINCT p.*
-                FROM projects p
-                LEFT JOIN reports r ON p.id = r.project_id
-                WHERE (p.project_leader = ? OR p.market_leader = ? OR p.creator = ?
-                    OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-                    OR r.signer1 = ? OR r.signer2 = ?)
-            """
-            
-            # 构建计数查询
-            count_query = """
-                SELECT COUNT(DISTINCT p.id)
-                FROM projects p
-                LEFT JOIN reports r ON p.id = r.project_id
-                WHERE (p.project_leader = ? OR p.market_leader = ? OR p.creator = ?
-                    OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-                    OR r.signer1 = ? OR r.signer2 = ?)
-            """
-            
-            # 查询参数
-            params = [username] * 8  # 8个位置参数
-            
-            # 添加搜索条件（后端实现搜索）
-            if search and search.strip():
-                search_term = f"%{search.strip()}%"
-                base_query += " AND (p.project_no LIKE ? OR p.name LIKE ? OR p.client_name LIKE ?)"
-                count_query += " AND (p.project_no LIKE ? OR p.name LIKE ? OR p.client_name LIKE ?)"
-                params.extend([search_term, search_term, search_term])
-            
-            # 添加状态筛选条件
-            if status and status != 'all':
-                base_query += " AND p.status = ?"
-                count_query += " AND p.status = ?"
-                params.append(status)
-            
-            # 添加排序和分页
-            base_query += " ORDER BY p.create_date DESC LIMIT ? OFFSET ?"
-            
-            # 复制参数用于计数查询
-            count_params = params.copy()
-            
-            # 添加分页参数到数据查询
-            params.extend([limit, offset])
-            
-            # 执行计数查询
-            c.execute(count_query, count_params)
-            total_count = c.fetchone()[0]
-            
-            # 执行数据查询
-            c.execute(base_query, params)
-            rows = c.fetchall()
+            # 构建筛选条件 - 用户参与的所有项目，再加上搜索（后端实现）和状态筛选
+            from_clause, where, params, match = project_filters(
+                search, status, where=f" WHERE p.id IN ({PARTICIPATED_PROJECT_IDS})", params=[username])
+            
+            # 总数按筛选条件缓存，翻页时不重复计数
+            total_count = None
+            if with_count:
+                def count():
+                    c.execute("SELECT COUNT(*)" + from_clause + where, params)
+                    return c.fetchone()[0]
+                total_count = count_cache.get_or_count(("user", where, tuple(params)), count)
+            
+            if match:
+                # 全文检索结果按相关度排序，只支持页码翻页
+                c.execute(*ranked_search_query(from_clause, where, params, limit, (page - 1) * limit))
+                column_names = [col[0] for col in c.description]
+                rows = [render_highlights(dict(zip(column_names, row))) for row in c.fetchall()]
+                next_cursor = prev_cursor = None
+            else:
+                # 执行数据查询（游标分页）
+                query, query_params, direction = keyset_query(
+                    "SELECT p.*" + from_clause + where, params, cursor, limit, page)
+                c.execute(query, query_params)
+                column_names = [col[0] for col in c.description]
+                rows = [dict(zip(column_names, row)) for row in c.fetchall()]
+                rows, next_cursor, prev_cursor = keyset_page(rows, limit, direction, page)
             
             if not rows:
                 return {
                     "projects": [],
-                    "total_count": 0,
-                    "total_pages": 0,
+                    "total_count": 0 if with_count else None,
+                    "total_pages": 0 if with_count else None,
                     "current_page": page,
-                    "page_size": limit
+                    "page_size": limit,
+                    "next_cursor": None,
+                    "prev_cursor": None
                 }
             
-            # 获取列名
-            column_names = [col[0] for col in c.description]
-            
             # 收集所有需要查询的用户名
             usernames_to_query = set()
             projects = []
             
-            for row in rows:
-                project_dict = dict(zip(column_names, row))
-                
+            for project_dict in rows:
                 if project_dict.get("project_leader"):
                     usernames_to_query.add(project_dict["project_leader"])
                 if project_dict.get("market_leader"):
@@ -452,16 +363,8 @@ class UserService:
                 
                 projects.append(project_dict)
             
-            # 批量查询用户真实姓名
-            user_realnames = {}
-            if usernames_to_query:
-                c2 = db.cursor()
-                placeholders = ','.join('?' * len(usernames_to_query))
-                c2.execute(f"SELECT username, realname FROM users WHERE username IN ({placeholders})", 
-                        list(usernames_to_query))
-                for row in c2.fetchall():
-                    user_realnames[row[0]] = row[1]
-                c2.close()
+            # 从用户目录缓存中查询真实姓名
+            user_realnames = user_directory.realnames(usernames_to_query, db)
             
             # 处理每个项目，添加真实姓名
             for project in projects:
@@ -492,16 +395,20 @@ class UserService:
                 project.setdefault("status", "active")
             
             # 计算总页数
-            total_pages = (total_count + limit - 1) // limit  # 向上取整
+            total_pages = (total_count + limit - 1) // limit if total_count is not None else None  # 向上取整
             
             return {
                 "projects": projects,
                 "total_count": total_count,
                 "total_pages": total_pages,
                 "current_page": page,
-                "page_size": limit
+                "page_size": limit,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"分页获取用户项目失败: {str(e)}")
             raise HTTPException(status_code=500, detail=f"获取项目列表失败: {str(e)}")
@@ -534,33 +441,26 @@ class UserService:
         
         return qualifications
     
+    async def get_users_qualifications(self, usernames: List[str], db):
+        """批量获取多个用户的资质信息：{username: [资质, ...]}（一条查询）"""
+        loaders = Loaders(AsyncConnection(db))
+        grouped = await loaders.user_qualifications.load_many(usernames)
+        return {
+            username: [
+                {key: value for key, value in qual.items() if key != "username"}
+                for qual in qualifications
+            ]
+            for username, qualifications in grouped.items()
+        }
+    
     async def get_user_basic_stats(self, user, db):
         """获取用户基本统计信息"""
-        c = db.cursor()
-        username = user["username"]
-        
-        # 负责的项目数
-        c.execute("SELECT COUNT(*) FROM projects WHERE project_leader = ?", (username,))
-        responsible_projects = c.fetchone()[0]
-        
-        # 参与的项目数
-        c.execute("""
-            SELECT COUNT(DISTINCT p.id) FROM projects p
-            LEFT JOIN reports r ON p.id = r.project_id
-            WHERE p.project_leader = ? OR p.market_leader = ? OR p.creator = ?
-            OR r.reviewer1 = ? OR r.reviewer2 = ? OR r.reviewer3 = ?
-            OR r.signer1 = ? OR r.signer2 = ?
-        """, (username, username, username, username, username, username, username, username))
-        participated_projects = c.fetchone()[0]
-        
-        # 创建的报告数
-        c.execute("SELECT COUNT(*) FROM reports WHERE creator = ?", (username,))
-        created_reports = c.fetchone()[0]
+        stats = get_user_stats(db, user["username"])
         
         return {
-            "responsible_projects": responsible_projects,
-            "participated_projects": participated_projects,
-            "created_reports": created_reports
+            "responsible_projects": sum(stats["responsible_projects"].values()),
+            "participated_projects": sum(stats["participated_projects"].values()),
+            "created_reports": stats["created_reports"]
         }
 
     async def get_all_users(self, db):
@@ -626,6 +526,7 @@ class UserService:
         insert_query = f"INSERT INTO users ({', '.join(insert_fields)}) VALUES ({', '.join(placeholders)})"
         c.execute(insert_query, insert_values)
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "用户创建成功"}
 
@@ -654,10 +555,15 @@ class UserService:
         # 添加用户名作为WHERE条件
         update_values.append(username)
         
+        # 用户类型或状态变化时使已签发的会话失效，令牌中的旧用户类型不再可用
+        if "user_type" in user_data or "status" in user_data:
+            update_fields.append("session_version = session_version + 1")
+        
         # 执行更新
         update_query = f"UPDATE users SET {', '.join(update_fields)}, update_time = CURRENT_TIMESTAMP WHERE username = ?"
         c.execute(update_query, update_values)
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "用户信息更新成功"}
 
@@ -675,8 +581,7 @@ class UserService:
             raise HTTPException(status_code=400, detail="不能删除当前登录用户")
         
         # 检查用户是否有关联的项目
-        c.execute("SELECT COUNT(*) FROM projects WHERE creator = ? OR project_leader = ? OR market_leader = ?", 
-                (username, username, username))
+        c.execute(USER_PROJECT_REFS_SQL, (username, username, username))
         project_count = c.fetchone()[0]
         
         if project_count > 0:
@@ -684,9 +589,9 @@ class UserService:
         
         # 检查用户是否有关联的报告
         c.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE creator = ? OR reviewer1 = ? OR reviewer2 = ? OR reviewer3 = ? OR signer1 = ? OR signer2 = ?
-        """, (username, username, username, username, username, username))
+            SELECT (SELECT COUNT(*) FROM reports WHERE creator = ?)
+                 + (SELECT COUNT(*) FROM report_participants WHERE username = ?)
+        """, (username, username))
         report_count = c.fetchone()[0]
         
         if report_count > 0:
@@ -698,6 +603,7 @@ class UserService:
         # 删除用户
         c.execute("DELETE FROM users WHERE username = ?", (username,))
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "用户删除成功"}
 
@@ -711,9 +617,12 @@ class UserService:
             raise HTTPException(status_code=404, detail="用户不存在")
         
         # 更新密码（实际应用中应该使用密码哈希）
-        c.execute("UPDATE users SET password = ?, update_time = CURRENT_TIMESTAMP WHERE username = ?", 
-                (new_password, username))
+        c.execute("""
+            UPDATE users SET password = ?, session_version = session_version + 1, update_time = CURRENT_TIMESTAMP
+            WHERE username = ?
+        """, (new_password, username))
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "密码重置成功"}
 
@@ -782,6 +691,7 @@ class UserService:
             qualification_data.get("expiry_date")
         ))
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "资质添加成功"}
 
@@ -817,6 +727,7 @@ class UserService:
             """, (username, qualification_type))
         
         db.commit()
+        user_directory.invalidate()
         
         return {"message": "资质删除成功"}
 
@@ -847,24 +758,7 @@ class UserService:
         try:
             c = db.cursor()
             
-            if category and category != 'all':
-                c.execute("""
-                    SELECT id, category, owner, file_path, file_name,
-                        datetime(update_time, 'localtime') as update_time,
-                        uploader_username, status
-                    FROM company_qualifications 
-                    WHERE category = ? AND status = 'active'
-                    ORDER BY update_time DESC
-                """, (category,))
-            else:
-                c.execute("""
-                    SELECT id, category, owner, file_path, file_name,
-                        datetime(update_time, 'localtime') as update_time,
-                        uploader_username, status
-                    FROM company_qualifications 
-                    WHERE status = 'active'
-                    ORDER BY update_time DESC
-                """)
+            c.execute(*company_qualifications_query(category))
             
             qualifications = []
             for row in c.fetchall():
@@ -876,8 +770,8 @@ class UserService:
             print(f"获取公司资质失败: {e}")
             return []
 
-    async def add_company_qualification(self, qualification_data: Dict, db=None):
-        """添加公司资质"""
+    async def add_company_qualification(self, qualification_data: Dict, staged, db=None):
+        """添加公司资质（staged 为已写入临时目录的证书文件，检查通过后才放入存储）"""
         try:
             c = db.cursor()
             
@@ -895,17 +789,20 @@ class UserService:
             if not owner:
                 owner = "公司"
             
+            saved = store_staged(staged, "company_qualification", db)
+            
             # 插入新资质
             c.execute("""
                 INSERT INTO company_qualifications 
-                (category, owner, file_path, file_name, uploader_username)
-                VALUES (?, ?, ?, ?, ?)
+                (category, owner, file_path, file_name, uploader_username, sha256)
+                VALUES (?, ?, ?, ?, ?, ?)
             """, (
                 qualification_data.get("category"),
                 owner,  # 使用处理后的拥有人
-                qualification_data.get("file_path"),
+                saved.path,
                 qualification_data.get("file_name"),
-                qualification_data.get("uploader_username")
+                qualification_data.get("uploader_username"),
+                saved.sha256
             ))
             
             db.commit()
@@ -921,18 +818,18 @@ class UserService:
             c = db.cursor()
             
             # 检查资质是否存在
-            c.execute("SELECT id, file_path FROM company_qualifications WHERE id = ?", (qualification_id,))
+            c.execute("SELECT id, file_path, sha256 FROM company_qualifications WHERE id = ?", (qualification_id,))
             result = c.fetchone()
             if not result:
                 raise HTTPException(status_code=404, detail="资质不存在")
             
-            # 获取文件路径用于删除物理文件
-            file_path = result[1]
-            
             # 硬删除数据库记录
             c.execute("DELETE FROM company_qualifications WHERE id = ?", (qualification_id,))
             db.commit()
             
+            # 提交后删除物理文件（其他记录仍引用同一内容时保留）
+            remove_files(db, [(result[1], result[2])])
+            
             return {"message": "公司资质删除成功"}
         except HTTPException:
             raise
@@ -955,15 +852,7 @@ class UserService:
         try:
             c = db.cursor()
             
-            query = "SELECT id, category, owner, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size FROM report_templates WHERE status = 'active'"
-            params = []
-            
-            if category and category != 'all':
-                query += " AND category = ?"
-                params.append(category)
-            
-            query += " ORDER BY upload_time DESC"
-            c.execute(query, params)
+            c.execute(*active_files_query("report_templates", category))
             
             templates = []
             for row in c.fetchall():
@@ -979,15 +868,7 @@ class UserService:
         try:
             c = db.cursor()
             
-            query = "SELECT id, category, owner, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size FROM evaluation_standards WHERE status = 'active'"
-            params = []
-            
-            if category and category != 'all':
-                query += " AND category = ?"
-                params.append(category)
-            
-            query += " ORDER BY upload_time DESC"
-            c.execute(query, params)
+            c.execute(*active_files_query("evaluation_standards", category))
             
             standards = []
             for row in c.fetchall():
@@ -0,0 +1,72 @@
+"""测试环境
+
+数据库、上传文件、模板缓存等都指向临时目录，不会改动仓库中的 db.sqlite3 和 static/uploads。
+必须在导入 database.database 之前修改 Config（导入时会创建连接池并执行迁移）。
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # 模板、静态文件等按相对路径查找
+
+TEST_DIR = tempfile.mkdtemp(prefix="asset_manager_test_")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+from config import Config
+
+Config.DATABASE_PATH = os.path.join(TEST_DIR, "db.sqlite3")
+Config.UPLOAD_FOLDER = os.path.join(TEST_DIR, "uploads")
+Config.BLOB_STORE_DIR = os.path.join(TEST_DIR, "uploads", "blobs")
+Config.TEMPLATE_CACHE_DIR = os.path.join(TEST_DIR, "jinja")
+Config.SLOW_QUERY_LOG = os.path.join(TEST_DIR, "slow_queries.log")
+
+@pytest.fixture
+def make_db(tmp_path):
+    """在临时文件上创建独立的连接池（已执行全部迁移）"""
+    from database.database import Database
+
+    databases = []
+
+    def factory(**kwargs):
+        db = Database(db_path=str(tmp_path / f"db{len(databases)}.sqlite3"), **kwargs)
+        databases.append(db)
+        return db
+
+    yield factory
+    for db in databases:
+        db.close_all()
+
+def add_user(username, user_type="user", password="secret", realname=None):
+    """在测试数据库中创建用户（已存在时忽略）"""
+    from database.database import db_manager
+    from services.user_directory import user_directory
+
+    with db_manager.writer() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO users (username, password, realname, user_type) VALUES (?, ?, ?, ?)",
+            (username, password, realname or username, user_type)
+        )
+        conn.commit()
+    user_directory.invalidate()
+
+def login(client, username, password="secret"):
+    response = client.post("/login", data={"username": username, "password": password}, follow_redirects=False)
+    assert response.status_code == 303, response.text
+    return client
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    return main.app
+
+@pytest.fixture(scope="session")
+def admin_client(app):
+    """以管理员身份登录的客户端（整个测试会话共用一次应用启动）"""
+    from fastapi.testclient import TestClient
+
+    add_user("admin", "admin")
+    with TestClient(app) as client:
+        yield login(client, "admin")
@@ -0,0 +1,58 @@
+import os
+from config import Config
+from utils.assets import AssetManifest
+
+def _manifest(tmp_path):
+    source = tmp_path / "assets"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "page.css").write_text("body { color: red; }")
+    return AssetManifest(str(source), str(tmp_path / "dist"))
+
+def _count_scans(monkeypatch, manifest):
+    calls = []
+    original = manifest._source_mtimes
+    monkeypatch.setattr(manifest, "_source_mtimes", lambda: calls.append(1) or original())
+    return calls
+
+def test_urls_do_not_touch_sources_without_autoreload(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASSET_AUTORELOAD", False)
+    manifest = _manifest(tmp_path)
+    url = manifest.url("css/page.css")
+    assert url.startswith("/static/dist/css/page.") and os.path.exists(tmp_path / "dist" / url[len("/static/dist/"):])
+
+    calls = _count_scans(monkeypatch, manifest)
+    for _ in range(50):
+        manifest.url("css/page.css")
+    assert calls == []
+
+def test_autoreload_is_throttled_and_picks_up_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASSET_AUTORELOAD", True)
+    monkeypatch.setattr(Config, "ASSET_RELOAD_INTERVAL", 3600)
+    manifest = _manifest(tmp_path)
+    manifest.build()
+    old_url = manifest.url("css/page.css")
+
+    calls = _count_scans(monkeypatch, manifest)
+    for _ in range(50):
+        manifest.url("css/page.css")
+    assert len(calls) <= 1
+
+    (tmp_path / "assets" / "css" / "page.css").write_text("body { color: blue; }")
+    monkeypatch.setattr(Config, "ASSET_RELOAD_INTERVAL", 0)
+    assert manifest.url("css/page.css") != old_url
+
+def test_previous_builds_are_kept(tmp_path, monkeypatch):
+    """缓存的旧页面和滚动重启中的旧 worker 仍引用上一次构建的文件"""
+    monkeypatch.setattr(Config, "ASSET_KEEP_BUILDS", 2)
+    source = tmp_path / "assets" / "css" / "page.css"
+    urls = []
+    for color in ("red", "blue", "green"):
+        source.parent.mkdir(parents=True, exist_ok=True)
+        source.write_text(f"body {{ color: {color}; }}")
+        manifest = AssetManifest(str(tmp_path / "assets"), str(tmp_path / "dist"))
+        manifest.build()
+        manifest.build()  # 内容没变的重复构建（如重启）不会挤掉历史
+        urls.append(manifest.url("css/page.css"))
+
+    exists = [os.path.exists(tmp_path / "dist" / url[len("/static/dist/"):]) for url in urls]
+    assert exists == [False, True, True]
@@ -0,0 +1,36 @@
+import asyncio
+from database.async_db import AsyncDatabase, db_executor
+
+def test_checkout_waiters_do_not_starve_statement_threads(make_db):
+    """等待连接的请求多于语句线程时，持有连接的请求仍能执行语句并归还连接"""
+    db = make_db(pool_size=1, pool_timeout=3)
+    adb_pool = AsyncDatabase(db)
+    waiters = db_executor._max_workers * 3
+
+    async def use_connection(i):
+        async with adb_pool.connection(readonly=True) as adb:
+            await adb.fetchone("SELECT ?", (i,))
+            await asyncio.sleep(0.001)
+            row = await adb.fetchone("SELECT ?", (i,))
+            return row[0]
+
+    async def main():
+        return await asyncio.gather(*(use_connection(i) for i in range(waiters)))
+
+    assert asyncio.run(main()) == list(range(waiters))
+    assert db.pool_stats()["timeouts"] == 0
+
+def test_writer_connection_is_rolled_back_on_error(make_db):
+    db = make_db()
+    adb_pool = AsyncDatabase(db)
+
+    async def main():
+        try:
+            async with adb_pool.connection() as adb:
+                await adb.execute("INSERT INTO users (username, password, realname, user_type) VALUES ('a', 'p', 'A', 'user')")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        return await adb_pool.fetchone("SELECT COUNT(*) FROM users")
+
+    assert asyncio.run(main())[0] == 0
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import hashlib
+import pytest
+from database.blobs import store_blob, release_blobs, collect_garbage, blob_path, temp_dir, GC_GRACE_SECONDS
+
+def _temp_file(content):
+    os.makedirs(temp_dir(), exist_ok=True)
+    path = os.path.join(temp_dir(), hashlib.md5(content + os.urandom(8)).hexdigest() + ".part")
+    with open(path, "wb") as f:
+        f.write(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+def _store(conn, content, ext=".pdf"):
+    temp_path, sha256 = _temp_file(content)
+    path, created = store_blob(conn, temp_path, sha256, len(content), ext)
+    assert not os.path.exists(temp_path)
+    return path, sha256, created
+
+def _add_contract_file(conn, path, sha256):
+    return conn.execute("""
+        INSERT INTO contract_files (project_id, file_path, file_name, uploader_username, uploader_realname, upload_time, sha256)
+        VALUES (1, ?, 'a.pdf', 'u', 'U', '2025-01-01 00:00:00', ?)
+    """, (path, sha256)).lastrowid
+
+def _ref_count(conn, sha256):
+    row = conn.execute("SELECT ref_count FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+    return row[0] if row else None
+
+def test_same_content_is_stored_once_and_reference_counted(make_db):
+    db = make_db()
+    with db.writer() as conn:
+        path, sha256, created = _store(conn, b"contract body")
+        first_id = _add_contract_file(conn, path, sha256)
+        again_path, _, created_again = _store(conn, b"contract body")
+        second_id = _add_contract_file(conn, again_path, sha256)
+        conn.commit()
+        assert created and not created_again
+        assert again_path == path == blob_path(sha256, ".pdf")
+        assert _ref_count(conn, sha256) == 2
+
+        conn.execute("DELETE FROM contract_files WHERE id = ?", (first_id,))
+        conn.commit()
+        release_blobs(conn, [sha256])
+        assert _ref_count(conn, sha256) == 1 and os.path.exists(path)
+
+        conn.execute("DELETE FROM contract_files WHERE id = ?", (second_id,))
+        conn.commit()
+        release_blobs(conn, [sha256])
+        assert _ref_count(conn, sha256) is None
+        assert not os.path.exists(path)
+
+def test_store_holds_the_write_lock_until_the_reference_is_committed(make_db):
+    """查找到插入引用记录之间持有写锁，其他进程的 release_blobs 不能删除刚复用的文件"""
+    db = make_db()
+    with db.writer() as conn:
+        path, sha256, _ = _store(conn, b"released elsewhere")
+        conn.commit()  # 登记了、引用数为 0，等待释放
+
+        reused_path, _, created = _store(conn, b"released elsewhere")
+        assert not created and reused_path == path
+        other = sqlite3.connect(db.db_path, timeout=0)
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("BEGIN IMMEDIATE")
+        _add_contract_file(conn, path, sha256)
+        conn.commit()
+
+        release_blobs(other, [sha256])
+        other.close()
+        assert os.path.exists(path)
+        assert _ref_count(conn, sha256) == 1
+
+def test_gc_removes_unreferenced_and_stale_files_only(make_db):
+    db = make_db()
+    with db.writer() as conn:
+        kept_path, kept_sha, _ = _store(conn, b"kept")
+        _add_contract_file(conn, kept_path, kept_sha)
+        orphan_path, _, _ = _store(conn, b"orphan")  # 登记了但没有引用
+        conn.commit()
+        stray_path, _ = _temp_file(b"stray upload")  # 残留的临时文件
+        fresh_path, _ = _temp_file(b"uploading")      # 正在上传
+        old = os.path.getmtime(stray_path) - GC_GRACE_SECONDS - 1
+        for path in (stray_path, orphan_path):
+            os.utime(path, (old, old))
+
+        removed = collect_garbage(conn)
+
+        assert os.path.exists(kept_path) and os.path.exists(fresh_path)
+        assert not os.path.exists(stray_path) and not os.path.exists(orphan_path)
+        assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+        assert removed == 2
+        os.remove(fresh_path)
+
+def test_rejected_qualification_upload_leaves_no_blob(admin_client):
+    """名称重复被拒绝时，新文件不会留在存储中"""
+    data = {"category": "营业执照", "owner": "公司", "file_name": "重复名称的执照"}
+    first = admin_client.post("/admin/company_qualifications/add", data=data,
+                              files=[("certificate_file", ("执照.pdf", b"%PDF first", "application/pdf"))])
+    assert first.json()["success"], first.text
+
+    content = b"%PDF second, different content"
+    second = admin_client.post("/admin/company_qualifications/add", data=data,
+                               files=[("certificate_file", ("执照.pdf", content, "application/pdf"))])
+    assert second.status_code == 400
+    assert not os.path.exists(blob_path(hashlib.sha256(content).hexdigest(), ".pdf"))
+
+def test_rolled_back_upload_removes_new_blob(admin_client, monkeypatch):
+    """写入失败、事务回滚时，本次新放入存储的文件在请求结束时删除"""
+    from database.async_db import WriteSession
+
+    class FailingInsert:
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def execute(self, sql, params=()):
+            if sql.lstrip().startswith("INSERT INTO report_templates"):
+                raise RuntimeError("insert failed")
+            return self.cursor.execute(sql, params)
+
+    original_getattr = WriteSession.__getattr__
+
+    def getattr_with_failing_cursor(self, name):
+        value = original_getattr(self, name)
+        if name == "cursor":
+            return lambda: FailingInsert(value())
+        return value
+
+    monkeypatch.setattr(WriteSession, "__getattr__", getattr_with_failing_cursor)
+    content = b"template that never gets committed"
+    response = admin_client.post("/admin/report_templates/add", data={"category": "asset"},
+                                 files=[("template_file", ("模板.docx", content, "application/octet-stream"))])
+    assert response.status_code == 500
+    assert not os.path.exists(blob_path(hashlib.sha256(content).hexdigest(), ".docx"))
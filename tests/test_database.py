@@ -0,0 +1,80 @@
+import sqlite3
+import threading
+import pytest
+from database.database import PoolTimeout
+
+def test_readers_are_reused_and_bounded(make_db):
+    db = make_db(pool_size=2, pool_timeout=0.2)
+    with db.reader() as first:
+        pass
+    with db.reader() as again:
+        assert again is first
+    with db.reader(), db.reader():
+        with pytest.raises(PoolTimeout):
+            with db.reader():
+                pass
+    stats = db.pool_stats()
+    assert stats["readers_open"] == 2
+    assert stats["readers_idle"] == 2
+    assert stats["readers_in_use"] == 0
+    assert stats["timeouts"] == 1
+
+def test_waiting_reader_gets_the_returned_connection(make_db):
+    db = make_db(pool_size=1, pool_timeout=3)
+    checked_out = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with db.reader():
+            checked_out.set()
+            release.wait(3)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    checked_out.wait(3)
+    threading.Timer(0.1, release.set).start()
+    with db.reader() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    holder.join()
+    stats = db.pool_stats()
+    assert stats["timeouts"] == 0
+    assert stats["max_wait_seconds"] > 0
+
+def test_writer_is_exclusive_and_times_out(make_db):
+    db = make_db(pool_timeout=0.2)
+    with db.writer():
+        errors = []
+
+        def other_writer():
+            try:
+                with db.writer():
+                    pass
+            except PoolTimeout as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=other_writer)
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+    assert db.pool_stats()["timeouts"] == 1
+
+def test_readers_are_read_only_and_writes_roll_back_on_return(make_db):
+    db = make_db()
+    with db.reader() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO users (username, password, realname, user_type) VALUES ('a', 'p', 'A', 'user')")
+    with db.writer() as conn:
+        conn.execute("INSERT INTO users (username, password, realname, user_type) VALUES ('a', 'p', 'A', 'user')")
+    with db.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_closed_pool_rejects_checkouts(make_db):
+    db = make_db()
+    db.close_all()
+    with pytest.raises(PoolTimeout):
+        with db.reader():
+            pass
+    with pytest.raises(PoolTimeout):
+        with db.writer():
+            pass
@@ -0,0 +1,42 @@
+import threading
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from conftest import add_user
+
+def test_login_does_not_wait_for_the_writer(app, monkeypatch):
+    from database.database import db_manager
+
+    add_user("reader_login", "user")
+    monkeypatch.setattr(db_manager, "pool_timeout", 0.2)
+    held, release = threading.Event(), threading.Event()
+
+    def hold_writer():
+        with db_manager.writer():
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_writer)
+    holder.start()
+    held.wait(5)
+    try:
+        # 不进入 with：不触发应用的启动/关闭（关闭时会关掉连接池）
+        response = TestClient(app).post("/login", data={"username": "reader_login", "password": "secret"},
+                                        follow_redirects=False)
+    finally:
+        release.set()
+        holder.join()
+    assert response.status_code == 303
+
+def test_request_body_is_read_before_taking_the_writer(admin_client, monkeypatch):
+    from database.database import db_manager
+
+    writer_in_use = []
+    original_body = Request.body
+
+    async def recording_body(self):
+        writer_in_use.append(db_manager.pool_stats()["writer_in_use"])
+        return await original_body(self)
+
+    monkeypatch.setattr(Request, "body", recording_body)
+    admin_client.post("/project/NO-SUCH-PROJECT/update_progress", data={"progress": "x" * 1000})
+    assert writer_in_use and writer_in_use[0] == 0
@@ -0,0 +1,113 @@
+import os
+import hashlib
+import pytest
+from conftest import TEST_DIR
+from services.download_service import parse_range, RangeNotSatisfiable, content_disposition
+
+CONTENT = bytes(range(256)) * 40  # 10240 字节
+
+def _add_template(file_name, content, with_sha256=True):
+    from database.database import db_manager
+
+    path = os.path.join(TEST_DIR, hashlib.md5(file_name.encode("utf-8")).hexdigest() + ".bin")
+    with open(path, "wb") as f:
+        f.write(content)
+    sha256 = hashlib.sha256(content).hexdigest() if with_sha256 else None
+    with db_manager.writer() as conn:
+        template_id = conn.execute("""
+            INSERT INTO report_templates (category, file_path, file_name, uploader_username, uploader_realname, file_size, sha256)
+            VALUES ('asset', ?, ?, 'admin', 'admin', ?, ?)
+        """, (path, file_name, len(content), sha256)).lastrowid
+        conn.commit()
+    return f"/report_templates/download/{template_id}"
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    for header in ("bytes=1000-", "bytes=5-4", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 1000)
+
+def test_content_disposition_keeps_utf8_name():
+    assert content_disposition("report.pdf") == 'attachment; filename="report.pdf"'
+    assert content_disposition("评估报告.pdf") == (
+        "attachment; filename=\"download.pdf\"; filename*=UTF-8''%E8%AF%84%E4%BC%B0%E6%8A%A5%E5%91%8A.pdf"
+    )
+
+def test_full_download_has_validators(admin_client):
+    url = _add_template("模板.docx", CONTENT)
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert "content-encoding" not in response.headers
+
+def test_range_requests(admin_client):
+    url = _add_template("区间.bin", CONTENT)
+    response = admin_client.get(url, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert response.headers["content-length"] == "100"
+
+    response = admin_client.get(url, headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-10:]
+
+    response = admin_client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    # 多个区间：返回完整文件
+    response = admin_client.get(url, headers={"Range": "bytes=0-1,5-9"})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+def test_if_range_mismatch_sends_whole_file(admin_client):
+    url = _add_template("if_range.bin", CONTENT)
+    etag = admin_client.get(url).headers["etag"]
+    response = admin_client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    response = admin_client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"changed"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+@pytest.mark.parametrize("with_sha256", [True, False])
+def test_conditional_get_returns_304(admin_client, with_sha256):
+    url = _add_template(f"conditional_{with_sha256}.bin", CONTENT, with_sha256)
+    first = admin_client.get(url)
+    response = admin_client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+
+    response = admin_client.get(url, headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+    assert response.status_code == 304
+    response = admin_client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert response.status_code == 304
+    # If-None-Match 不匹配时忽略 If-Modified-Since
+    response = admin_client.get(url, headers={"If-None-Match": '"other"',
+                                              "If-Modified-Since": first.headers["last-modified"]})
+    assert response.status_code == 200
+
+def test_head_sends_headers_only(admin_client):
+    url = _add_template("head.bin", CONTENT)
+    response = admin_client.head(url)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.content == b""
+
+def test_missing_file_is_404(admin_client):
+    url = _add_template("missing.bin", CONTENT)
+    from database.database import db_manager
+    with db_manager.reader() as conn:
+        path = conn.execute("SELECT file_path FROM report_templates WHERE file_name = 'missing.bin'").fetchone()[0]
+    os.remove(path)
+    assert admin_client.get(url).status_code == 404
@@ -0,0 +1,60 @@
+import io
+import os
+import json
+import zipfile
+from conftest import TEST_DIR
+
+def _add_project(project_no, files):
+    """创建项目和合同文件记录；files 为 [(文件名, 内容)]，内容为 None 表示磁盘上缺失"""
+    from database.database import db_manager
+
+    with db_manager.writer() as conn:
+        project_id = conn.execute("""
+            INSERT INTO projects (project_no, name, creator, status, create_date)
+            VALUES (?, '导出测试/项目', 'admin', 'active', '2025-01-01')
+        """, (project_no,)).lastrowid
+        for i, (file_name, content) in enumerate(files):
+            path = os.path.join(TEST_DIR, f"{project_no}_{i}.bin")
+            if content is not None:
+                with open(path, "wb") as f:
+                    f.write(content)
+            conn.execute("""
+                INSERT INTO contract_files (project_id, file_path, file_name, uploader_username, uploader_realname, upload_time, file_size)
+                VALUES (?, ?, ?, 'admin', 'admin', ?, ?)
+            """, (project_id, path, file_name, f"2025-01-01 00:00:0{i}", len(content or b"")))
+        conn.commit()
+
+def test_export_zip_is_readable(admin_client, monkeypatch):
+    import services.export_service as export_service
+    from database.database import db_manager
+
+    big = os.urandom(300 * 1024)  # 不可压缩，跨越多个块
+    _add_project("EXP-1", [("合同.pdf", b"%PDF contract"), ("合同.pdf", big), ("丢失.pdf", None)])
+
+    # 开始发送压缩包时，读取清单用的连接应已归还
+    stats_when_streaming = []
+    original_stream_zip = export_service.stream_zip
+
+    def recording_stream_zip(entries):
+        stats_when_streaming.append(db_manager.pool_stats())
+        yield from original_stream_zip(entries)
+
+    monkeypatch.setattr(export_service, "stream_zip", recording_stream_zip)
+    response = admin_client.get("/project/EXP-1/export.zip")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    stats = stats_when_streaming[0]
+    assert stats["readers_idle"] == stats["readers_open"]
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["清单.json", "清单.csv", "合同文件/合同.pdf", "合同文件/合同 (2).pdf"]
+        assert archive.read("合同文件/合同.pdf") == b"%PDF contract"
+        assert archive.read("合同文件/合同 (2).pdf") == big
+        manifest = json.loads(archive.read("清单.json"))
+        assert [entry["missing"] for entry in manifest["contract_files"]] == [False, False, True]
+        assert all("source" not in entry for entry in manifest["contract_files"])
+
+def test_export_unknown_project_returns_404(admin_client):
+    assert admin_client.get("/project/NO-SUCH/export.zip").status_code == 404
@@ -0,0 +1,29 @@
+import logging
+import sqlite3
+from config import Config
+from database.instrumentation import (
+    InstrumentedConnection, QueryTrackingMiddleware, RequestQueries, normalize_sql, query_stats
+)
+
+def test_normalize_sql_merges_literals_and_in_lists():
+    assert normalize_sql("SELECT * FROM t WHERE a = 'x'  AND b IN (?, ?, ?) LIMIT 10") == \
+        "SELECT * FROM t WHERE a = ? AND b IN (?...) LIMIT ?"
+
+def test_statements_are_counted_with_rows():
+    query_stats.reset()
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    conn.execute("CREATE TABLE t (a)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+    assert conn.execute("SELECT a FROM t WHERE a > 1").fetchall() == [(2,), (3,)]
+    select = next(item for item in query_stats.top() if item["sql"].startswith("SELECT"))
+    assert select["count"] == 1 and select["rows"] == 2
+
+def test_budget_warning_goes_to_logging(caplog, monkeypatch):
+    monkeypatch.setattr(Config, "ROUTE_QUERY_BUDGETS", {"GET /items": (2, 1000)})
+    tracker = RequestQueries()
+    for _ in range(3):
+        tracker.add("SELECT * FROM items WHERE id = ?", 0.001)
+    with caplog.at_level(logging.WARNING, logger="database.instrumentation"):
+        QueryTrackingMiddleware._check_budget({"method": "GET", "path": "/items"}, tracker)
+    assert "GET /items 超出 SQL 预算：3 条语句" in caplog.text
+    assert "3 次" in caplog.text
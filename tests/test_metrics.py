@@ -0,0 +1,32 @@
+import logging
+from fastapi.testclient import TestClient
+from conftest import add_user, login
+from config import Config
+from utils.metrics import MetricsRegistry
+
+def test_metrics_require_token_or_admin(app, admin_client, monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_TOKEN", "scrape-token")
+    anonymous = TestClient(app)
+    assert anonymous.get("/metrics").status_code == 403
+    assert anonymous.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = anonymous.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+    add_user("metrics_viewer", "user")
+    assert login(TestClient(app), "metrics_viewer").get("/metrics").status_code == 403
+    assert admin_client.get("/metrics").status_code == 200
+
+def test_metrics_token_is_disabled_when_unset(app, monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_TOKEN", None)
+    assert TestClient(app).get("/metrics", headers={"Authorization": "Bearer "}).status_code == 403
+
+def test_failing_collector_is_logged_and_skipped(caplog):
+    registry = MetricsRegistry()
+    registry.callback("broken", "总是出错", "gauge", lambda: 1 / 0)
+    registry.counter("requests_total", "请求数").inc()
+    with caplog.at_level(logging.ERROR, logger="utils.metrics"):
+        text = registry.render()
+    assert "requests_total 1" in text and "broken" not in text
+    assert "指标 broken 采集失败" in caplog.text
@@ -0,0 +1,142 @@
+import sqlite3
+import importlib
+import pytest
+from database import migrate
+from database.consistency import repair_derived_data
+from database.user_stats import get_user_stats
+
+def baseline_database(path):
+    """迁移引入之前的数据库：只有原 init_db 建的表，没有 schema_version"""
+    conn = sqlite3.connect(path)
+    importlib.import_module("database.migrations.0001_initial_schema").upgrade(conn)
+    conn.executemany(
+        "INSERT INTO users (username, password, realname, user_type) VALUES (?, 'p', ?, 'user')",
+        [("zhang", "张三"), ("li", "李四"), ("wang", "王五")]
+    )
+    conn.executemany("""
+        INSERT INTO projects (project_no, name, client_name, project_leader, market_leader, creator,
+                              status, report_numbers, start_date, create_date)
+        VALUES (?, ?, ?, 'zhang', 'li', 'zhang', ?, '旧的报告号', '2025-03-01', '2025-03-01')
+    """, [("P2025_001", "中和市住宅评估", "中和市国资委", "active"),
+          ("P2025_003", "办公楼评估", "某公司", "completed")])
+    conn.executemany("""
+        INSERT INTO reports (report_no, project_id, creator, create_date, reviewer1, reviewer2, signer1, file_paths)
+        VALUES (?, ?, 'zhang', '2025-03-02', 'li', ?, 'wang', 'stale.pdf')
+    """, [("川鼎房估[2025]字第001号", 1, None), ("川鼎房估[2025]字第A002号", 1, "wang"),
+          ("手写的报告号", 2, None)])
+    conn.execute("""
+        INSERT INTO report_files (report_id, file_path, file_name, uploader_username, uploader_realname, upload_time)
+        VALUES (1, 'static/uploads/reports/a.pdf', 'a.pdf', 'zhang', '张三', '2025-03-02')
+    """)
+    conn.commit()
+    return conn
+
+def test_baseline_database_upgrades_to_latest(tmp_path):
+    conn = baseline_database(str(tmp_path / "db.sqlite3"))
+    assert migrate.get_current_version(conn) == 0
+
+    applied = migrate.upgrade(conn, verbose=False)
+    assert [version for version, _ in applied] == list(range(1, migrate.latest_version() + 1))
+    assert migrate.get_current_version(conn) == migrate.latest_version()
+    assert migrate.upgrade(conn, verbose=False) == []
+
+    # 迁移中的回填
+    assert conn.execute("SELECT year, last_seq FROM project_no_sequences").fetchall() == [(2025, 3)]
+    assert conn.execute(
+        "SELECT report_prefix, report_year, is_filing, report_seq FROM reports ORDER BY id"
+    ).fetchall() == [("房估", 2025, 0, 1), ("房估", 2025, 1, 2), (None, None, None, None)]
+    assert set(conn.execute("SELECT report_id, username, role, slot FROM report_participants")) == {
+        (1, "li", "reviewer", 1), (1, "wang", "signer", 1),
+        (2, "li", "reviewer", 1), (2, "wang", "reviewer", 2), (2, "wang", "signer", 1),
+        (3, "li", "reviewer", 1), (3, "wang", "signer", 1),
+    }
+    assert set(conn.execute("SELECT project_id, role FROM user_project_roles WHERE username = 'wang'")) == {
+        (1, "reviewer"), (1, "signer"), (2, "signer")
+    }
+    assert conn.execute("SELECT session_version FROM users WHERE username = 'zhang'").fetchone()[0] == 0
+    assert conn.execute("SELECT rowid FROM projects_fts WHERE projects_fts MATCH '中和市'").fetchall() == [(1,)]
+
+    stats = get_user_stats(conn, "wang")
+    assert stats["participated_projects"] == {"active": 1, "completed": 1, "paused": 0, "cancelled": 0}
+    assert stats["signed_reports"] == 3
+    assert stats["reviewed_reports"] == 1
+
+    # 回填结果与触发器维护的派生数据一致
+    assert set(repair_derived_data(conn, commit=False).values()) == {0}
+    conn.close()
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    conn = baseline_database(str(tmp_path / "db.sqlite3"))
+    version, _, module = migrate.discover_migrations()[2]
+
+    def broken(c):
+        c.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(module, "upgrade", broken)
+    with pytest.raises(RuntimeError):
+        migrate.upgrade(conn, verbose=False)
+    assert migrate.get_current_version(conn) == version - 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    conn.close()
+
+def _add_duplicate_numbers(conn):
+    """迁移前各项目独立编号：两个项目都有 001 号报告"""
+    conn.executemany("""
+        INSERT INTO reports (report_no, project_id, creator, create_date) VALUES (?, ?, 'zhang', '2025-03-05')
+    """, [("川鼎房估[2025]字第003号", 1), ("川鼎房估[2025]字第003号", 2)])
+    conn.commit()
+
+def _gaps(conn):
+    return [row[0] for row in conn.execute("""
+        SELECT report_seq FROM report_seq_gaps
+        WHERE report_prefix = '房估' AND report_year = 2025 AND is_filing = 0 ORDER BY report_seq
+    """)]
+
+def test_duplicate_report_numbers_are_not_handed_out_again(tmp_path):
+    from database.numbering import allocate_report_seq
+
+    conn = baseline_database(str(tmp_path / "db.sqlite3"))
+    _add_duplicate_numbers(conn)
+    migrate.upgrade(conn, verbose=False)
+    survivor, duplicate = conn.execute(
+        "SELECT id, report_seq FROM reports WHERE report_no = '川鼎房估[2025]字第003号' ORDER BY id"
+    ).fetchall()
+    assert survivor[1] == 3 and duplicate[1] is None
+
+    # 删除保留编号的那一条：序号转给仍在使用该报告号的行，不会被重新分配
+    conn.execute("DELETE FROM reports WHERE id = ?", (survivor[0],))
+    assert conn.execute("SELECT report_seq FROM reports WHERE id = ?", (duplicate[0],)).fetchone()[0] == 3
+    assert _gaps(conn) == [2]
+    assert [allocate_report_seq(conn, "房估", 2025, 0) for _ in range(2)] == [2, 4]
+    conn.rollback()
+
+    # 没有重复时照常回收为空缺
+    conn.execute("DELETE FROM reports WHERE report_no = '川鼎房估[2025]字第001号'")
+    assert allocate_report_seq(conn, "房估", 2025, 0) == 1
+    conn.close()
+
+def test_upgrade_repairs_sequences_already_released_for_duplicates(tmp_path, monkeypatch):
+    """修复前删除保留编号的行，序号被错误地回收为空缺；迁移 0012 把编号交回重复的行"""
+    conn = baseline_database(str(tmp_path / "db.sqlite3"))
+    _add_duplicate_numbers(conn)
+    migrations = migrate.discover_migrations()
+    fixed = next(version for version, name, _ in migrations if name == "duplicate_report_numbers")
+    with monkeypatch.context() as patch:
+        patch.setattr(migrate, "discover_migrations", lambda: [m for m in migrations if m[0] < fixed])
+        migrate.upgrade(conn, verbose=False)
+    conn.execute("DROP TRIGGER reports_release_seq")
+    conn.execute("""
+        CREATE TRIGGER reports_release_seq AFTER DELETE ON reports WHEN OLD.report_seq IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO report_seq_gaps VALUES (OLD.report_prefix, OLD.report_year, OLD.is_filing, OLD.report_seq);
+        END
+    """)
+    conn.execute("DELETE FROM reports WHERE report_seq = 3")
+    conn.commit()
+    assert _gaps(conn) == [2, 3]
+
+    migrate.upgrade(conn, verbose=False)
+    assert conn.execute("SELECT report_seq FROM reports WHERE report_no = '川鼎房估[2025]字第003号'").fetchall() == [(3,)]
+    assert _gaps(conn) == [2]
+    conn.close()
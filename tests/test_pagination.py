@@ -0,0 +1,138 @@
+import sqlite3
+import pytest
+from fastapi import HTTPException
+from utils.pagination import keyset_query, keyset_page, decode_cursor, encode_cursor
+
+LIMIT = 3
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE projects (id INTEGER PRIMARY KEY, create_date TEXT, status TEXT)")
+    conn.execute("CREATE INDEX idx_projects_create_date ON projects (create_date, id)")
+    # 多行 create_date 相同，分页边界落在相同日期中间
+    dates = ["2025-01-01"] * 4 + ["2025-01-02"] * 3 + ["2025-01-03"] * 2
+    conn.executemany("INSERT INTO projects (create_date, status) VALUES (?, 'active')", [(d,) for d in dates])
+    yield conn
+    conn.close()
+
+def fetch(conn, cursor=None, page=1, where=" WHERE 1=1", params=()):
+    sql, params, direction = keyset_query("SELECT p.* FROM projects p" + where, params, cursor, LIMIT, page)
+    rows = [dict(row) for row in conn.execute(sql, params)]
+    rows, next_cursor, prev_cursor = keyset_page(rows, LIMIT, direction, page)
+    return [row["id"] for row in rows], next_cursor, prev_cursor
+
+def all_ids(conn):
+    return [row[0] for row in conn.execute("SELECT id FROM projects ORDER BY create_date DESC, id DESC")]
+
+def test_next_cursors_walk_every_row_once_in_order(conn):
+    pages, cursor = [], None
+    while True:
+        ids, cursor, prev_cursor = fetch(conn, cursor)
+        assert (prev_cursor is None) == (not pages)
+        pages.append(ids)
+        if cursor is None:
+            break
+    assert pages == [all_ids(conn)[i:i + LIMIT] for i in range(0, 9, LIMIT)]
+
+def test_prev_cursors_walk_back_to_the_first_page(conn):
+    forward, cursor = [], None
+    while True:
+        ids, next_cursor, prev_cursor = fetch(conn, cursor)
+        forward.append((ids, prev_cursor))
+        if next_cursor is None:
+            break
+        cursor = next_cursor
+
+    backward = [forward[-1][0]]
+    prev_cursor = forward[-1][1]
+    while prev_cursor:
+        ids, next_cursor, prev_cursor = fetch(conn, prev_cursor)
+        assert next_cursor is not None
+        backward.append(ids)
+    assert backward[::-1] == [ids for ids, _ in forward]
+
+def test_offset_pages_match_cursor_pages(conn):
+    ids, next_cursor, _ = fetch(conn)
+    for page in (2, 3):
+        assert fetch(conn, page=page)[0] == fetch(conn, next_cursor)[0]
+        next_cursor = fetch(conn, next_cursor)[1]
+    assert fetch(conn, page=4) == ([], None, None)
+
+def test_last_full_page_has_no_next_cursor(conn):
+    conn.execute("DELETE FROM projects WHERE id > ?", (2 * LIMIT,))
+    _, next_cursor, _ = fetch(conn)
+    ids, next_cursor, prev_cursor = fetch(conn, next_cursor)
+    assert len(ids) == LIMIT
+    assert next_cursor is None and prev_cursor is not None
+
+def test_filters_apply_with_cursor(conn):
+    conn.execute("UPDATE projects SET status = 'completed' WHERE id % 2 = 0")
+    where, params = " WHERE p.status = ?", ["active"]
+    ids, next_cursor, _ = fetch(conn, where=where, params=params)
+    more, next_cursor, _ = fetch(conn, next_cursor, where=where, params=params)
+    assert ids + more == [9, 7, 5, 3, 1]
+    assert next_cursor is None
+
+def test_invalid_cursor_is_rejected():
+    assert decode_cursor(encode_cursor("2025-01-01", 5, "next")) == ("2025-01-01", 5, "next")
+    for cursor in ("not-a-cursor", encode_cursor("2025-01-01", 5, "sideways")):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(cursor)
+        assert exc.value.status_code == 400
+
+def test_projects_without_create_date_are_reachable(make_db):
+    """没有创建日期的旧项目排在最后，翻页仍能取到，从它们取得的游标也可用"""
+    db = make_db()
+    with db.writer() as conn:
+        conn.executemany("INSERT INTO projects (project_no, create_date) VALUES (?, ?)",
+                         [(f"P{i}", "2025-01-01" if i % 2 else None) for i in range(1, 9)])
+        conn.execute("UPDATE projects SET create_date = NULL WHERE project_no = 'P1'")
+        conn.commit()
+        assert conn.execute("SELECT COUNT(*) FROM projects WHERE create_date IS NULL").fetchone()[0] == 0
+
+        pages, cursor = [], None
+        while True:
+            ids, cursor, _ = fetch(conn, cursor)
+            pages.append(ids)
+            if cursor is None:
+                break
+        assert sum(pages, []) == [7, 5, 3, 8, 6, 4, 2, 1]
+
+        ids, _, prev_cursor = fetch(conn, fetch(conn, fetch(conn)[1])[1])
+        assert ids == [2, 1]
+        assert fetch(conn, prev_cursor)[0] == [8, 6, 4]
+
+def test_report_writes_clear_cached_participation_counts(admin_client):
+    """生成和删除报告会改变复核人“参与的项目”，缓存的总数随之失效"""
+    import asyncio
+    from conftest import add_user
+    from database.database import db_manager
+    from routes.report_routes import report_service
+    from services.user_service import user_service
+
+    for username in ("count_reviewer", "count_reviewer2", "count_reviewer3"):
+        add_user(username)
+    with db_manager.writer() as conn:
+        conn.execute("""
+            INSERT INTO projects (project_no, name, creator, project_leader, status, create_date)
+            VALUES ('P-COUNT', '计数测试', 'admin', 'admin', 'active', '2025-01-01')
+        """)
+        conn.commit()
+
+    def total():
+        with db_manager.reader() as conn:
+            result = asyncio.run(user_service.get_user_projects_paginated("count_reviewer", db=conn))
+        return result["total_count"]
+
+    admin = {"username": "admin", "user_type": "admin"}
+    assert total() == 0
+    with db_manager.writer() as conn:
+        report_no = asyncio.run(report_service.generate_report_no(
+            "P-COUNT", "资产咨询报告", None, "count_reviewer", "count_reviewer2", "count_reviewer3", "", "", admin, conn))["report_no"]
+        report_id = conn.execute("SELECT id FROM reports WHERE report_no = ?", (report_no,)).fetchone()[0]
+    assert total() == 1
+    with db_manager.writer() as conn:
+        asyncio.run(report_service.delete_report("P-COUNT", report_id, admin, conn))
+    assert total() == 0
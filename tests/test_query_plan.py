@@ -0,0 +1,25 @@
+from database.query_plan import INTENTIONAL_SCANS, check_query_plans, explain, hot_queries, is_full_scan
+
+def test_only_search_counts_as_indexed():
+    assert not is_full_scan("SEARCH projects USING INDEX idx_projects_project_no (project_no=?)")
+    assert is_full_scan("SCAN projects")
+    assert is_full_scan("SCAN projects USING INDEX idx_projects_create_date")
+    assert is_full_scan("SCAN projects USING COVERING INDEX idx_projects_start_year")
+    assert not is_full_scan("SCAN projects USING INDEX idx_projects_create_date",
+                            {"SCAN projects USING INDEX idx_projects_create_date": "首页"})
+    assert not is_full_scan("SCAN CONSTANT ROW")
+
+def test_hot_queries_use_indexes_on_a_migrated_database(make_db):
+    db = make_db()
+    with db.reader() as conn:
+        assert check_query_plans(conn) == {}
+
+def test_intentional_scans_are_still_needed(make_db):
+    """登记的 SCAN 都确实出现在对应查询的计划中，查询改好后应删除登记"""
+    db = make_db()
+    queries = hot_queries()
+    with db.reader() as conn:
+        for name, allowed in INTENTIONAL_SCANS.items():
+            sql, params = queries[name]
+            plan = explain(conn, sql, params)
+            assert set(allowed) <= set(plan), (name, plan)
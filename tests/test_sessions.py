@@ -0,0 +1,82 @@
+import os
+import stat
+import pytest
+from fastapi.testclient import TestClient
+from conftest import add_user, login
+from auth.sessions import SessionSigner, SESSION_COOKIE, _b64encode, _b64decode
+from config import load_secret_key
+
+def test_token_round_trip():
+    signer = SessionSigner("key", max_age=60)
+    token = signer.issue("alice", "user", now=1000)
+    assert signer.verify(token, now=1059) == {"username": "alice", "user_type": "user"}
+
+def test_expired_token_is_rejected():
+    signer = SessionSigner("key", max_age=60)
+    assert signer.verify(signer.issue("alice", "user", now=1000), now=1060) is None
+
+def test_tampered_token_is_rejected():
+    signer = SessionSigner("key", max_age=60)
+    payload, _, signature = signer.issue("alice", "user", now=1000).partition(".")
+    forged = _b64encode(_b64decode(payload).replace(b'"user"', b'"admin"'))
+    assert signer.verify(f"{forged}.{signature}", now=1000) is None
+    assert signer.verify(f"{payload}.{signature[:-2]}", now=1000) is None
+    # 其他密钥签发的令牌
+    assert signer.verify(SessionSigner("other", max_age=60).issue("alice", "admin", now=1000), now=1000) is None
+
+@pytest.mark.parametrize("token", [None, "", "garbage", "a.b", ".", "é.é"])
+def test_malformed_token_is_rejected(token):
+    assert SessionSigner("key", max_age=60).verify(token) is None
+
+def test_lookup_revokes_and_refreshes_user_type():
+    users = {"alice": {"user_type": "user", "session_version": 1}}
+    signer = SessionSigner("key", max_age=60, lookup=users.get)
+    old, current = signer.issue("alice", "admin", 0, now=1000), signer.issue("alice", "admin", 1, now=1000)
+    assert signer.verify(old, now=1000) is None
+    assert signer.verify(current, now=1000) == {"username": "alice", "user_type": "user"}
+    del users["alice"]
+    assert signer.verify(current, now=1000) is None
+
+def test_secret_key_is_generated_once_with_private_permissions(tmp_path, monkeypatch):
+    monkeypatch.delenv("SECRET_KEY")
+    path = str(tmp_path / ".secret_key")
+    key = load_secret_key(path)
+    assert len(key) >= 32 and load_secret_key(path) == key
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert os.listdir(tmp_path) == [".secret_key"]
+
+    monkeypatch.setenv("SECRET_KEY", "from-env")
+    assert load_secret_key(path) == "from-env"
+
+def _is_logged_in(client):
+    response = client.get("/user_manager/get_user/admin", follow_redirects=False)
+    return response.status_code != 303
+
+@pytest.mark.parametrize("action", ["reset_password", "demote", "delete"])
+def test_admin_changes_revoke_existing_sessions(admin_client, app, action):
+    username = f"revoke_{action}"
+    add_user(username, "admin")
+    client = login(TestClient(app), username)
+    assert _is_logged_in(client)
+
+    if action == "reset_password":
+        response = admin_client.post(f"/user_manager/reset_password/{username}", data={"new_password": "newpassword1"})
+    elif action == "demote":
+        response = admin_client.post(f"/user_manager/update/{username}", data={"user_type": "user"})
+    else:
+        response = admin_client.post(f"/user_manager/delete/{username}")
+    assert response.json()["success"], response.text
+    assert not _is_logged_in(client)
+
+def test_changing_own_password_keeps_current_session_only(app):
+    add_user("changer", "admin", password="oldpassword1")
+    client = login(TestClient(app), "changer", "oldpassword1")
+    other_device = login(TestClient(app), "changer", "oldpassword1")
+
+    response = client.post("/user_profile/change_password", data={
+        "current_password": "oldpassword1", "new_password": "newpassword1", "confirm_password": "newpassword1"
+    })
+    assert response.json()["success"], response.text
+    assert SESSION_COOKIE in response.cookies
+    assert _is_logged_in(client)
+    assert not _is_logged_in(other_device)
@@ -0,0 +1,61 @@
+import os
+import gzip
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from fastapi.testclient import TestClient
+from config import Config
+from utils.compression import PrecompressedStaticFiles
+
+@pytest.fixture
+def static_client(tmp_path, monkeypatch):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", str(static_dir / "uploads"))
+
+    def write(relative, data):
+        path = static_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    app = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory=str(static_dir)))])
+    return TestClient(app), write
+
+def test_fingerprinted_build_assets_are_immutable(static_client):
+    client, write = static_client
+    write("dist/css/app.3f2a9c1b7d0e.css", b"body{}")
+    response = client.get("/static/dist/css/app.3f2a9c1b7d0e.css")
+    assert response.headers["cache-control"] == f"public, max-age={Config.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+
+def test_plain_static_files_are_revalidated(static_client):
+    client, write = static_client
+    write("favicon.ico", b"icon")
+    assert client.get("/static/favicon.ico").headers["cache-control"] == "no-cache"
+
+@pytest.mark.parametrize("relative", [
+    "uploads/blobs/ab/" + "ab" * 32 + ".pdf",
+    "uploads/合同.3f2a9c1b.pdf",  # 文件名像指纹的旧上传文件
+])
+def test_uploaded_files_are_private(static_client, relative):
+    client, write = static_client
+    write(relative, b"%PDF")
+    response = client.get("/static/" + relative)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+
+def test_precompressed_sibling_and_not_modified(static_client):
+    client, write = static_client
+    source = b"body { color: red; }\n" * 200
+    path = write("dist/app.0123456789ab.css", source)
+    sibling = write("dist/app.0123456789ab.css.gz", gzip.compress(source))
+    os.utime(sibling, (path.stat().st_mtime + 1,) * 2)
+
+    response = client.get("/static/dist/app.0123456789ab.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == source
+
+    etag = response.headers["etag"]
+    again = client.get("/static/dist/app.0123456789ab.css",
+                       headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
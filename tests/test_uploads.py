@@ -0,0 +1,39 @@
+import io
+import os
+import asyncio
+import pytest
+from fastapi import HTTPException, UploadFile
+import utils.uploads
+from database.database import db_manager
+
+def test_upload_is_staged_before_taking_the_writer(admin_client, monkeypatch):
+    """复制和哈希上传文件时不持有写连接"""
+    copy_to_temp = utils.uploads._copy_to_temp
+    writer_locked = []
+
+    def spy(*args):
+        writer_locked.append(db_manager._writer_lock.locked())
+        return copy_to_temp(*args)
+
+    monkeypatch.setattr(utils.uploads, "_copy_to_temp", spy)
+    response = admin_client.post(
+        "/admin/report_templates/add",
+        data={"category": "asset", "owner": "测试"},
+        files=[("template_file", ("模板.docx", b"template body", "application/octet-stream"))],
+    )
+    assert response.json()["success"], response.text
+    assert writer_locked == [False]
+    assert db_manager.pool_stats()["writer_in_use"] == 0
+
+def test_failed_staging_removes_temp_files(monkeypatch, tmp_path):
+    """一批文件中有一个超过大小限制时，已写入的临时文件全部删除"""
+    monkeypatch.setattr(utils.uploads, "max_upload_bytes", lambda: 10)
+    monkeypatch.setattr(utils.uploads, "temp_dir", lambda: str(tmp_path))
+    uploads = [
+        UploadFile(io.BytesIO(b"small"), filename="a.pdf"),
+        UploadFile(io.BytesIO(b"x" * 100), filename="b.pdf"),
+    ]
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(utils.uploads.stage_uploads(uploads))
+    assert exc_info.value.status_code == 413
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,168 @@
+"""带内容指纹的页面脚本和样式
+
+页面的 CSS / JS 放在 assets/ 下（assets/css/<页面>.css、assets/js/<页面>.js），
+构建时复制到 static/dist/ 并在文件名中加入内容哈希（如 css/project_info.3f2a9c1b7d0e.css），
+同时生成 .gz / .br 文件。带指纹的文件由 PrecompressedStaticFiles 以 immutable 长期缓存，
+再次打开页面时只需传输 HTML；内容修改后文件名随之改变，浏览器自动取新版本。
+最近 Config.ASSET_KEEP_BUILDS 次构建的文件都会保留（清单记录在 manifest-history.json），
+浏览器或代理缓存的旧页面、滚动重启时仍在运行的旧 worker 引用的旧文件名不会 404。
+
+模板中通过 asset_url 引用：
+    <link rel="stylesheet" href="{{ asset_url('css/project_info.css') }}">
+    <script src="{{ asset_url('js/project_info.js') }}"></script>
+
+页面数据（项目编号、分页参数等）仍由模板内联的一小段脚本提供。
+
+用法（部署时构建；应用启动时也会执行一次，已是最新时不重复写入）：
+    python -m utils.assets
+
+开发时设置环境变量 ASSET_AUTORELOAD=1，修改源文件后刷新页面即可生效
+（最多每 Config.ASSET_RELOAD_INTERVAL 秒检查一次源文件）；未开启时运行期间不访问源文件。
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+import threading
+from config import Config
+from utils.compression import precompress_directory
+
+MANIFEST_NAME = "manifest.json"
+HISTORY_NAME = "manifest-history.json"
+HASH_LENGTH = 12
+
+def _fingerprinted_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+def _source_files(source_dir):
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            yield os.path.relpath(path, source_dir).replace(os.sep, "/"), path
+
+def _read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _write_json(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def build_assets(source_dir=None, build_dir=None):
+    """构建全部资源，返回清单 {源文件名: 带指纹的文件名}；不属于最近 ASSET_KEEP_BUILDS 次构建的旧文件会被删除"""
+    source_dir = source_dir or Config.ASSET_SOURCE_DIR
+    build_dir = build_dir or Config.ASSET_BUILD_DIR
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    history_path = os.path.join(build_dir, HISTORY_NAME)
+    # 先读清单再读历史，与写入顺序相反：同时构建的 worker 看到新清单时，历史中一定已有上一次的清单
+    previous = _read_json(manifest_path, None)
+    history = _read_json(history_path, [])
+    manifest = {}
+    for name, path in _source_files(source_dir):
+        with open(path, "rb") as f:
+            data = f.read()
+        built_name = _fingerprinted_name(name, data)
+        target = os.path.join(build_dir, built_name)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # 多个 worker 同时启动时可能同时构建，先写临时文件再改名
+            temp_path = f"{target}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, target)
+        manifest[name] = built_name
+
+    # 内容有变化时上一次的清单进入历史（新的在前）
+    if previous and previous != manifest:
+        history = [previous] + [old for old in history if old != previous]
+    history = [old for old in history if old != manifest][:max(Config.ASSET_KEEP_BUILDS - 1, 0)]
+
+    keep = set()
+    built_names = [name for kept in [manifest, *history] for name in kept.values()]
+    for built_name in [MANIFEST_NAME, HISTORY_NAME, *built_names]:
+        target = os.path.normpath(os.path.join(build_dir, built_name))
+        keep.update({target, target + ".gz", target + ".br"})
+    for root, _, files in os.walk(build_dir):
+        for file_name in files:
+            path = os.path.normpath(os.path.join(root, file_name))
+            if path not in keep and not path.endswith(".tmp"):
+                os.remove(path)
+
+    precompress_directory(build_dir)
+    _write_json(history_path, history)
+    _write_json(manifest_path, manifest)
+    return manifest
+
+class AssetManifest:
+    """源文件名到 URL 的映射；开启 ASSET_AUTORELOAD 时源文件修改后自动重新构建"""
+
+    def __init__(self, source_dir=None, build_dir=None, url_prefix="/static/dist/"):
+        self.source_dir = source_dir or Config.ASSET_SOURCE_DIR
+        self.build_dir = build_dir or Config.ASSET_BUILD_DIR
+        self.url_prefix = url_prefix
+        self._manifest = None
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _source_mtimes(self):
+        return {name: os.stat(path).st_mtime_ns for name, path in _source_files(self.source_dir)}
+
+    def build(self):
+        with self._lock:
+            mtimes = self._source_mtimes()
+            self._manifest = build_assets(self.source_dir, self.build_dir)
+            self._mtimes = mtimes
+            return self._manifest
+
+    def _load(self):
+        manifest_path = os.path.join(self.build_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        except (OSError, ValueError):
+            self.build()
+
+    def _reload_if_changed(self):
+        """按间隔检查源文件，同一页面中的多次 asset_url 调用不会重复遍历目录"""
+        now = time.monotonic()
+        if now - self._checked_at < Config.ASSET_RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        if self._source_mtimes() != self._mtimes:
+            self.build()
+
+    def url(self, name):
+        if self._manifest is None:
+            self._load()
+        elif Config.ASSET_AUTORELOAD:
+            self._reload_if_changed()
+        built_name = self._manifest.get(name)
+        if built_name is None:
+            raise KeyError(f"静态资源不存在: {name}（{self.source_dir}/{name}）")
+        return self.url_prefix + built_name
+
+assets = AssetManifest()
+
+def asset_url(name):
+    """模板全局函数：assets/ 下文件的带指纹 URL"""
+    return assets.url(name)
+
+def main():
+    manifest = assets.build()
+    for name, built_name in sorted(manifest.items()):
+        size = os.path.getsize(os.path.join(assets.build_dir, built_name))
+        print(f"  {size / 1024:>7.1f} KB  {built_name}")
+    print(f"✅ 已构建 {len(manifest)} 个静态资源: {assets.build_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""响应压缩与预压缩静态文件
+
+- CompressionMiddleware：按 Accept-Encoding 选择 br（安装了 brotli 时）或 gzip 压缩动态响应。
+  只压缩文本类 Content-Type，小于 Config.COMPRESSION_MIN_SIZE 的响应原样发送；
+  流式响应逐块压缩并 flush，边渲染边发送的页面仍然是流式的。
+  已编码的响应、文件下载（带 Accept-Ranges / Content-Range）和 206/304 不处理。
+- PrecompressedStaticFiles：/static 下存在 .br / .gz 同名文件时直接发送它们；
+  只有带指纹的构建产物（如 app.3f2a9c1b.css）使用一年的 public、immutable 缓存；
+  上传目录中的文件（包括按内容寻址的存储）与下载接口一致，使用 private, no-cache。
+
+用法（部署前生成 .gz / .br 文件）：
+    python -m utils.compression [static_dir]
+"""
+import os
+import re
+import sys
+import gzip
+import zlib
+import mimetypes
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript", "application/json", "application/xml",
+    "application/manifest+json", "image/svg+xml", "image/x-icon",
+}
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".json", ".svg", ".html", ".txt", ".xml", ".map", ".ico"}
+
+# 超过这个大小的块在线程池中压缩，避免阻塞事件循环
+THREADPOOL_THRESHOLD = 64 * 1024
+
+_FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{8,64}\.[A-Za-z0-9]+$")
+
+def is_compressible(content_type):
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+def accepted_encodings(header):
+    """Accept-Encoding 中 q > 0 的编码"""
+    encodings = set()
+    for item in (header or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            encodings.add(name)
+    if "*" in encodings:
+        encodings |= {"br", "gzip"}
+    return encodings
+
+def available_encodings():
+    """服务端支持的编码，按优先级排列"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    return next((encoding for encoding in available_encodings() if encoding in accepted), None)
+
+class _Compressor:
+    """统一 gzip / brotli 的流式接口：compress 返回可立即发送的数据，finish 结束压缩流"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(Config.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+async def _run(fn, data):
+    if len(data) >= THREADPOOL_THRESHOLD:
+        return await run_in_threadpool(fn, data)
+    return fn(data)
+
+class CompressionMiddleware:
+    """ASGI 中间件：压缩文本类响应（纯 ASGI 实现，流式响应逐块压缩）"""
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = Config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size).send)
+
+class _CompressingSender:
+    def __init__(self, send, encoding, minimum_size):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _eligible(self, headers):
+        return (
+            self.start["status"] not in (204, 206, 304)
+            and is_compressible(headers.get("content-type"))
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and "accept-ranges" not in headers
+        )
+
+    async def send(self, message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(raw=list(message.get("headers", [])))
+            if not self._eligible(headers):
+                self.passthrough = True
+                await self._send(message)
+                return
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            message["headers"] = headers.raw
+            if self.encoding is None:
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                # 完整且很小的响应：压缩收益不抵开销
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            headers["content-encoding"] = self.encoding
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = await _run(self.compressor.finish, body)
+                headers["content-length"] = str(len(body))
+                self.start["headers"] = headers.raw
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            self.start["headers"] = headers.raw
+            await self._send(self.start)
+
+        if more_body:
+            body = await _run(self.compressor.compress, body) if body else b""
+        else:
+            body = await _run(self.compressor.finish, body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+# ---------- 静态文件 ----------
+_SIBLING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+def is_upload(path, static_dir="static"):
+    """path（相对 static_dir）是否位于上传目录：上传的文件属于具体用户，不能放进共享缓存"""
+    relative = os.path.relpath(Config.UPLOAD_FOLDER, static_dir)
+    if relative.startswith(".."):
+        return False
+    prefix = relative.replace(os.sep, "/") + "/"
+    return path.replace(os.sep, "/").startswith(prefix)
+
+def is_fingerprinted(path, static_dir="static"):
+    """构建产物的文件名带内容哈希：内容不会变，可以长期缓存；上传的文件即使文件名像哈希也不算"""
+    return not is_upload(path, static_dir) and bool(_FINGERPRINT_RE.search(path.replace(os.sep, "/")))
+
+class PrecompressedStaticFiles(StaticFiles):
+    """优先发送预先生成的 .br / .gz 文件，并按是否带指纹设置缓存头"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        headers = {}
+        directory = os.fspath(self.directory or "static")
+        relative_path = os.path.relpath(full_path, os.path.realpath(directory))
+        if is_upload(relative_path, directory):
+            # 与 download_service 相同：只允许浏览器自身缓存，每次使用前验证
+            headers["cache-control"] = "private, no-cache"
+        elif is_fingerprinted(relative_path, directory):
+            headers["cache-control"] = f"public, max-age={Config.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            # 未带指纹的文件每次使用前验证（ETag / Last-Modified），修改后立即生效
+            headers["cache-control"] = "no-cache"
+
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        path, file_stat = full_path, stat_result
+        if os.path.splitext(full_path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            headers["vary"] = "Accept-Encoding"
+            if "range" not in request_headers:
+                accepted = accepted_encodings(request_headers.get("accept-encoding"))
+                for encoding, suffix in _SIBLING_SUFFIXES.items():
+                    if encoding not in accepted:
+                        continue
+                    try:
+                        sibling_stat = os.stat(full_path + suffix)
+                    except OSError:
+                        continue
+                    # 压缩文件比原文件旧说明原文件已修改，不再使用
+                    if sibling_stat.st_mtime >= stat_result.st_mtime:
+                        path, file_stat = full_path + suffix, sibling_stat
+                        headers["content-encoding"] = encoding
+                        break
+
+        response = FileResponse(path, status_code=status_code, headers=headers,
+                                media_type=media_type, stat_result=file_stat)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+# ---------- 构建 ----------
+def _write_if_smaller(path, data, original_size):
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return True
+
+def precompress_directory(directory, exclude=()):
+    """为目录下的文本类静态文件生成 .gz（以及 .br），跳过已是最新的文件；返回生成的文件数"""
+    exclude = [os.path.normpath(path) for path in exclude]
+    written = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if os.path.normpath(os.path.join(root, d)) not in exclude]
+        for name in files:
+            source = os.path.join(root, name)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            source_stat = os.stat(source)
+            if source_stat.st_size < Config.COMPRESSION_MIN_SIZE:
+                continue
+            data = None
+            for encoding, suffix in _SIBLING_SUFFIXES.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                target = source + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= source_stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(source, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                written += _write_if_smaller(target, compressed, len(data))
+    return written
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    directory = argv[0] if argv else "static"
+    # 上传文件不预压缩
+    written = precompress_directory(directory, exclude=[Config.UPLOAD_FOLDER])
+    encodings = "、".join(available_encodings())
+    print(f"✅ 已生成 {written} 个预压缩文件（{encodings}）")
+    if brotli is None:
+        print("⚠️ 未安装 brotli，只生成 .gz 文件")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import asyncio
+
+class LoopLagMonitor:
+    """事件循环延迟监控：定时休眠，测量实际唤醒时间比预期晚了多少"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.samples += 1
+            self.last_lag = lag
+            self.total_lag += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        """返回延迟统计（毫秒）"""
+        avg_lag = self.total_lag / self.samples if self.samples else 0.0
+        return {
+            "samples": self.samples,
+            "last_ms": round(self.last_lag * 1000, 2),
+            "avg_ms": round(avg_lag * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2)
+        }
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,238 @@
+"""Prometheus 文本格式（0.0.4）的应用指标
+
+不依赖 prometheus_client：指标只有计数器、仪表和直方图三种，按标签值元组保存在字典里，
+记录一次请求只需几次加锁累加，可以在生产环境常开。
+
+- MetricsMiddleware：按路由模板（如 /project/{project_no}）统计请求数、延迟、响应大小和进行中的请求
+- CallbackMetric：抓取时才读取的数值（连接池、SQL 汇总、事件循环延迟）
+- upload_bytes / uploads：文件上传的字节数与文件数
+- template_render_seconds：模板渲染耗时（见 utils/templating.py）
+
+/metrics 端点见 main.py（需要 Config.METRICS_TOKEN 或管理员登录）。
+"""
+import bisect
+import logging
+import threading
+import time
+from functools import lru_cache
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # 每个桶的计数（非累计）+ 溢出桶，以及总和
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def summary(self):
+        """{标签值元组: (次数, 总和)}"""
+        with self._lock:
+            return {labels: (sum(counts), total) for labels, (counts, total) in self._values.items()}
+
+    def render(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+class CallbackMetric(_Metric):
+    """抓取时调用 fn 取值：fn 返回数值，或 {标签值元组: 数值}"""
+
+    def __init__(self, name, documentation, type, fn, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.fn = fn
+
+    def render(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=()):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, type, fn, labelnames=()):
+        return self.register(CallbackMetric(name, documentation, type, fn, labelnames))
+
+    def render(self):
+        """生成 Prometheus 文本格式；单个回调出错时跳过该指标，不影响整个抓取"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("指标 %s 采集失败", metric.name)
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# ---------- HTTP 请求 ----------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP 请求数", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（含响应正文发送）", ("method", "route"), LATENCY_BUCKETS)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "HTTP 响应正文字节数", ("method", "route"), SIZE_BUCKETS)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "正在处理的 HTTP 请求数", ("method", "route"))
+
+# ---------- 文件上传 ----------
+upload_bytes = registry.counter("upload_bytes_total", "上传文件的字节数", ("kind",))
+uploads = registry.counter("uploads_total", "上传文件数", ("kind",))
+
+dedup_bytes = registry.counter("upload_dedup_bytes_total", "内容已存在、未重复占用磁盘的上传字节数")
+
+def record_upload(kind, size):
+    """记录一次文件上传（kind: contract, report, company_qualification, report_template, evaluation_standard）"""
+    uploads.inc(1, kind)
+    upload_bytes.inc(size, kind)
+
+def record_dedup(size):
+    dedup_bytes.inc(size)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """ASGI 中间件：请求开始时按路由表解析出路由模板，作为指标标签
+
+    路径参数不会进入标签（/project/P2025_001 记为 /project/{project_no}），
+    未匹配任何路由的请求统一记为 <unmatched>，标签数量有上限。
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._resolve = lru_cache(maxsize=4096)(self._route_template)
+
+    def _route_template(self, method, path):
+        scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+            if match is Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._resolve(method, scope["path"])
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(1, method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_requests_in_flight.dec(1, method, route)
+            http_request_duration.observe(time.perf_counter() - start, method, route)
+            http_response_size.observe(size, method, route)
+            http_requests.inc(1, method, route, str(status))
+
+def render_metrics():
+    return registry.render()
@@ -0,0 +1,99 @@
+"""项目列表的游标（keyset）分页
+
+按 (create_date, id) 倒序分页：下一页取 “比当前页最后一行更早” 的记录，
+上一页取 “比当前页第一行更晚” 的记录，不再需要 OFFSET，深页和首页一样快。
+游标对前端是不透明的字符串（base64 编码的 JSON）。
+create_date 不为 NULL（迁移 0013 把旧数据的 NULL 改为空字符串并由触发器保持），行值比较总有结果。
+
+总数查询（COUNT(*)）开销与页码无关但与数据量成正比，
+因此按筛选条件缓存 COUNT_CACHE_TTL 秒，翻页时不再重复计数。
+"""
+import base64
+import json
+import threading
+import time
+from fastapi import HTTPException
+from config import Config
+
+def encode_cursor(create_date, row_id, direction):
+    """direction: "next" 取该行之后（更早）的记录，"prev" 取该行之前（更晚）的记录"""
+    payload = json.dumps([create_date or "", row_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        create_date, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return create_date, int(row_id), direction
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+def keyset_query(base_query, params, cursor, limit, page=1, alias="p"):
+    """在 base_query（已含 WHERE 条件）上追加游标条件、排序和 LIMIT
+
+    没有游标时按页码回退到 OFFSET（用于直接跳转到某一页）。
+    多取一行用于判断是否还有更多数据。返回 (sql, params, direction)。
+    """
+    params = list(params)
+    if cursor:
+        create_date, row_id, direction = decode_cursor(cursor)
+        # 行值比较可以直接用 (create_date, id) 索引做范围查找
+        if direction == "next":
+            base_query += (f" AND ({alias}.create_date, {alias}.id) < (?, ?)"
+                           f" ORDER BY {alias}.create_date DESC, {alias}.id DESC LIMIT ?")
+        else:
+            base_query += (f" AND ({alias}.create_date, {alias}.id) > (?, ?)"
+                           f" ORDER BY {alias}.create_date ASC, {alias}.id ASC LIMIT ?")
+        params.extend([create_date, row_id, limit + 1])
+        return base_query, params, direction
+
+    base_query += f" ORDER BY {alias}.create_date DESC, {alias}.id DESC LIMIT ? OFFSET ?"
+    params.extend([limit + 1, (page - 1) * limit])
+    return base_query, params, None
+
+def keyset_page(rows, limit, direction, page=1):
+    """整理查询结果：按倒序返回本页的行，以及上一页/下一页游标"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    elif direction == "next":
+        has_next, has_prev = has_more, True
+    else:
+        has_next, has_prev = has_more, page > 1
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1]["create_date"], rows[-1]["id"], "next")
+    if rows and has_prev:
+        prev_cursor = encode_cursor(rows[0]["create_date"], rows[0]["id"], "prev")
+    return rows, next_cursor, prev_cursor
+
+class CountCache:
+    """按查询条件缓存 COUNT(*) 结果（允许短时间内的近似值）"""
+
+    def __init__(self, ttl=Config.COUNT_CACHE_TTL):
+        self.ttl = ttl
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, key, count_fn):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+        if cached and now - cached[1] <= self.ttl:
+            return cached[0]
+        count = count_fn()
+        with self._lock:
+            self._counts[key] = (count, now)
+        return count
+
+    def clear(self):
+        """项目新增/修改后清空，下次翻页重新计数"""
+        with self._lock:
+            self._counts.clear()
+
+count_cache = CountCache()
@@ -0,0 +1,118 @@
+"""全应用共用的 Jinja2 环境
+
+路由和 service 统一使用这里的 templates，同一进程内每个模板只编译一次：
+- 编译结果写入 Config.TEMPLATE_CACHE_DIR 的字节码缓存，重启或新开 worker 时直接加载
+- 启动时 precompile_templates 预先加载全部模板，首个请求不再承担编译开销
+- 每次渲染（render / generate）的耗时计入 template_render_seconds{template}
+- stream_template 用 generate() 边渲染边发送，配合 LazyRows（database/loaders.py）在渲染到表格时才从游标逐行读取，
+  页面头部在查询完成前就已发出，内存中不保留整张列表
+
+用法（部署时预先生成字节码缓存）：
+    python -m utils.templating
+"""
+import os
+import sys
+import time
+import jinja2
+from fastapi.templating import Jinja2Templates
+from fastapi.responses import StreamingResponse
+from config import Config
+from utils.metrics import registry, LATENCY_BUCKETS
+from utils.assets import asset_url
+
+TEMPLATE_DIR = "templates"
+
+template_render_seconds = registry.histogram(
+    "template_render_seconds", "模板渲染耗时", ("template",), LATENCY_BUCKETS)
+
+# 流式渲染时每次产出的最小字符数：generate() 按模板节点产出很多小段，合并后再发送，
+# 避免每一小段都切换一次线程池
+STREAM_BUFFER_SIZE = 64 * 1024
+
+class TimedTemplate(jinja2.Template):
+    """记录渲染耗时的模板"""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            template_render_seconds.observe(time.perf_counter() - start, self.name)
+
+    def generate(self, *args, **kwargs):
+        """小段合并到 STREAM_BUFFER_SIZE 后再产出；只累计生成内容的时间，不含等待发送的时间"""
+        elapsed = 0.0
+        buffer = []
+        buffered = 0
+        start = time.perf_counter()
+        try:
+            for part in super().generate(*args, **kwargs):
+                buffer.append(part)
+                buffered += len(part)
+                if buffered >= STREAM_BUFFER_SIZE:
+                    chunk = "".join(buffer)
+                    buffer.clear()
+                    buffered = 0
+                    elapsed += time.perf_counter() - start
+                    yield chunk
+                    start = time.perf_counter()
+            elapsed += time.perf_counter() - start
+            if buffer:
+                yield "".join(buffer)
+        finally:
+            template_render_seconds.observe(elapsed, self.name)
+
+def create_environment():
+    os.makedirs(Config.TEMPLATE_CACHE_DIR, exist_ok=True)
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(Config.TEMPLATE_CACHE_DIR),
+        # 调试模式下修改模板立即生效；生产环境不再逐次检查文件修改时间
+        auto_reload=Config.DEBUG,
+    )
+    env.template_class = TimedTemplate
+    # 页面脚本和样式的带指纹 URL（utils/assets.py）
+    env.globals["asset_url"] = asset_url
+    return env
+
+templates = Jinja2Templates(env=create_environment())
+
+def stream_template(name, context, status_code=200, headers=None):
+    """流式渲染模板（context 须包含 request）；模板在线程池中逐段生成"""
+    template = templates.env.get_template(name)
+    return StreamingResponse(
+        (chunk.encode("utf-8") for chunk in template.generate(context)),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/html; charset=utf-8",
+    )
+
+def precompile_templates(env=None):
+    """加载全部模板（编译或读取字节码缓存），返回 {模板名: 毫秒}"""
+    env = env or templates.env
+    timings = {}
+    for name in env.list_templates(extensions=["html"]):
+        start = time.perf_counter()
+        env.get_template(name)
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+def render_summary():
+    """各模板的渲染次数和平均耗时（毫秒），按总耗时排序"""
+    summary = [
+        (labels[0], count, total * 1000 / count)
+        for labels, (count, total) in template_render_seconds.summary().items() if count
+    ]
+    return sorted(summary, key=lambda item: item[1] * item[2], reverse=True)
+
+def main():
+    # 使用新环境，确保不命中内存缓存，输出的是实际编译（或读取字节码缓存）的耗时
+    timings = precompile_templates(create_environment())
+    for name, ms in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {ms:>8.1f} ms  {name}")
+    print(f"✅ 已预编译 {len(timings)} 个模板，字节码缓存: {Config.TEMPLATE_CACHE_DIR}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
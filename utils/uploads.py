@@ -0,0 +1,131 @@
+"""上传文件的保存流水线
+
+multipart 解析时 Starlette 已把上传内容放入 SpooledTemporaryFile（超过 1MB 落盘），
+stream_to_temp 在工作线程中按块把它复制到临时文件，同时累计大小、计算 SHA-256，
+超过 Config.MAX_FILE_SIZE_MB 立即中止。扩展名不在 Config.ALLOWED_EXTENSIONS 中的文件在读取前就会被拒绝。
+
+上传分两步，耗时的复制和哈希不占用写连接：
+1. stage_uploads：在取写连接之前把文件写入临时目录（校验、计算 SHA-256）
+2. store_staged：取得写连接后用 os.replace 把临时文件原子地移入按内容寻址的存储（database/blobs.py）
+   并登记，不会出现写了一半的文件，相同内容只保存一份
+
+未放入存储的临时文件由 discard_staged 删除。
+"""
+import os
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from config import Config
+from utils.helpers import is_allowed_file
+from utils.metrics import record_upload, record_dedup
+from database.blobs import store_blob, temp_dir
+from database.async_db import WriteSession
+
+CHUNK_SIZE = 1024 * 1024
+
+@dataclass
+class SavedUpload:
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+@dataclass
+class StagedUpload:
+    """已写入临时文件、尚未放入存储的上传文件"""
+    temp_path: str
+    filename: str
+    size: int
+    sha256: str
+
+class _TooLarge(Exception):
+    pass
+
+def max_upload_bytes():
+    return Config.MAX_FILE_SIZE_MB * 1024 * 1024
+
+def check_upload(upload: UploadFile):
+    """在读取内容之前检查文件名、扩展名和（已知时的）大小"""
+    if not upload.filename:
+        raise HTTPException(status_code=400, detail="请选择要上传的文件")
+    if not is_allowed_file(upload.filename, Config.ALLOWED_EXTENSIONS):
+        allowed = "、".join(sorted(Config.ALLOWED_EXTENSIONS))
+        raise HTTPException(status_code=400, detail=f"不支持的文件类型: {upload.filename}（允许: {allowed}）")
+    if upload.size is not None and upload.size > max_upload_bytes():
+        raise _too_large(upload.filename)
+
+def _too_large(filename):
+    return HTTPException(status_code=413, detail=f"文件 {filename} 超过大小限制（最大 {Config.MAX_FILE_SIZE_MB}MB）")
+
+def _copy_to_temp(source, directory, limit):
+    """在工作线程中执行：按块复制到临时文件，返回 (临时路径, 大小, sha256)"""
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            source.seek(0)
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise _TooLarge()
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path, size, digest.hexdigest()
+
+async def stream_to_temp(upload: UploadFile, directory):
+    """校验后把上传内容写入 directory 下的临时文件，返回 (临时路径, 大小, sha256)；调用方负责移动或删除"""
+    check_upload(upload)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        return await run_in_threadpool(_copy_to_temp, upload.file, directory, max_upload_bytes())
+    except _TooLarge:
+        raise _too_large(upload.filename)
+
+async def stage_upload(upload: UploadFile):
+    """把一个上传文件写入临时文件（在取写连接之前调用）"""
+    temp_path, size, sha256 = await stream_to_temp(upload, temp_dir())
+    return StagedUpload(temp_path, upload.filename, size, sha256)
+
+async def stage_uploads(uploads):
+    """把有文件名的上传文件依次写入临时文件（在取写连接之前调用）；任何一个不合格时删除已写入的临时文件"""
+    uploads = [upload for upload in uploads if upload.filename]
+    # 先检查所有文件的类型和（已知时的）大小，任何一个不合格都不写入
+    for upload in uploads:
+        check_upload(upload)
+    staged = []
+    try:
+        for upload in uploads:
+            staged.append(await stage_upload(upload))
+    except BaseException:
+        discard_staged(staged)
+        raise
+    return staged
+
+def discard_staged(staged):
+    """删除还没有放入存储的临时文件"""
+    for item in staged:
+        try:
+            os.unlink(item.temp_path)
+        except FileNotFoundError:
+            pass
+
+def store_staged(staged: StagedUpload, kind, db):
+    """把暂存的文件放入存储并登记，返回的 path/sha256 写入引用记录（需与之在同一事务内提交）"""
+    ext = os.path.splitext(staged.filename)[1].lower()
+    path, created = store_blob(db, staged.temp_path, staged.sha256, staged.size, ext)
+    if created and isinstance(db, WriteSession):
+        # 事务没有提交时，请求结束时删除
+        db.created_blobs.append((staged.sha256, path))
+    record_upload(kind, staged.size)
+    if not created:
+        record_dedup(staged.size)
+    return SavedUpload(path=path, filename=staged.filename, size=staged.size, sha256=staged.sha256)
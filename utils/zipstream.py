@@ -0,0 +1,67 @@
+"""边生成边发送的 ZIP
+
+zipfile 写入不可 seek 的输出时会在每个文件后附加数据描述符（CRC 和大小），
+不需要回写本地文件头，因此可以把写出的字节直接交给 StreamingResponse：
+内存中只保留一个块的数据和中央目录（每个文件几十字节），不使用临时文件。
+"""
+import os
+import zipfile
+
+CHUNK_SIZE = 1024 * 1024
+
+# 本身已压缩的格式直接存储，再压缩只会浪费 CPU
+STORED_EXTENSIONS = {".pdf", ".docx", ".xlsx", ".pptx", ".jpg", ".jpeg", ".png", ".gif", ".zip", ".rar", ".7z"}
+
+# 单个文件超过这个大小时使用 ZIP64 头（不可 seek 时只能事先决定）
+ZIP64_THRESHOLD = 2 ** 31
+
+class _StreamSink:
+    """zipfile 的输出对象：只追加到缓冲区，由 stream_zip 取走"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def compress_type_for(name):
+    ext = os.path.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+def stream_zip(entries, chunk_size=CHUNK_SIZE):
+    """生成 ZIP 字节块
+
+    entries 为 (压缩包内路径, 内容)：内容是 bytes，或磁盘上的文件路径（str）。
+    同步生成器，交给 StreamingResponse 时会在线程池中逐块迭代。
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for arcname, content in entries:
+            if isinstance(content, bytes):
+                zf.writestr(arcname, content, compress_type=compress_type_for(arcname))
+            else:
+                info = zipfile.ZipInfo.from_file(content, arcname)
+                info.compress_type = compress_type_for(arcname)
+                with open(content, "rb") as source, \
+                        zf.open(info, mode="w", force_zip64=info.file_size >= ZIP64_THRESHOLD) as target:
+                    while True:
+                        chunk = source.read(chunk_size)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        if len(sink.buffer) >= chunk_size:
+                            yield sink.take()
+            if sink.buffer:
+                yield sink.take()
+    # 中央目录在关闭时写出
+    if sink.buffer:
+        yield sink.take()